@@ -106,6 +106,11 @@ else:
             'HOST': os.environ.get('DB_HOST', 'localhost'),
             # El puerto por defecto
             'PORT': os.environ.get('DB_PORT', '3306'),
+            # Conexiones persistentes: cada hilo de gunicorn reutiliza la suya
+            # durante CONN_MAX_AGE segundos en lugar de abrir una por petición.
+            # La verificación previa descarta las que MySQL haya cerrado.
+            'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', '60')),
+            'CONN_HEALTH_CHECKS': True,
         }
     }
 
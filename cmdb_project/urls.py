@@ -16,7 +16,7 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
-from .views import health_check
+from .views import health_check, liveness
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -24,5 +24,6 @@ urlpatterns = [
     path('api/gestion/', include('gestion.api_urls')),
     # Rutas principales de la aplicación en la raíz (tu cambio original)
     path('', include('gestion.urls')),
-    path('health/', health_check, name='health_check'),
+    path('health/', liveness, name='liveness'),
+    path('health/ready/', health_check, name='health_check'),
 ]
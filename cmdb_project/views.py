@@ -1,7 +1,14 @@
 from django.http import HttpResponse
 from django.db import connection
 
+
+def liveness(request):
+    """Confirma que el proceso responde, sin consultar la base de datos."""
+    return HttpResponse("OK", status=200)
+
+
 def health_check(request):
+    """Readiness: verifica además que la base de datos esté disponible."""
     try:
         with connection.cursor() as cursor:
             cursor.execute("SELECT 1")
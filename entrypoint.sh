@@ -16,5 +16,11 @@ echo "Recolectando archivos estáticos..."
 python manage.py collectstatic --noinput
 
 # Iniciar servidor Gunicorn
+# Un worker con varios hilos: una carga masiva larga ocupa solo un hilo y el
+# resto de usuarios sigue siendo atendido. Se mantiene un único proceso para
+# que la caché en memoria (catálogos, conteos, modelo de similitud) sea coherente.
+# El timeout amplio evita que el worker se reinicie a mitad de una carga grande.
 echo "Iniciando Gunicorn..."
-exec gunicorn cmdb_project.wsgi:application --bind 0.0.0.0:8000
+exec gunicorn cmdb_project.wsgi:application --bind 0.0.0.0:8000 \
+    --worker-class gthread --threads "${GUNICORN_THREADS:-4}" \
+    --timeout "${GUNICORN_TIMEOUT:-120}"
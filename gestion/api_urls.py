@@ -1,12 +1,12 @@
 from django.urls import path
-from .views import recommendations
+from .views.utils import lazy_view
 
 app_name = 'gestion_api'
 
 urlpatterns = [
     # Aquí van todas las URLs de tu API
-    path('recommend-closure-code/', recommendations.recommend_closure_code_view,
+    path('recommend-closure-code/', lazy_view('gestion.views.recommendations.recommend_closure_code_view'),
          name='recommend_closure_code'),
-    path('train-model/', recommendations.reentrenar_modelo_view,
+    path('train-model/', lazy_view('gestion.views.recommendations.reentrenar_modelo_view'),
          name='train_model'),
 ]
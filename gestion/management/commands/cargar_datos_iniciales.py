@@ -1,7 +1,7 @@
 # gestion/management/commands/cargar_datos_iniciales.py
 
 from django.core.management.base import BaseCommand
-from django.db import transaction
+from django.db import connection, transaction
 from gestion.models import (
     Usuario, Estado, Impacto, Interfaz, Severidad, Bloque,
     GrupoResolutor, DiaFeriado, HorarioLaboral, ReglaSLA, Criticidad, Cluster
@@ -12,13 +12,22 @@ from datetime import datetime, time, timedelta
 class Command(BaseCommand):
     help = 'Carga los datos iniciales de todas las tablas catálogo en la base de datos, manteniendo los IDs específicos.'
 
+    def _upsert(self, model, objs, update_fields):
+        """Inserta o actualiza en bloque los registros, conservando sus IDs."""
+        opciones = {'update_conflicts': True, 'update_fields': update_fields}
+        # MySQL resuelve el conflicto por cualquier clave única (ON DUPLICATE KEY)
+        if connection.features.supports_update_conflicts_with_target:
+            opciones['unique_fields'] = ['id']
+        model.objects.bulk_create(objs, **opciones)
+
     @transaction.atomic
     def handle(self, *args, **kwargs):
-        self.stdout.write(self.style.SUCCESS(
-            "--- Iniciando la carga de datos iniciales ---"))
+        # Los mensajes se acumulan y se escriben en una sola operación al final
+        salida = [self.style.SUCCESS(
+            "--- Iniciando la carga de datos iniciales ---")]
 
         # --- Cargando Usuarios ---
-        self.stdout.write("Cargando Usuarios...")
+        salida.append("Cargando Usuarios...")
         usuarios_data = [
             {'id': 1, 'usuario': 'ind_bllacc',
                 'nombre': 'BETSY LLACCHUARIMAY DE LA CRUZ', 'habilitado': False},
@@ -53,14 +62,13 @@ class Command(BaseCommand):
             {'id': 16, 'usuario': 'ind_greyes',
                 'nombre': 'GUSTAVO REYES ROMERO', 'habilitado': True},
         ]
-        for data in usuarios_data:
-            obj_id = data.pop('id')
-            Usuario.objects.update_or_create(id=obj_id, defaults=data)
-        self.stdout.write(self.style.SUCCESS(
+        self._upsert(Usuario, [Usuario(**d) for d in usuarios_data],
+                     ['usuario', 'nombre', 'habilitado'])
+        salida.append(self.style.SUCCESS(
             "Usuarios cargados/actualizados."))
 
         # --- Cargando Estados ---
-        self.stdout.write("Cargando Estados...")
+        salida.append("Cargando Estados...")
         estados_data = [
             {'id': 1, 'desc_estado': 'Construccion', 'uso_estado': 'Aplicacion'},
             {'id': 2, 'desc_estado': 'Produccion', 'uso_estado': 'Aplicacion'},
@@ -70,67 +78,61 @@ class Command(BaseCommand):
             {'id': 6, 'desc_estado': 'Cerrado', 'uso_estado': 'Incidencia'},
             {'id': 7, 'desc_estado': 'Cancelado', 'uso_estado': 'Incidencia'},
         ]
-        for data in estados_data:
-            obj_id = data.pop('id')
-            Estado.objects.update_or_create(id=obj_id, defaults=data)
-        self.stdout.write(self.style.SUCCESS(
+        self._upsert(Estado, [Estado(**d) for d in estados_data],
+                     ['desc_estado', 'uso_estado'])
+        salida.append(self.style.SUCCESS(
             "Estados cargados/actualizados."))
 
         # --- Cargando Impactos ---
-        self.stdout.write("Cargando Impactos...")
+        salida.append("Cargando Impactos...")
         impactos_data = [
             {'id': 1, 'desc_impacto': 'interno'},
             {'id': 2, 'desc_impacto': 'externo'},
             {'id': 3, 'desc_impacto': 'sin definir'},
         ]
-        for data in impactos_data:
-            obj_id = data.pop('id')
-            Impacto.objects.update_or_create(id=obj_id, defaults=data)
-        self.stdout.write(self.style.SUCCESS(
+        self._upsert(Impacto, [Impacto(**d) for d in impactos_data],
+                     ['desc_impacto'])
+        salida.append(self.style.SUCCESS(
             "Impactos cargados/actualizados."))
 
         # --- Cargando Interfaces ---
-        self.stdout.write("Cargando Interfaces...")
+        salida.append("Cargando Interfaces...")
         interfaces_data = [(1, 'No definida'), (2, 'WEB'), (3, 'Tabla'), (4, 'Sin servicio'), (5, 'Sin despliegue de información'), (6, 'Sin activación'), (7, 'Sin acceso'), (8, 'SERVIDOR'), (9, 'Reporte'), (10, 'PRODUCTOS PS'), (11, 'Proceso'), (12, 'Portabilidad'), (13, 'Peticiones sin aplicar'), (14, 'Normalización y factibilidad técnica multiservicio'),
                            (15, 'Infraestructura'), (16, 'Indisponibilidad PMS'), (17, 'Inconsistencia de datos'), (18, 'FTP'), (19, 'Frontend'), (20, 'Cuenta'), (21, 'Contención'), (22, 'Consumo de CPU'), (23, 'Cancelación de proceso'), (24, 'Base de datos'), (25, 'BACKEND'), (26, 'Archivo'), (27, 'Aplicativo'), (28, 'Agenda WEB')]
-        for obj_id, desc in interfaces_data:
-            Interfaz.objects.update_or_create(
-                id=obj_id, defaults={'desc_interfaz': desc})
-        self.stdout.write(self.style.SUCCESS(
+        self._upsert(Interfaz, [Interfaz(id=obj_id, desc_interfaz=desc) for obj_id, desc in interfaces_data],
+                     ['desc_interfaz'])
+        salida.append(self.style.SUCCESS(
             "Interfaces cargadas/actualizadas."))
 
         # --- Cargando Severidades ---
-        self.stdout.write("Cargando Severidades...")
+        salida.append("Cargando Severidades...")
         severidades_data = [(1, 'critica'), (2, 'alta'),
                             (3, 'media'), (4, 'baja'), (5, 'sin prioridad')]
-        for obj_id, desc in severidades_data:
-            Severidad.objects.update_or_create(
-                id=obj_id, defaults={'desc_severidad': desc})
-        self.stdout.write(self.style.SUCCESS(
+        self._upsert(Severidad, [Severidad(id=obj_id, desc_severidad=desc) for obj_id, desc in severidades_data],
+                     ['desc_severidad'])
+        salida.append(self.style.SUCCESS(
             "Severidades cargadas/actualizadas."))
 
         # --- Cargando Bloques ---
-        self.stdout.write("Cargando Bloques...")
+        salida.append("Cargando Bloques...")
         bloques_data = [(1, 'BLOQUE 1'), (2, 'BLOQUE 2'),
                         (3, 'BLOQUE 3'), (4, 'BLOQUE 4'), (5, 'Sin bloque')]
-        for obj_id, desc in bloques_data:
-            Bloque.objects.update_or_create(
-                id=obj_id, defaults={'desc_bloque': desc})
-        self.stdout.write(self.style.SUCCESS(
+        self._upsert(Bloque, [Bloque(id=obj_id, desc_bloque=desc) for obj_id, desc in bloques_data],
+                     ['desc_bloque'])
+        salida.append(self.style.SUCCESS(
             "Bloques cargados/actualizados."))
 
         # --- Cargando Grupos Resolutores ---
-        self.stdout.write("Cargando Grupos Resolutores...")
+        salida.append("Cargando Grupos Resolutores...")
         grupos_data = [(1, 'grupo_generico'), (2, 'Everis N2'), (3, 'HP-SPN'), (4, 'ACC N2'), (5, 'AMDOCS N2'), (7, 'INDRA N2'), (8, 'Soporte DWH G11'), (9, 'SOPORTE DWH MOVIL'),
                        (10, 'Soporte Génesis G1'), (11, 'SWF_INDRA_G1'), (12, 'SWF_INDRA_G11'), (13, 'SWF_INDRA_G3'), (14, 'SWF_INDRA_G5'), (15, 'SWF_INDRA_3B'), (16, 'INDRA_D')]
-        for obj_id, desc in grupos_data:
-            GrupoResolutor.objects.update_or_create(
-                id=obj_id, defaults={'desc_grupo_resol': desc})
-        self.stdout.write(self.style.SUCCESS(
+        self._upsert(GrupoResolutor, [GrupoResolutor(id=obj_id, desc_grupo_resol=desc) for obj_id, desc in grupos_data],
+                     ['desc_grupo_resol'])
+        salida.append(self.style.SUCCESS(
             "Grupos Resolutores cargados/actualizados."))
 
         # --- Cargando Días Feriados ---
-        self.stdout.write("Cargando Días Feriados...")
+        salida.append("Cargando Días Feriados...")
         feriados_data = [
             {'id': 1, 'fecha': '2025-06-20',
                 'descripcion': 'Día Nacional de los Pueblos Indígenas'},
@@ -151,15 +153,17 @@ class Command(BaseCommand):
                 'descripcion': 'Inmaculada Concepción'},
             {'id': 11, 'fecha': '2025-12-25', 'descripcion': 'Navidad'},
         ]
-        for data in feriados_data:
-            obj_id = data.pop('id')
-            data['fecha'] = datetime.strptime(data['fecha'], '%Y-%m-%d').date()
-            DiaFeriado.objects.update_or_create(id=obj_id, defaults=data)
-        self.stdout.write(self.style.SUCCESS(
+        feriados = [
+            DiaFeriado(id=d['id'], fecha=datetime.strptime(d['fecha'], '%Y-%m-%d').date(),
+                       descripcion=d['descripcion'])
+            for d in feriados_data
+        ]
+        self._upsert(DiaFeriado, feriados, ['fecha', 'descripcion'])
+        salida.append(self.style.SUCCESS(
             "Días Feriados cargados/actualizados."))
 
         # --- Cargando Horario Laboral ---
-        self.stdout.write("Cargando Horario Laboral...")
+        salida.append("Cargando Horario Laboral...")
         horarios_data = [
             {'id': 1, 'dia_semana': 0, 'hora_inicio': time(
                 9, 0), 'hora_fin': time(18, 0)},
@@ -174,33 +178,31 @@ class Command(BaseCommand):
             {'id': 6, 'dia_semana': 5, 'hora_inicio': None, 'hora_fin': None},
             {'id': 7, 'dia_semana': 6, 'hora_inicio': None, 'hora_fin': None},
         ]
-        for data in horarios_data:
-            obj_id = data.pop('id')
-            HorarioLaboral.objects.update_or_create(id=obj_id, defaults=data)
-        self.stdout.write(self.style.SUCCESS(
+        self._upsert(HorarioLaboral, [HorarioLaboral(**d) for d in horarios_data],
+                     ['dia_semana', 'hora_inicio', 'hora_fin'])
+        salida.append(self.style.SUCCESS(
             "Horarios Laborales cargados/actualizados."))
 
         # --- Cargando Clusters ---
-        self.stdout.write("Cargando Clusters...")
+        salida.append("Cargando Clusters...")
         clusters_data = [(1, 'Datos'), (2, 'SW'), (3, 'Reproceso'), (4, 'Apoyo Infraestructura'), (5, 'Apoyo Configuración'), (6, 'Apoyo Usuario'), (7, 'Apoyo Procedimiento Comercial'), (
             8, 'Apoyo Control-M'), (9, 'Apoyo Contenida en IT'), (10, 'Apoyo Proveedor sin Soporte TI'), (11, 'Apoyo (Otra Casuística)'), (12, 'Apoyo No Replica en Producción'), (13, 'Sin Cluster')]
-        for obj_id, desc in clusters_data:
-            Cluster.objects.update_or_create(
-                id=obj_id, defaults={'desc_cluster': desc})
-        self.stdout.write(self.style.SUCCESS(
+        self._upsert(Cluster, [Cluster(id=obj_id, desc_cluster=desc) for obj_id, desc in clusters_data],
+                     ['desc_cluster'])
+        salida.append(self.style.SUCCESS(
             "Clusters cargados/actualizados."))
 
         # --- Cargando Criticidades (necesario para Reglas SLA) ---
-        self.stdout.write("Cargando Criticidades...")
-        Criticidad.objects.update_or_create(
-            id=1, defaults={'desc_criticidad': 'critica'})
-        Criticidad.objects.update_or_create(
-            id=2, defaults={'desc_criticidad': 'no critica'})
-        self.stdout.write(self.style.SUCCESS(
+        salida.append("Cargando Criticidades...")
+        self._upsert(Criticidad, [
+            Criticidad(id=1, desc_criticidad='critica'),
+            Criticidad(id=2, desc_criticidad='no critica'),
+        ], ['desc_criticidad'])
+        salida.append(self.style.SUCCESS(
             "Criticidades cargadas/actualizadas."))
 
         # --- Cargando Reglas de SLA ---
-        self.stdout.write("Cargando Reglas de SLA...")
+        salida.append("Cargando Reglas de SLA...")
         reglas_data = [
             {'id': 1, 'tiempo_sla': timedelta(
                 hours=4), 'criticidad_aplicacion_id': 1, 'severidad_id': 1},
@@ -223,12 +225,12 @@ class Command(BaseCommand):
             {'id': 10, 'tiempo_sla': timedelta(
                 hours=96), 'criticidad_aplicacion_id': 2, 'severidad_id': 5},
         ]
-        for data in reglas_data:
-            obj_id = data.pop('id')
-            ReglaSLA.objects.update_or_create(id=obj_id, defaults=data)
-        self.stdout.write(self.style.SUCCESS(
+        self._upsert(ReglaSLA, [ReglaSLA(**d) for d in reglas_data],
+                     ['tiempo_sla', 'criticidad_aplicacion', 'severidad'])
+        salida.append(self.style.SUCCESS(
             "Reglas SLA cargadas/actualizadas."))
 
-        self.stdout.write(self.style.SUCCESS(
+        salida.append(self.style.SUCCESS(
             "\n¡Proceso de carga de datos iniciales finalizado!"))
+        self.stdout.write("\n".join(salida))
 
@@ -7,11 +7,16 @@ from gestion.ml.incident_classifier import build_and_save_similarity_model
 class Command(BaseCommand):
     help = 'Construye y guarda el modelo de similitud de texto para los Códigos de Cierre.'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Re-entrena el modelo completo en lugar de vectorizar solo los códigos nuevos o modificados.')
+
     def handle(self, *args, **options):
         self.stdout.write(self.style.SUCCESS(
             'Iniciando la construcción del modelo de similitud...'))
         try:
-            build_and_save_similarity_model()
+            build_and_save_similarity_model(full=options['full'])
             self.stdout.write(self.style.SUCCESS('¡Construcción completada!'))
         except Exception as e:
             self.stderr.write(self.style.ERROR(
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.4 on 2026-10-14 09:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0002_incidencia_fecha_creacion_incidencia_usuario_creador'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='incidencia',
+            index=models.Index(fields=['codigo_cierre', '-fecha_apertura'], name='idx_inc_codcierre_fecha'),
+        ),
+    ]
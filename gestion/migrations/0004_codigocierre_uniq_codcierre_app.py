@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-14 09:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0003_incidencia_idx_inc_codcierre_fecha'),
+    ]
+
+    # Se crea la nueva restricción antes de quitar el unique_together, para no
+    # dejar ninguna ventana sin unicidad.
+    operations = [
+        migrations.AddConstraint(
+            model_name='codigocierre',
+            constraint=models.UniqueConstraint(fields=('cod_cierre', 'aplicacion'), name='uniq_codcierre_app'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='codigocierre',
+            unique_together=set(),
+        ),
+    ]
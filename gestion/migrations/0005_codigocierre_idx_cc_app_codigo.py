@@ -0,0 +1,17 @@
+# Generated by Django 5.2.4 on 2026-10-14 09:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0004_codigocierre_uniq_codcierre_app'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='codigocierre',
+            index=models.Index(fields=['aplicacion', 'cod_cierre'], name='idx_cc_app_codigo'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.4 on 2026-10-14 12:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0005_codigocierre_idx_cc_app_codigo'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='incidencia',
+            index=models.Index(fields=['fecha_ultima_resolucion'], name='idx_inc_fecha_resol'),
+        ),
+        migrations.AddIndex(
+            model_name='incidencia',
+            index=models.Index(fields=['aplicacion', 'fecha_ultima_resolucion'], name='idx_inc_app_fecha_resol'),
+        ),
+        migrations.AddIndex(
+            model_name='incidencia',
+            index=models.Index(fields=['bloque', 'fecha_ultima_resolucion'], name='idx_inc_bloque_fecha_resol'),
+        ),
+    ]
@@ -1,9 +1,20 @@
 # gestion/ml/incident_classifier.py
 
+import hashlib
 import joblib
+import numpy as np
+import os
+import re
+import threading
+from collections import OrderedDict, defaultdict
+from functools import lru_cache
 from django.conf import settings
+from django.db.models import Count, F, Max, Sum, TextField, Value, Window
+from django.db.models.functions import Coalesce, Concat, Length, RowNumber
 from gestion.models import CodigoCierre, Incidencia
-from sklearn.feature_extraction.text import TfidfVectorizer
+from scipy.sparse import vstack
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
+from sklearn.pipeline import make_pipeline
 import logging
 
 
@@ -19,61 +30,294 @@ logger = logging.getLogger(__name__)
 # Definimos la ruta donde se guardará el modelo entrenado
 MODEL_PATH = settings.BASE_DIR / "gestion" / "ml" / "similarity_model.joblib"
 
+# Tokenizador precompilado (mismo patrón que el token_pattern por defecto de scikit-learn)
+TOKEN_RE = re.compile(r"(?u)\b\w\w+\b")
 
-def build_and_save_similarity_model():
+# Cantidad de incidencias recientes que se consideran por cada código de cierre
+HISTORIAL_POR_CODIGO = 50
+
+# Proporción de códigos nuevos a partir de la cual se re-entrena el modelo completo
+UMBRAL_REENTRENAMIENTO_COMPLETO = 0.2
+
+
+@lru_cache(maxsize=1)
+def _cargar_modelo(mtime):
+    """Deserializa el modelo; el caché se invalida cuando cambia el mtime del archivo."""
+    # mmap_mode='r': los arreglos de la matriz dispersa se mapean desde el
+    # archivo y se comparten entre los workers en lugar de copiarse.
+    model_data = joblib.load(MODEL_PATH, mmap_mode='r')
+    # Como arreglo, los ids de las sugerencias se obtienen con un solo indexado
+    model_data['code_ids'] = np.asarray(model_data['code_ids'], dtype=np.int64)
+    # El filtro vive junto al modelo: al re-generarse el archivo se descarta con él
+    model_data['filtrar_por_aplicacion'] = _crear_filtro_por_aplicacion(
+        model_data['tfidf_matrix'], model_data['code_ids'], model_data.get('code_to_app_map', {}))
+    model_data['vectorizar'] = _crear_vectorizador_con_cache(model_data['vectorizer'])
+    logger.info("Modelo de similitud cargado correctamente.")
+    return model_data
+
+
+def _crear_filtro_por_aplicacion(tfidf_matrix, code_ids, code_to_app_map):
+    """
+    Crea la función que, para un application_id, devuelve la submatriz TF-IDF y
+    los code_ids de los códigos de esa aplicación y de los que no tienen
+    aplicación asociada. El resultado no cambia mientras el modelo sea el
+    mismo, por lo que se guarda en un caché LRU por aplicación.
+    """
+    # Índice invertido aplicación -> filas, calculado una sola vez por modelo;
+    # los códigos sin aplicación se marcan en una máscara común a todas
+    filas_por_app = defaultdict(list)
+    mascara_sin_app = np.zeros(len(code_ids), dtype=bool)
+    for i, code_id in enumerate(code_ids.tolist()):
+        app_list = code_to_app_map.get(code_id, [])
+        if not app_list:
+            mascara_sin_app[i] = True
+        for app_id in app_list:
+            filas_por_app[app_id].append(i)
+    filas_por_app = {
+        app_id: np.asarray(filas, dtype=np.int32) for app_id, filas in filas_por_app.items()}
+
+    @lru_cache(maxsize=256)
+    def filtrar(application_id):
+        # La máscara booleana conserva el orden original de las filas
+        mascara = mascara_sin_app.copy()
+        if application_id in filas_por_app:
+            mascara[filas_por_app[application_id]] = True
+        return tfidf_matrix[mascara], code_ids[mascara]
+
+    return filtrar
+
+
+# Descripciones vectorizadas que se conservan en memoria por modelo
+VECTORES_EN_CACHE = 1024
+
+
+def _crear_vectorizador_con_cache(vectorizer):
+    """
+    Crea la función que vectoriza un texto ya normalizado, recordando los
+    últimos VECTORES_EN_CACHE resultados (p. ej. si se pide sugerencia dos
+    veces para la misma descripción). La clave es el SHA-1 del texto, para que
+    descripciones muy largas no queden retenidas en memoria.
+    """
+    vectores = OrderedDict()
+    lock = threading.Lock()
+
+    def vectorizar(texto):
+        clave = hashlib.sha1(texto.encode('utf-8')).digest()
+        with lock:
+            vector = vectores.get(clave)
+            if vector is not None:
+                vectores.move_to_end(clave)
+                return vector
+        vector = vectorizer.transform([texto])
+        with lock:
+            vectores[clave] = vector
+            if len(vectores) > VECTORES_EN_CACHE:
+                vectores.popitem(last=False)
+        return vector
+
+    return vectorizar
+
+
+# lru_cache no impide que varios hilos deserialicen el modelo a la vez cuando
+# aún no está en caché (primera petición o archivo re-generado)
+_LOCK_CARGA_MODELO = threading.Lock()
+
+
+def cargar_modelo():
+    """
+    Devuelve el modelo de similitud, leyéndolo del disco solo la primera vez o
+    cuando el archivo fue re-generado. Lanza FileNotFoundError si no existe.
+    """
+    mtime = os.path.getmtime(MODEL_PATH)
+    with _LOCK_CARGA_MODELO:
+        return _cargar_modelo(mtime)
+
+
+# Campos de las incidencias que forman el historial de cada código de cierre
+CAMPOS_TEXTO_HISTORIAL = ('descripcion_incidencia', 'causa', 'solucion_final', 'observaciones')
+
+
+def _cargar_historial_por_codigo(codigo_ids=None):
+    """
+    Obtiene en una sola consulta las últimas HISTORIAL_POR_CODIGO incidencias de
+    cada código de cierre y las agrupa por codigo_cierre_id. Si se indica
+    `codigo_ids`, solo se consultan esos códigos. La base de datos concatena
+    los campos de texto, devolviendo un único string por incidencia.
+    """
+    separador = Value(' ')
+    partes = []
+    for campo in CAMPOS_TEXTO_HISTORIAL:
+        partes.extend([Coalesce(campo, Value('')), separador])
+
+    incidencias = (
+        Incidencia.objects
+        .filter(codigo_cierre__isnull=False)
+        .annotate(rn=Window(
+            expression=RowNumber(),
+            partition_by=[F('codigo_cierre_id')],
+            order_by=F('fecha_apertura').desc(),
+        ))
+        .filter(rn__lte=HISTORIAL_POR_CODIGO)
+        .order_by()
+        .annotate(texto=Concat(*partes[:-1], output_field=TextField()))
+        .values_list('codigo_cierre_id', 'texto')
+    )
+    if codigo_ids is not None:
+        incidencias = incidencias.filter(codigo_cierre_id__in=codigo_ids)
+
+    historial = defaultdict(list)
+    for codigo_id, texto in incidencias:
+        historial[codigo_id].append(texto)
+    return historial
+
+
+def _calcular_huellas(codigos):
+    """
+    Devuelve {codigo_id: huella} con un resumen de todo lo que entra en el
+    documento de cada código: su descripción y causa, y de sus incidencias la
+    cantidad, la última fecha de apertura, el mayor id y el largo total de los
+    campos de texto. Las estadísticas de las incidencias se agregan en la base
+    de datos con una sola consulta, sin traer los textos.
+    """
+    largo_textos = sum(
+        (Coalesce(Length(campo), Value(0)) for campo in CAMPOS_TEXTO_HISTORIAL[1:]),
+        Coalesce(Length(CAMPOS_TEXTO_HISTORIAL[0]), Value(0)))
+    estadisticas = {
+        codigo_id: resto for codigo_id, *resto in (
+            Incidencia.objects
+            .filter(codigo_cierre__isnull=False)
+            .order_by()
+            .values('codigo_cierre_id')
+            .annotate(n=Count('id'), ultima=Max('fecha_apertura'), max_id=Max('id'),
+                      largo=Sum(largo_textos))
+            .values_list('codigo_cierre_id', 'n', 'ultima', 'max_id', 'largo')
+        )
+    }
+    return {
+        codigo_id: hashlib.sha1(repr(
+            (desc_cod_cierre, causa_cierre, estadisticas.get(codigo_id))).encode('utf-8')).hexdigest()
+        for codigo_id, desc_cod_cierre, causa_cierre, _ in codigos
+    }
+
+
+def _cargar_modelo_previo():
+    """Lee el modelo guardado para un re-entrenamiento incremental, si es posible."""
+    try:
+        model_data = joblib.load(MODEL_PATH)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"No se pudo leer el modelo previo, se re-entrenará completo: {e}")
+        return None
+    # Los modelos anteriores no guardaban la matriz de conteos ni las huellas
+    return model_data if 'term_counts' in model_data and 'fingerprints' in model_data else None
+
+
+def build_and_save_similarity_model(full=False):
     """
     Carga todos los CodigoCierre, los vectoriza y guarda el modelo para búsqueda de similitud.
     Modo Híbrido: Incluye historial de incidencias reales.
+
+    Por defecto es incremental: reutiliza los vectores de los códigos cuya
+    huella (texto propio y estadísticas de sus incidencias) no cambió y
+    vectoriza los nuevos o modificados, recalculando el IDF sobre todos. Con
+    `full=True`, o si los pendientes superan UMBRAL_REENTRENAMIENTO_COMPLETO,
+    se reconstruye todo el corpus.
     """
     # 1. Cargar datos desde la base de datos
-    codigos = CodigoCierre.objects.select_related('aplicacion').all()
+    # Tuplas planas (id, descripción, causa, aplicacion_id): sin instanciar modelos
+    codigos = list(
+        CodigoCierre.objects.values_list('id', 'desc_cod_cierre', 'causa_cierre', 'aplicacion_id')
+    )
 
-    if not codigos.exists():
+    if not codigos:
         logger.warning(
             "No hay códigos de cierre en la base de datos para construir el modelo de similitud.")
         return
 
-    # 2. Preparar los textos (Modo Híbrido)
-    corpus = []
-    code_ids = []
-    code_to_app_map = {}
-
-    logger.info(f"Iniciando entrenamiento híbrido con {codigos.count()} códigos...")
-
-    for c in codigos:
-        # Texto base (Definición teórica)
-        texto_base = f"{c.desc_cod_cierre} {c.causa_cierre}"
-        
-        # Texto histórico (Evidencia práctica)
-        # Limitamos a 50 últimas incidencias para balancear rendimiento y relevancia
-        incidencias = Incidencia.objects.filter(codigo_cierre=c).order_by('-fecha_apertura')[:50]
-        
-        texto_historial = " ".join([
-            f"{inc.descripcion_incidencia or ''} {inc.causa or ''} {inc.solucion_final or ''} {inc.observaciones or ''}"
-            for inc in incidencias
-        ])
-        
-        # Combinar y normalizar
-        texto_completo = normalizar_texto(f"{texto_base} {texto_historial}")
-        
-        corpus.append(texto_completo)
-        code_ids.append(c.id)
-        code_to_app_map[c.id] = [c.aplicacion.id] if c.aplicacion else []
-
-    # 3. Crear y "entrenar" el vectorizador
-    vectorizer = TfidfVectorizer(max_features=5000, ngram_range=(
-        1, 2), stop_words='english')
+    code_to_app_map = {
+        codigo_id: [app_id] if app_id else [] for codigo_id, _, _, app_id in codigos}
+
+    # 2. Determinar qué códigos hay que vectorizar: los nuevos y aquellos cuyo
+    # texto o historial de incidencias cambió desde el entrenamiento anterior
+    huellas = _calcular_huellas(codigos)
+    modelo_previo = None if full else _cargar_modelo_previo()
+    filas_previas = []
+    if modelo_previo:
+        huellas_previas = modelo_previo['fingerprints']
+        fila_por_codigo = {
+            codigo_id: i for i, codigo_id in enumerate(modelo_previo['code_ids'])
+            if huellas_previas.get(codigo_id) == huellas.get(codigo_id)}
+        filas_previas = [
+            (codigo_id, fila_por_codigo[codigo_id]) for codigo_id, _, _, _ in codigos
+            if codigo_id in fila_por_codigo]
+        pendientes = [c for c in codigos if c[0] not in fila_por_codigo]
+        if len(pendientes) / len(codigos) > UMBRAL_REENTRENAMIENTO_COMPLETO:
+            logger.info("Demasiados códigos nuevos o modificados, se re-entrenará el modelo completo.")
+            modelo_previo, filas_previas = None, []
+
+    if not modelo_previo:
+        pendientes = codigos
+
+    logger.info(
+        f"Iniciando entrenamiento híbrido: {len(pendientes)} códigos a vectorizar "
+        f"de {len(codigos)} ({'incremental' if modelo_previo else 'completo'})...")
+
+    # Historial de las incidencias en una sola consulta (evita N+1)
+    historial_por_codigo = _cargar_historial_por_codigo(
+        [codigo_id for codigo_id, _, _, _ in pendientes] if modelo_previo else None)
+
+    def documentos():
+        """Genera el texto de cada código sin materializar el corpus completo."""
+        for codigo_id, desc_cod_cierre, causa_cierre, _ in pendientes:
+            # Texto base (Definición teórica) + texto histórico (Evidencia práctica).
+            # Limitamos a 50 últimas incidencias para balancear rendimiento y relevancia.
+            # La normalización (minúsculas, acentos) la realiza el vectorizador.
+            yield " ".join(filter(None, (
+                desc_cod_cierre, causa_cierre, *historial_por_codigo.get(codigo_id, ()))))
+
+    # 3. Crear y "entrenar" el vectorizador.
+    # HashingVectorizer no guarda vocabulario y procesa los documentos en
+    # streaming; TfidfTransformer aplica luego la ponderación IDF.
+    if modelo_previo:
+        hasher = modelo_previo['vectorizer'].steps[0][1]
+    else:
+        hasher = HashingVectorizer(
+            n_features=2**18, ngram_range=(1, 2), stop_words='english', lowercase=True,
+            strip_accents='unicode', tokenizer=TOKEN_RE.findall, token_pattern=None,
+            alternate_sign=False, norm=None, dtype=np.float32)
+    tfidf = TfidfTransformer()
 
     logger.info("Construyendo la matriz de vectores de los códigos de cierre...")
-    tfidf_matrix = vectorizer.fit_transform(corpus)
+    code_ids = [codigo_id for codigo_id, _ in filas_previas]
+    bloques = []
+    if filas_previas:
+        bloques.append(modelo_previo['term_counts'][[fila for _, fila in filas_previas]])
+    if pendientes:
+        code_ids += [codigo_id for codigo_id, _, _, _ in pendientes]
+        bloques.append(hasher.transform(documentos()))
+    term_counts = vstack(bloques, format='csr')
+
+    # El IDF se recalcula siempre sobre todos los códigos (operación barata)
+    tfidf_matrix = tfidf.fit_transform(term_counts)
+
+    # El pipeline expone el mismo .transform() que usa la vista de recomendación
+    vectorizer = make_pipeline(hasher, tfidf)
 
     # 4. Guardar los componentes necesarios para la búsqueda
     model_data = {
         'vectorizer': vectorizer,
         'tfidf_matrix': tfidf_matrix,
+        'term_counts': term_counts,
         'code_ids': code_ids,
-        'code_to_app_map': code_to_app_map
+        'code_to_app_map': code_to_app_map,
+        'fingerprints': huellas,
     }
 
-    joblib.dump(model_data, MODEL_PATH)
+    # Sin compresión para permitir mmap al cargar; protocolo 5 evita copias de
+    # los buffers. Se escribe a un temporal y se reemplaza de forma atómica para
+    # no truncar el archivo que otros workers tienen mapeado.
+    tmp_path = MODEL_PATH.with_suffix('.joblib.tmp')
+    joblib.dump(model_data, tmp_path, compress=0, protocol=5)
+    os.replace(tmp_path, MODEL_PATH)
     logger.info(f"Modelo de similitud guardado exitosamente en: {MODEL_PATH}")
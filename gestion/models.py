@@ -97,7 +97,13 @@ class CodigoCierre(models.Model):
 
     class Meta:
         # Asegura que la combinación de código y aplicación sea única.
-        unique_together = ('cod_cierre', 'aplicacion')
+        constraints = [
+            models.UniqueConstraint(fields=['cod_cierre', 'aplicacion'], name='uniq_codcierre_app'),
+        ]
+        indexes = [
+            # Listado filtrado por aplicación y ordenado por código
+            models.Index(fields=['aplicacion', 'cod_cierre'], name='idx_cc_app_codigo'),
+        ]
 
     def __str__(self) -> str:
         return self.cod_cierre
@@ -212,6 +218,18 @@ class Incidencia(models.Model):
         verbose_name = "Incidencia"
         verbose_name_plural = "Incidencias"
         ordering = ['-fecha_apertura']
+        indexes = [
+            # Últimas incidencias por código de cierre (entrenamiento del modelo)
+            models.Index(fields=['codigo_cierre', '-fecha_apertura'],
+                         name='idx_inc_codcierre_fecha'),
+            # Filtros del listado: el filtro por defecto es un rango sobre la
+            # fecha de resolución, combinado a menudo con aplicación o bloque
+            models.Index(fields=['fecha_ultima_resolucion'], name='idx_inc_fecha_resol'),
+            models.Index(fields=['aplicacion', 'fecha_ultima_resolucion'],
+                         name='idx_inc_app_fecha_resol'),
+            models.Index(fields=['bloque', 'fecha_ultima_resolucion'],
+                         name='idx_inc_bloque_fecha_resol'),
+        ]
 
 
 class Usuario(models.Model):
@@ -0,0 +1,63 @@
+# gestion/signals.py
+
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+
+from .models import (Aplicacion, Bloque, Cluster, CodigoCierre, Criticidad, Estado, GrupoResolutor,
+                     Impacto, Interfaz, Severidad, Usuario)
+from .views.aplicaciones import DROPDOWNS_APLICACION_CACHE_KEY
+from .views.cod_cierre import (APLICACIONES_DROPDOWN_CACHE_KEY, CODIGOS_DROPDOWN_CACHE_KEY,
+                               invalidar_ultimos_codigos)
+from .views.incidencias import FILTROS_INCIDENCIA_CACHE_KEY, OPCIONES_FORMULARIO_CACHE_KEY
+
+
+def invalidar_dropdowns_aplicacion(sender, **kwargs):
+    """Elimina de la caché los catálogos de los menús desplegables de aplicaciones."""
+    cache.delete(DROPDOWNS_APLICACION_CACHE_KEY)
+
+
+for modelo in (Bloque, Criticidad, Estado):
+    post_save.connect(invalidar_dropdowns_aplicacion, sender=modelo)
+    post_delete.connect(invalidar_dropdowns_aplicacion, sender=modelo)
+
+
+def invalidar_dropdown_aplicaciones(sender, **kwargs):
+    """Elimina de la caché la lista de aplicaciones del filtro de códigos de cierre."""
+    cache.delete(APLICACIONES_DROPDOWN_CACHE_KEY)
+
+
+post_save.connect(invalidar_dropdown_aplicaciones, sender=Aplicacion)
+post_delete.connect(invalidar_dropdown_aplicaciones, sender=Aplicacion)
+
+
+def invalidar_cache_codigos_cierre(sender, **kwargs):
+    """
+    Invalida los últimos códigos de cierre por aplicación y la lista de códigos
+    del filtro de incidencias guardados en caché.
+    """
+    invalidar_ultimos_codigos()
+    cache.delete(CODIGOS_DROPDOWN_CACHE_KEY)
+
+
+post_save.connect(invalidar_cache_codigos_cierre, sender=CodigoCierre)
+post_delete.connect(invalidar_cache_codigos_cierre, sender=CodigoCierre)
+
+
+def invalidar_filtros_incidencia(sender, **kwargs):
+    """Elimina de la caché los bloques y grupos resolutores del filtro de incidencias."""
+    cache.delete(FILTROS_INCIDENCIA_CACHE_KEY)
+
+
+for modelo in (Bloque, GrupoResolutor):
+    post_save.connect(invalidar_filtros_incidencia, sender=modelo)
+    post_delete.connect(invalidar_filtros_incidencia, sender=modelo)
+
+
+def invalidar_opciones_formulario_incidencia(sender, **kwargs):
+    """Elimina de la caché las opciones de los catálogos del formulario de incidencias."""
+    cache.delete(OPCIONES_FORMULARIO_CACHE_KEY)
+
+
+for modelo in (Estado, Severidad, Impacto, Bloque, Interfaz, Cluster, GrupoResolutor, Usuario):
+    post_save.connect(invalidar_opciones_formulario_incidencia, sender=modelo)
+    post_delete.connect(invalidar_opciones_formulario_incidencia, sender=modelo)
@@ -1,3 +1,78 @@
-from django.test import TestCase
+import io
+import json
 
-# Create your tests here.
+from django.test import SimpleTestCase
+
+from .views.incidencias import _leer_registros_json
+
+
+class LeerRegistrosJsonTests(SimpleTestCase):
+    """
+    El lector por bloques de la carga masiva inicial debe comportarse como
+    json.loads sobre el mismo texto, sin importar dónde caigan los cortes de
+    bloque. Se usan bloques diminutos para que los cortes caigan en medio de
+    números, cadenas escapadas y literales.
+    """
+
+    TAMANOS_BLOQUE = range(1, 9)
+
+    def leer(self, texto, tamano_bloque):
+        return list(_leer_registros_json(io.BytesIO(texto.encode('utf-8')), tamano_bloque))
+
+    def assertIgualQueJsonLoads(self, texto):
+        esperado = json.loads(texto)
+        for tamano in self.TAMANOS_BLOQUE:
+            with self.subTest(texto=texto, tamano_bloque=tamano):
+                self.assertEqual(self.leer(texto, tamano), esperado)
+
+    def assertMismoErrorQueJsonLoads(self, texto):
+        with self.assertRaises(json.JSONDecodeError):
+            json.loads(texto)
+        for tamano in self.TAMANOS_BLOQUE:
+            with self.subTest(texto=texto, tamano_bloque=tamano):
+                with self.assertRaises(json.JSONDecodeError):
+                    self.leer(texto, tamano)
+
+    def test_numeros_cortados_entre_bloques(self):
+        self.assertIgualQueJsonLoads('[12345, -6.25e+10, 0, 7E-3, 1234567890123]')
+
+    def test_cadenas_escapadas_cortadas_entre_bloques(self):
+        self.assertIgualQueJsonLoads(
+            r'["comillas \"internas\"", "barra \\ final\\", "ñandú", "a\/b\n"]')
+
+    def test_literales_cortados_entre_bloques(self):
+        self.assertIgualQueJsonLoads('[true, false, null, true,null]')
+
+    def test_objetos_como_los_de_la_carga(self):
+        self.assertIgualQueJsonLoads(
+            '[{"incidencia": "INC001", "id_estado": 1, "workaround": null},'
+            '{"incidencia": "INC002", "demandas": "x, y ]", "id_estado": 2}]')
+
+    def test_espacios_entre_elementos(self):
+        self.assertIgualQueJsonLoads(' \n[ \t1 ,\r\n  "dos"\n,\ttrue  ]\n ')
+
+    def test_arreglo_vacio(self):
+        self.assertIgualQueJsonLoads('[]')
+        self.assertIgualQueJsonLoads('  [ \n ]  ')
+
+    def test_basura_tras_el_cierre(self):
+        self.assertMismoErrorQueJsonLoads('[1, 2] 3')
+        self.assertMismoErrorQueJsonLoads('[]x')
+
+    def test_coma_final(self):
+        self.assertMismoErrorQueJsonLoads('[1,]')
+
+    def test_separador_invalido(self):
+        self.assertMismoErrorQueJsonLoads('[1 2]')
+        self.assertMismoErrorQueJsonLoads('[tru]')
+
+    def test_arreglo_sin_cerrar(self):
+        self.assertMismoErrorQueJsonLoads('[1, 2')
+
+    def test_raiz_que_no_es_un_arreglo(self):
+        # json.loads los acepta, pero la carga exige una lista de incidencias
+        for texto in ('{"incidencia": "INC001"}', '"[1]"', '1', ''):
+            for tamano in self.TAMANOS_BLOQUE:
+                with self.subTest(texto=texto, tamano_bloque=tamano):
+                    with self.assertRaises(ValueError):
+                        self.leer(texto, tamano)
@@ -3,7 +3,7 @@
 from django.urls import path
 from django.contrib.auth import views as auth_views
 from . import views  # Importa el paquete de vistas completo
-from gestion.views import recommendations
+from gestion.views.utils import lazy_view
 
 app_name = 'gestion'
 
@@ -129,6 +129,6 @@ urlpatterns = [
     # Nos aseguramos de que solo la página de prueba esté aquí.
 
     # Página de prueba para la recomendación
-    path('recommendation-test/', recommendations.recommendation_test_page,
+    path('recommendation-test/', lazy_view('gestion.views.recommendations.recommendation_test_page'),
          name='recommendation_test_page'),
 ]
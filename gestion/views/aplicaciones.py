@@ -2,14 +2,108 @@
 
 import json
 import csv
-from django.http import HttpResponse
+from types import MappingProxyType
+from django.http import StreamingHttpResponse
 from django.contrib import messages, auth
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
-from .utils import no_cache, logger
+from django.core.cache import cache
+from django.db import DatabaseError, transaction
+from .utils import no_cache, logger, EchoBuffer, paginar, leer_json_subido, FilaFallida, validar_archivo_json
+from .cod_cierre import APLICACIONES_DROPDOWN_CACHE_KEY
 from ..models import Aplicacion, Bloque, Criticidad, Estado
 from ..forms import AplicacionForm
-from django.db import utils as db_utils
+
+# Clave de caché del conteo total de aplicaciones (estadística del listado)
+TOTAL_APLICACIONES_CACHE_KEY = 'aplicacion_total'
+
+# Alias aceptados en la carga masiva para cada catálogo (texto en minúsculas -> descripción)
+CRITICIDAD_MAP = MappingProxyType({
+    'alta': 'critica', 'crítica': 'critica', 'media': 'no critica',
+    'no critica': 'no critica', 'baja': 'sin criticidad', 'no crítica': 'no critica'})
+ESTADO_MAP = MappingProxyType({
+    'dev': 'Construccion', 'en construcción': 'Construccion', 'prod': 'Produccion',
+    'en producción': 'Produccion', 'en revisión': 'Pendiente', 'desuso': 'Deshuso'})
+BLOQUE_MAP = MappingProxyType({
+    'b1': 'BLOQUE 1', 'b2': 'BLOQUE 2', 'b3': 'BLOQUE 3', 'b4': 'BLOQUE 4',
+    'ninguno': 'Sin bloque'})
+
+# Aplicaciones por página del listado (DataTables pagina en el cliente dentro de cada una)
+APLICACIONES_POR_PAGINA = 500
+
+# Clave de caché de los catálogos de los menús desplegables (ver gestion/signals.py)
+DROPDOWNS_APLICACION_CACHE_KEY = 'app_dropdowns'
+
+
+def _dropdown_context():
+    """
+    Devuelve los catálogos de Bloque, Criticidad y Estado (uso 'Aplicacion')
+    para los menús desplegables. Cambian muy poco, por lo que se guardan en
+    caché; las señales de gestion/signals.py invalidan la entrada al modificarlos.
+    """
+    return cache.get_or_set(DROPDOWNS_APLICACION_CACHE_KEY, lambda: {
+        'todos_los_bloques': list(Bloque.objects.all().order_by('desc_bloque')),
+        'todas_las_criticidades': list(Criticidad.objects.all().order_by('desc_criticidad')),
+        'todos_los_estados': list(Estado.objects.filter(
+            uso_estado=Estado.UsoChoices.APLICACION).order_by('desc_estado')),
+    }, 3600)
+
+
+def _crear_aplicaciones(pendientes):
+    """
+    Inserta en bloque las aplicaciones de `pendientes`, una lista de
+    (línea, instancia). Si el lote falla se reintenta fila a fila, cada una en
+    su savepoint, para aislar las que no se pueden guardar sin abortar la
+    transacción. Devuelve (creadas, fallidas), con creadas como (línea,
+    instancia) y fallidas como (línea, instancia, error).
+    """
+    if not pendientes:
+        return [], []
+    try:
+        with transaction.atomic():
+            Aplicacion.objects.bulk_create([app for _, app in pendientes], batch_size=500)
+        return pendientes, []
+    except DatabaseError:
+        pass
+
+    creadas, fallidas = [], []
+    for line_number, app in pendientes:
+        try:
+            with transaction.atomic():
+                app.save(force_insert=True)
+            creadas.append((line_number, app))
+        except DatabaseError as e:
+            fallidas.append((line_number, app, e))
+    return creadas, fallidas
+
+
+# Filtros del listado y de la exportación CSV:
+# (parámetro GET, lookup del ORM, solo acepta dígitos, etiqueta para el log)
+FILTROS_APLICACION = (
+    ('nombre_app', 'nombre_aplicacion__icontains', False, 'nombre'),
+    ('codigo_app', 'cod_aplicacion__icontains', False, 'código'),
+    ('bloque', 'bloque_id', True, 'bloque_id'),
+    ('criticidad', 'criticidad_id', True, 'criticidad_id'),
+    ('estado', 'estado_id', True, 'estado_id'),
+)
+
+
+def _aplicar_filtros(queryset, params):
+    """
+    Aplica al queryset los FILTROS_APLICACION presentes en `params` (request.GET).
+    Devuelve el queryset filtrado y la lista de filtros aplicados, para el log.
+    """
+    condiciones, filtros_aplicados = {}, []
+    for parametro, lookup, solo_digitos, etiqueta in FILTROS_APLICACION:
+        valor = params.get(parametro)
+        if not valor or (solo_digitos and not valor.isdigit()):
+            continue
+        condiciones[lookup] = valor
+        filtros_aplicados.append(f"{etiqueta}='{valor}'")
+    # Un único .filter(): un solo clon del queryset y un solo WHERE
+    if condiciones:
+        queryset = queryset.filter(**condiciones)
+    return queryset, filtros_aplicados
 
 
 @login_required
@@ -33,8 +127,9 @@ def aplicaciones_view(request):
                       'gestion/aplicaciones.html' con el contexto necesario.
 
     Context:
-        'lista_de_aplicaciones' (QuerySet<Aplicacion>): El conjunto de aplicaciones
-            resultante después de aplicar los filtros.
+        'lista_de_aplicaciones' (Page<Aplicacion>): La página solicitada (`?page=`)
+            del conjunto de aplicaciones resultante después de aplicar los filtros.
+        'page_obj' (Page<Aplicacion>): La misma página, para los controles de paginación.
         'total_registros' (int): El número total de aplicaciones existentes en la BD.
         'todos_los_bloques' (QuerySet<Bloque>): Lista de todos los bloques para el filtro.
         'todas_las_criticidades' (QuerySet<Criticidad>): Lista de todas las
@@ -44,81 +139,53 @@ def aplicaciones_view(request):
     """
     # --- 1. Inicio y Registro de Acceso ---
     logger.info(
-        f"El usuario '{request.user}' ha accedido a la vista de aplicaciones.")
+        "El usuario '%s' ha accedido a la vista de aplicaciones.", request.user)
 
     # --- 2. Queryset Base ---
     # Se utiliza select_related para optimizar la consulta, precargando los datos
     # de las tablas relacionadas (Bloque, Criticidad, Estado) en una sola consulta SQL.
+    # .only() limita el SELECT a las columnas que muestra la tabla.
+    # Se ordena por código (único) para que la paginación sea estable.
     aplicaciones_qs = Aplicacion.objects.select_related(
-        'bloque', 'criticidad', 'estado').all()
+        'bloque', 'criticidad', 'estado').only(
+        'cod_aplicacion', 'nombre_aplicacion', 'desc_aplicacion',
+        'bloque__desc_bloque', 'criticidad__desc_criticidad', 'estado__desc_estado',
+    ).order_by('cod_aplicacion')
 
     # --- 3. Procesamiento de Filtros ---
-    # Se recogen los parámetros de la URL. Si no existen, .get() devuelve None.
-    filtro_nombre = request.GET.get('nombre_app')
-    filtro_codigo = request.GET.get('codigo_app')
-    filtro_bloque_id = request.GET.get('bloque')
-    filtro_criticidad_id = request.GET.get('criticidad')
-    filtro_estado_id = request.GET.get('estado')
-
-    # Lista para registrar qué filtros se están usando en esta petición.
-    filtros_aplicados = []
-
-    if filtro_nombre:
-        aplicaciones_qs = aplicaciones_qs.filter(
-            nombre_aplicacion__icontains=filtro_nombre)
-        filtros_aplicados.append(f"nombre='{filtro_nombre}'")
-
-    if filtro_codigo:
-        aplicaciones_qs = aplicaciones_qs.filter(
-            cod_aplicacion__icontains=filtro_codigo)
-        filtros_aplicados.append(f"código='{filtro_codigo}'")
-
-    if filtro_bloque_id and filtro_bloque_id.isdigit():
-        aplicaciones_qs = aplicaciones_qs.filter(bloque_id=filtro_bloque_id)
-        filtros_aplicados.append(f"bloque_id='{filtro_bloque_id}'")
-
-    if filtro_criticidad_id and filtro_criticidad_id.isdigit():
-        aplicaciones_qs = aplicaciones_qs.filter(
-            criticidad_id=filtro_criticidad_id)
-        filtros_aplicados.append(f"criticidad_id='{filtro_criticidad_id}'")
-
-    if filtro_estado_id and filtro_estado_id.isdigit():
-        aplicaciones_qs = aplicaciones_qs.filter(estado_id=filtro_estado_id)
-        filtros_aplicados.append(f"estado_id='{filtro_estado_id}'")
+    # Se recogen los parámetros de la URL y se registra qué filtros se están usando.
+    aplicaciones_qs, filtros_aplicados = _aplicar_filtros(aplicaciones_qs, request.GET)
 
     # Si se aplicó al menos un filtro, se registra en el log.
     if filtros_aplicados:
         logger.info(
-            f"Búsqueda de aplicaciones con filtros: {', '.join(filtros_aplicados)}.")
-
-    # Se registra cuántos resultados se encontraron con los filtros actuales.
-    num_resultados = aplicaciones_qs.count()
-    logger.info(f"La consulta ha devuelto {num_resultados} aplicaciones.")
+            "Búsqueda de aplicaciones con filtros: %s.", ', '.join(filtros_aplicados))
 
     # --- 4. Preparación del Contexto para la Plantilla ---
-    # Se obtienen los datos necesarios para poblar los menús desplegables de los filtros.
-    todos_los_bloques = Bloque.objects.all().order_by('desc_bloque')
-    todas_las_criticidades = Criticidad.objects.all().order_by('desc_criticidad')
-    todos_los_estados = Estado.objects.filter(
-        uso_estado=Estado.UsoChoices.APLICACION).order_by('desc_estado')
-
+    # Los datos de los menús desplegables de los filtros se obtienen desde caché.
     # Se obtiene el conteo total de aplicaciones en el sistema para mostrarlo como estadística.
-    total_registros = Aplicacion.objects.count()
+    # Se guarda en caché por 60 segundos para no ejecutar un COUNT(*) en cada visita.
+    total_registros = cache.get_or_set(
+        TOTAL_APLICACIONES_CACHE_KEY, Aplicacion.objects.count, 60)
+
+    # Solo se consulta y renderiza la página solicitada (LIMIT/OFFSET).
+    # Sin filtros, el total en caché coincide con el del listado y no se cuenta de nuevo.
+    page_obj = paginar(request, aplicaciones_qs, APLICACIONES_POR_PAGINA,
+                       total=None if filtros_aplicados else total_registros)
 
     context = {
-        'lista_de_aplicaciones': aplicaciones_qs,
+        'lista_de_aplicaciones': page_obj,
+        'page_obj': page_obj,
         'total_registros': total_registros,
-        'todos_los_bloques': todos_los_bloques,
-        'todas_las_criticidades': todas_las_criticidades,
-        'todos_los_estados': todos_los_estados,
+        **_dropdown_context(),
     }
 
     # --- 5. Renderizado Final ---
+    logger.info("La consulta ha devuelto %d aplicaciones (página %d de %d).",
+                page_obj.paginator.count, page_obj.number, page_obj.paginator.num_pages)
     return render(request, 'gestion/aplicaciones.html', context)
 
 
-@no_cache
-@login_required
 @no_cache
 @login_required
 def registrar_aplicacion_view(request):
@@ -126,28 +193,24 @@ def registrar_aplicacion_view(request):
     Gestiona el registro de una nueva aplicación usando Django Forms.
     """
     if request.method == 'POST':
-        logger.info(f"El usuario '{request.user}' intenta registrar una aplicación.")
+        logger.info("El usuario '%s' intenta registrar una aplicación.", request.user)
         form = AplicacionForm(request.POST)
         if form.is_valid():
             try:
                 nueva_app = form.save()
-                logger.info(f"Aplicación '{nueva_app.nombre_aplicacion}' registrada con éxito.")
+                cache.delete(TOTAL_APLICACIONES_CACHE_KEY)
+                logger.info("Aplicación '%s' registrada con éxito.", nueva_app.nombre_aplicacion)
                 messages.success(request, f'¡La aplicación "{nueva_app.nombre_aplicacion}" ha sido registrada con éxito!')
                 return redirect('gestion:aplicaciones')
             except Exception as e:
-                logger.error(f"Error al guardar aplicación: {e}", exc_info=True)
+                logger.error("Error al guardar aplicación: %s", e, exc_info=True)
                 messages.error(request, f'Error al guardar: {e}')
         else:
             messages.error(request, 'Por favor corrige los errores en el formulario.')
     else:
         form = AplicacionForm()
 
-    context = {
-        'form': form,
-        'todos_los_bloques': Bloque.objects.all().order_by('desc_bloque'),
-        'todas_las_criticidades': Criticidad.objects.all().order_by('desc_criticidad'),
-        'todos_los_estados': Estado.objects.filter(uso_estado=Estado.UsoChoices.APLICACION).order_by('desc_estado'),
-    }
+    context = {'form': form}
     return render(request, 'gestion/registrar_aplicacion.html', context)
 
 
@@ -158,42 +221,31 @@ def carga_masiva_view(request):
     Gestiona la carga y procesamiento masivo de aplicaciones desde un archivo JSON.
     """
     logger.info(
-        f"El usuario '{request.user}' está viendo el formulario de carga masiva.")
+        "El usuario '%s' está viendo el formulario de carga masiva.", request.user)
 
     # CORRECCIÓN 4: La función auxiliar se define UNA VEZ fuera del bucle para mayor eficiencia.
-    def get_clean_value(data_dict, key, transform=None):
+    def get_clean_value(data_dict, key):
         value = data_dict.get(key)
         if value is None:
             return ''
-        clean_value = str(value).strip()
-        if transform == 'lower':
-            return clean_value.lower()
-        return clean_value
+        return (value if type(value) is str else str(value)).strip()
 
     if request.method == 'POST':
         logger.info(
-            f"Usuario '{request.user}' ha iniciado una carga masiva de aplicaciones.")
+            "Usuario '%s' ha iniciado una carga masiva de aplicaciones.", request.user)
         json_file = request.FILES.get('archivo')
         context = {}
 
-        if not json_file or not json_file.name.endswith('.json'):
-            messages.error(
-                request, 'Por favor, seleccione un archivo JSON válido.')
+        # Extensión, tamaño y primeros bytes, antes de leer el archivo completo
+        error_archivo = validar_archivo_json(json_file)
+        if error_archivo:
+            messages.error(request, error_archivo)
             return render(request, 'gestion/carga_masiva_aplicativo.html')
 
         try:
             # --- 2. Lectura del Archivo ---
-            # Leemos el contenido raw para intentar arreglarlo si es necesario
-            file_content = json_file.read().decode('utf-8').strip()
-            
-            # Intento de corrección: Si parece una lista de objetos pero le faltan los corchetes []
-            if file_content.startswith('{') and file_content.endswith('}'):
-                # Verificamos si parece tener múltiples objetos separados por coma
-                # Simplemente lo envolvemos en corchetes y probamos
-                logger.info("El archivo JSON parece no tener corchetes de lista. Intentando envolverlo automáticamente.")
-                file_content = f"[{file_content}]"
-
-            all_rows = json.loads(file_content)
+            # Se parsea directamente desde los bytes (ver leer_json_subido)
+            all_rows = leer_json_subido(json_file)
             
             # VALIDACIÓN ESTRUCTURA JSON
             if not isinstance(all_rows, list):
@@ -202,47 +254,43 @@ def carga_masiva_view(request):
 
             total_records_in_file = len(all_rows)
             logger.info(
-                f"Se leyeron {total_records_in_file} objetos del archivo JSON.")
-
-            # --- 3. Pre-validación de ID de Aplicación duplicados en el archivo ---
-            logger.info(
-                "Iniciando pre-validación de 'id_aplicacion' duplicados...")
-            seen_ids, duplicates_found = set(), []
-            for line, row in enumerate(all_rows, 1):
-                if not isinstance(row, dict):
-                    continue # Saltamos filas que no sean objetos
-                app_id = get_clean_value(row, 'id_aplicacion')
-                if app_id:
-                    if app_id in seen_ids:
-                        duplicates_found.append({'line': line, 'id': app_id})
-                    else:
-                        seen_ids.add(app_id)
-
-            if duplicates_found:
-                error_msg = "El archivo contiene 'id_aplicacion' duplicados."
-                messages.error(request, error_msg + " Revisa los detalles.")
-                context['duplicates'] = duplicates_found
-                return render(request, 'gestion/carga_masiva_aplicativo.html', context)
-            logger.info(
-                "Pre-validación completada. No se encontraron IDs duplicados.")
-
-            # --- 4. Procesamiento de Filas ---
-            criticidad_map = {'alta': 'critica', 'crítica': 'critica', 'media': 'no critica',
-                              'no critica': 'no critica', 'baja': 'sin criticidad', 'no crítica': 'no critica'}
-            estado_map = {'dev': 'Construccion', 'en construcción': 'Construccion', 'prod': 'Produccion',
-                          'en producción': 'Produccion', 'en revisión': 'Pendiente', 'desuso': 'Deshuso'}
-            bloque_map = {'b1': 'BLOQUE 1', 'b2': 'BLOQUE 2',
-                          'b3': 'BLOQUE 3', 'b4': 'BLOQUE 4', 'ninguno': 'Sin bloque'}
-
+                "Se leyeron %d objetos del archivo JSON.", total_records_in_file)
+
+            # --- 3. Catálogos ---
+            # Catálogos precargados una sola vez: el conjunto de IDs válidos y un
+            # índice descripción (en minúsculas) -> ID. Las claves foráneas se
+            # asignan por ID, sin consultas ni instancias de los modelos relacionados.
+            catalogos = _dropdown_context()
+            bloque_ids = {b.id for b in catalogos['todos_los_bloques']}
+            bloques_by_desc = {b.desc_bloque.lower(): b.id for b in catalogos['todos_los_bloques']}
+            criticidad_ids = {c.id for c in catalogos['todas_las_criticidades']}
+            criticidades_by_desc = {
+                c.desc_criticidad.lower(): c.id for c in catalogos['todas_las_criticidades']}
+            estados = list(Estado.objects.values_list('id', 'desc_estado'))
+            estado_ids = {estado_id for estado_id, _ in estados}
+            estados_by_desc = {desc.lower(): estado_id for estado_id, desc in estados}
+
+            # --- 4. Validación de Filas (una sola pasada) ---
+            # En el mismo recorrido se detectan los 'id_aplicacion' duplicados y se
+            # preparan en memoria las aplicaciones válidas; nada se guarda si hay duplicados.
             success_count, failed_rows, skipped_count, modified_rows = 0, [], 0, []
+            seen_ids, duplicates_found = set(), []
+            filas_validas = []
+            filas_originales = {}
 
             for line_number, row in enumerate(all_rows, 1):
                 if not isinstance(row, dict):
                     failed_rows.append({'line': line_number, 'row_data': str(row), 'error': 'El registro no es un objeto JSON válido (diccionario).'})
                     continue
-                obj, created, cod_app_final = None, False, None
+
+                id_aplicacion_str = get_clean_value(row, 'id_aplicacion')
+                if id_aplicacion_str:
+                    if id_aplicacion_str in seen_ids:
+                        duplicates_found.append({'line': line_number, 'id': id_aplicacion_str})
+                        continue
+                    seen_ids.add(id_aplicacion_str)
+
                 try:
-                    id_aplicacion_str = get_clean_value(row, 'id_aplicacion')
                     if not id_aplicacion_str:
                         raise ValueError(
                             "La clave 'id_aplicacion' es obligatoria.")
@@ -250,7 +298,6 @@ def carga_masiva_view(request):
                     id_aplicacion_pk = int(id_aplicacion_str)
                     cod_aplicacion = get_clean_value(row, 'id_modulo')
                     nombre_aplicacion = get_clean_value(row, 'nombre_app')
-                    cod_app_final = cod_aplicacion  # Guardamos el código que se usará para el log
 
                     if not cod_aplicacion or not nombre_aplicacion:
                         raise ValueError(
@@ -260,78 +307,133 @@ def carga_masiva_view(request):
                     
                     # 1. Bloque
                     bloque_val = get_clean_value(row, 'bloque')
-                    bloque_obj = None
+                    bloque_id = None
                     if bloque_val.isdigit(): # Es un ID
-                        bloque_obj = Bloque.objects.filter(id=int(bloque_val)).first()
-                    else: # Es texto, usamos el mapa
-                        bloque_str = bloque_map.get(bloque_val.lower(), bloque_val)
-                        if bloque_str:
-                            bloque_obj = Bloque.objects.filter(desc_bloque__iexact=bloque_str).first()
+                        bloque_id = int(bloque_val)
+                        if bloque_id not in bloque_ids:
+                            bloque_id = None
+                    elif bloque_val: # Es texto, usamos el mapa
+                        bloque_str = BLOQUE_MAP.get(bloque_val.lower(), bloque_val)
+                        bloque_id = bloques_by_desc.get(bloque_str.lower())
 
                     # 2. Criticidad
                     criticidad_val = get_clean_value(row, 'criticidad')
-                    criticidad_obj = None
+                    criticidad_id = None
                     if criticidad_val.isdigit():
-                        criticidad_obj = Criticidad.objects.filter(id=int(criticidad_val)).first()
-                    else:
-                        criticidad_str = criticidad_map.get(criticidad_val.lower(), criticidad_val)
-                        if criticidad_str:
-                             criticidad_obj = Criticidad.objects.filter(desc_criticidad__iexact=criticidad_str).first()
+                        criticidad_id = int(criticidad_val)
+                        if criticidad_id not in criticidad_ids:
+                            criticidad_id = None
+                    elif criticidad_val:
+                        criticidad_str = CRITICIDAD_MAP.get(criticidad_val.lower(), criticidad_val)
+                        criticidad_id = criticidades_by_desc.get(criticidad_str.lower())
 
                     # 3. Estado
                     estado_val = get_clean_value(row, 'estado')
-                    estado_obj = None
+                    estado_id = None
                     if estado_val.isdigit():
-                         estado_obj = Estado.objects.filter(id=int(estado_val)).first()
-                    else:
-                        estado_str = estado_map.get(estado_val.lower(), estado_val)
-                        if estado_str:
-                             estado_obj = Estado.objects.filter(desc_estado__iexact=estado_str).first()
-
-                    defaults = {
-                        'cod_aplicacion': cod_aplicacion, 'nombre_aplicacion': nombre_aplicacion,
-                        'bloque': bloque_obj, 'criticidad': criticidad_obj, 'estado': estado_obj,
-                        'desc_aplicacion': get_clean_value(row, 'descripcion')
-                    }
-
-                    try:
-                        obj, created = Aplicacion.objects.get_or_create(
-                            id=id_aplicacion_pk, defaults=defaults)
-                    except db_utils.IntegrityError:
-                        modified_cod = f"{cod_aplicacion}_ID_{id_aplicacion_pk}"
-                        cod_app_final = modified_cod  # Actualizamos el código para el log
-                        defaults['cod_aplicacion'] = modified_cod
-
-                        logger.warning(
-                            f"Línea {line_number}: 'cod_aplicacion' duplicado ('{cod_aplicacion}'). Modificado a '{modified_cod}'.")
-                        obj, created = Aplicacion.objects.get_or_create(
-                            id=id_aplicacion_pk, defaults=defaults)
-
-                        if created:
-                            modified_rows.append({
-                                'line': line_number, 'id': id_aplicacion_pk,
-                                'original_cod': cod_aplicacion, 'modified_cod': modified_cod,
-                                'nombre_app': nombre_aplicacion
-                            })
+                        estado_id = int(estado_val)
+                        if estado_id not in estado_ids:
+                            estado_id = None
+                    elif estado_val:
+                        estado_str = ESTADO_MAP.get(estado_val.lower(), estado_val)
+                        estado_id = estados_by_desc.get(estado_str.lower())
+
+                    nueva_app = Aplicacion(
+                        id=id_aplicacion_pk, cod_aplicacion=cod_aplicacion, nombre_aplicacion=nombre_aplicacion,
+                        bloque_id=bloque_id, criticidad_id=criticidad_id, estado_id=estado_id,
+                        desc_aplicacion=get_clean_value(row, 'descripcion'))
 
                 except Exception as e:
                     failed_rows.append(
-                        {'line': line_number, 'row_data': json.dumps(row), 'error': str(e)})
+                        {'line': line_number, 'row_data': FilaFallida(row), 'error': str(e)})
                     logger.error(
-                        f"Error en línea {line_number}: {e}", exc_info=True)
-
-                # CORRECCIÓN 3: El conteo y el log se hacen una sola vez por registro, al final del try/except
+                        "Error en línea %d: %s", line_number, e, exc_info=True)
                 else:
-                    if created:
-                        success_count += 1
-                        logger.info(
-                            f"Línea {line_number}: APLICACIÓN CREADA (ID: {id_aplicacion_pk}, Código: '{cod_app_final}').")
-                    elif obj:  # Si no fue creado, pero existe el objeto, se omite
-                        skipped_count += 1
-                        logger.info(
-                            f"Línea {line_number}: APLICACIÓN OMITIDA (ID: {id_aplicacion_pk} ya existe).")
-
-            # --- 5. Generación de Resumen y Respuesta ---
+                    filas_validas.append((line_number, nueva_app))
+                    filas_originales[line_number] = row
+
+            if duplicates_found:
+                error_msg = "El archivo contiene 'id_aplicacion' duplicados."
+                messages.error(request, error_msg + " Revisa los detalles.")
+                context['duplicates'] = duplicates_found
+                return render(request, 'gestion/carga_masiva_aplicativo.html', context)
+            logger.info(
+                "Validación completada. No se encontraron IDs duplicados.")
+
+            # --- 5. Resolución contra la Base de Datos ---
+            # IDs y códigos ya existentes, consultados una sola vez para las filas válidas.
+            # De los códigos solo se consultan los del archivo y sus posibles renombres.
+            existing_ids = set(Aplicacion.objects.filter(
+                id__in=[app.id for _, app in filas_validas]).values_list('id', flat=True))
+            candidate_codes = set()
+            for _, app in filas_validas:
+                candidate_codes.add(app.cod_aplicacion)
+                candidate_codes.add(f"{app.cod_aplicacion}_ID_{app.id}")
+            codigos_usados = {
+                cod.lower() for cod in Aplicacion.objects.filter(
+                    cod_aplicacion__in=candidate_codes).values_list('cod_aplicacion', flat=True)}
+
+            nuevas_aplicaciones = []
+            for line_number, nueva_app in filas_validas:
+                if nueva_app.id in existing_ids:  # Si ya existe el ID, se omite
+                    skipped_count += 1
+                    logger.info(
+                        "Línea %d: APLICACIÓN OMITIDA (ID: %d ya existe).", line_number, nueva_app.id)
+                    continue
+
+                # 'cod_aplicacion' es único: si ya está en uso se renombra antes de
+                # insertar, y si el nombre modificado también lo está la fila falla
+                cod_aplicacion = nueva_app.cod_aplicacion
+                cod_original = None
+                if cod_aplicacion.lower() in codigos_usados:
+                    modified_cod = f"{cod_aplicacion}_ID_{nueva_app.id}"
+                    if modified_cod.lower() in codigos_usados:
+                        failed_rows.append({
+                            'line': line_number, 'row_data': FilaFallida(filas_originales[line_number]),
+                            'error': f"El 'cod_aplicacion' '{cod_aplicacion}' y su alternativa "
+                                     f"'{modified_cod}' ya están en uso."})
+                        logger.error(
+                            "Línea %d: 'cod_aplicacion' duplicado ('%s') y '%s' también en uso.",
+                            line_number, cod_aplicacion, modified_cod)
+                        continue
+                    nueva_app.cod_aplicacion = modified_cod
+                    cod_original = cod_aplicacion
+                codigos_usados.add(nueva_app.cod_aplicacion.lower())
+                nuevas_aplicaciones.append((line_number, nueva_app, cod_original))
+
+            # Inserción en bloque de todas las aplicaciones nuevas. Todos los lotes
+            # van en una sola transacción; las filas que la base de datos rechace
+            # (p. ej. por un conflicto concurrente) se informan como fallidas.
+            with transaction.atomic():
+                creadas, fallidas = _crear_aplicaciones(
+                    [(line_number, app) for line_number, app, _ in nuevas_aplicaciones])
+            lineas_creadas = {line_number for line_number, _ in creadas}
+            success_count = len(creadas)
+            if success_count:
+                # bulk_create no emite señales: se invalidan las cachés a mano
+                cache.delete_many([TOTAL_APLICACIONES_CACHE_KEY, APLICACIONES_DROPDOWN_CACHE_KEY])
+            for line_number, app, cod_original in nuevas_aplicaciones:
+                if line_number not in lineas_creadas:
+                    continue
+                if cod_original is not None:
+                    logger.warning(
+                        "Línea %d: 'cod_aplicacion' duplicado ('%s'). Modificado a '%s'.",
+                        line_number, cod_original, app.cod_aplicacion)
+                    modified_rows.append({
+                        'line': line_number, 'id': app.id,
+                        'original_cod': cod_original, 'modified_cod': app.cod_aplicacion,
+                        'nombre_app': app.nombre_aplicacion
+                    })
+                logger.info(
+                    "Línea %d: APLICACIÓN CREADA (ID: %d, Código: '%s').", line_number, app.id, app.cod_aplicacion)
+            for line_number, app, error in fallidas:
+                failed_rows.append({
+                    'line': line_number, 'row_data': FilaFallida(filas_originales[line_number]),
+                    'error': str(error)})
+                logger.error("Error en línea %d: %s", line_number, error)
+            failed_rows.sort(key=lambda fila: fila['line'])
+
+            # --- 6. Generación de Resumen y Respuesta ---
             if success_count > 0:
                 messages.success(
                     request, f'¡Carga completada! Se crearon {success_count} aplicaciones.')
@@ -347,12 +449,14 @@ def carga_masiva_view(request):
 
             # Registro de estadísticas en el log del sistema
             logger.info(
-                f"Resumen Carga Masiva (Usuario: {request.user}) - "
-                f"Total Leídos: {total_records_in_file} | "
-                f"Creados: {success_count} | "
-                f"Omitidos (Existentes): {skipped_count} | "
-                f"Modificados (Duplicados): {len(modified_rows)} | "
-                f"Fallidos: {len(failed_rows)}"
+                "Resumen Carga Masiva (Usuario: %s) - "
+                "Total Leídos: %d | "
+                "Creados: %d | "
+                "Omitidos (Existentes): %d | "
+                "Modificados (Duplicados): %d | "
+                "Fallidos: %d",
+                request.user, total_records_in_file, success_count, skipped_count,
+                len(modified_rows), len(failed_rows)
             )
 
             # CORRECCIÓN 5: Se añade modified_rows y la estadística al contexto
@@ -368,13 +472,13 @@ def carga_masiva_view(request):
             return render(request, 'gestion/carga_masiva_aplicativo.html', context)
 
         except json.JSONDecodeError as e:
-            logger.warning(f"Error de formato JSON en carga por '{request.user}': {e}")
+            logger.warning("Error de formato JSON en carga por '%s': %s", request.user, e)
             messages.error(request, f"El archivo no tiene un formato JSON válido. Error: {e}")
             return render(request, 'gestion/carga_masiva_aplicativo.html')
 
         except Exception as e:
             logger.critical(
-                f"Error CRÍTICO en carga masiva por '{request.user}': {e}", exc_info=True)
+                "Error CRÍTICO en carga masiva por '%s': %s", request.user, e, exc_info=True)
             messages.error(
                 request, f"Ocurrió un error general e inesperado: {e}")
             return render(request, 'gestion/carga_masiva_aplicativo.html')
@@ -403,7 +507,7 @@ def eliminar_aplicacion_view(request, pk):
     # Se valida que la petición sea POST para proceder con la eliminación.
     if request.method == 'POST':
         logger.info(
-            f"El usuario '{request.user}' ha iniciado un intento de eliminación para la aplicación con ID: {pk}.")
+            "El usuario '%s' ha iniciado un intento de eliminación para la aplicación con ID: %s.", request.user, pk)
         try:
             # Se busca la aplicación por su clave primaria.
             aplicacion_a_eliminar = Aplicacion.objects.get(pk=pk)
@@ -411,11 +515,12 @@ def eliminar_aplicacion_view(request, pk):
 
             # Se elimina el objeto de la base de datos.
             aplicacion_a_eliminar.delete()
+            cache.delete(TOTAL_APLICACIONES_CACHE_KEY)
 
             # Se registra la eliminación como una advertencia (WARNING) para que sea
             # fácil de localizar en los logs, ya que es una acción destructiva.
             logger.warning(
-                f"ACCIÓN CRÍTICA: El usuario '{request.user}' ha ELIMINADO la aplicación '{nombre_app}' (ID: {pk})."
+                "ACCIÓN CRÍTICA: El usuario '%s' ha ELIMINADO la aplicación '%s' (ID: %s).", request.user, nombre_app, pk
             )
             messages.success(
                 request, f'La aplicación "{nombre_app}" ha sido eliminada correctamente.')
@@ -423,7 +528,7 @@ def eliminar_aplicacion_view(request, pk):
         except Aplicacion.DoesNotExist:
             # Este error ocurre si se intenta eliminar una aplicación que ya no existe.
             logger.warning(
-                f"Intento de eliminación fallido: La aplicación con ID {pk} no existe. Solicitado por '{request.user}'."
+                "Intento de eliminación fallido: La aplicación con ID %s no existe. Solicitado por '%s'.", pk, request.user
             )
             messages.error(
                 request, 'La aplicación que intentas eliminar no existe.')
@@ -431,7 +536,7 @@ def eliminar_aplicacion_view(request, pk):
         except Exception as e:
             # Captura cualquier otro error inesperado durante la eliminación.
             logger.error(
-                f"Error crítico al eliminar la aplicación ID {pk} por el usuario '{request.user}'. Error: {e}",
+                "Error crítico al eliminar la aplicación ID %s por el usuario '%s'. Error: %s", pk, request.user, e,
                 exc_info=True
             )
             messages.error(
@@ -441,8 +546,6 @@ def eliminar_aplicacion_view(request, pk):
     return redirect('gestion:aplicaciones')
 
 
-@login_required
-@no_cache
 @login_required
 @no_cache
 def editar_aplicacion_view(request, pk):
@@ -459,7 +562,7 @@ def editar_aplicacion_view(request, pk):
                 messages.success(request, f'¡La aplicación "{aplicacion.nombre_aplicacion}" ha sido actualizada correctamente.')
                 return redirect('gestion:aplicaciones')
             except Exception as e:
-                logger.error(f"Error al actualizar aplicación: {e}", exc_info=True)
+                logger.error("Error al actualizar aplicación: %s", e, exc_info=True)
                 messages.error(request, f'Error al actualizar: {e}')
         else:
             messages.error(request, 'Por favor corrige los errores en el formulario.')
@@ -469,12 +572,8 @@ def editar_aplicacion_view(request, pk):
     context = {
         'form': form,
         'aplicacion': aplicacion,
-        'todos_los_bloques': Bloque.objects.all().order_by('desc_bloque'),
-        'todas_las_criticidades': Criticidad.objects.all().order_by('desc_criticidad'),
-        'todos_los_estados': Estado.objects.filter(uso_estado=Estado.UsoChoices.APLICACION).order_by('desc_estado'),
     }
     return render(request, 'gestion/registrar_aplicacion.html', context)
-    return render(request, 'gestion/registrar_aplicacion.html', context)
 
 
 @login_required
@@ -485,51 +584,37 @@ def exportar_aplicaciones_csv(request):
     Recibe los mismos parámetros GET que la vista de listado para aplicar filtros.
     """
     # --- 1. Queryset Base ---
-    aplicaciones_qs = Aplicacion.objects.select_related(
-        'bloque', 'criticidad', 'estado').all()
-
-    # --- 2. Procesamiento de Filtros (Copia de la lógica de aplicaciones_view) ---
-    filtro_nombre = request.GET.get('nombre_app')
-    filtro_codigo = request.GET.get('codigo_app')
-    filtro_bloque_id = request.GET.get('bloque')
-    filtro_criticidad_id = request.GET.get('criticidad')
-    filtro_estado_id = request.GET.get('estado')
-
-    if filtro_nombre:
-        aplicaciones_qs = aplicaciones_qs.filter(
-            nombre_aplicacion__icontains=filtro_nombre)
-
-    if filtro_codigo:
-        aplicaciones_qs = aplicaciones_qs.filter(
-            cod_aplicacion__icontains=filtro_codigo)
+    aplicaciones_qs = Aplicacion.objects.all()
 
-    if filtro_bloque_id and filtro_bloque_id.isdigit():
-        aplicaciones_qs = aplicaciones_qs.filter(bloque_id=filtro_bloque_id)
-
-    if filtro_criticidad_id and filtro_criticidad_id.isdigit():
-        aplicaciones_qs = aplicaciones_qs.filter(
-            criticidad_id=filtro_criticidad_id)
-
-    if filtro_estado_id and filtro_estado_id.isdigit():
-        aplicaciones_qs = aplicaciones_qs.filter(estado_id=filtro_estado_id)
+    # --- 2. Procesamiento de Filtros (los mismos de aplicaciones_view) ---
+    aplicaciones_qs, _ = _aplicar_filtros(aplicaciones_qs, request.GET)
 
     # --- 3. Generación del CSV ---
-    response = HttpResponse(content_type='text/csv')
+    # Se emite fila a fila con un iterador del queryset: la memoria no crece con
+    # el número de registros y la descarga comienza de inmediato.
+    writer = csv.writer(EchoBuffer(), delimiter=';') # Delimitador ; para Excel en español
+
+    # Las descripciones de los catálogos (tablas pequeñas) se resuelven en memoria,
+    # de modo que la consulta principal no necesita JOIN. El Estado se consulta
+    # completo porque una aplicación podría tener un estado de otro uso.
+    catalogos = _dropdown_context()
+    bloques = {b.id: b.desc_bloque for b in catalogos['todos_los_bloques']}
+    criticidades = {c.id: c.desc_criticidad for c in catalogos['todas_las_criticidades']}
+    estados = dict(Estado.objects.values_list('id', 'desc_estado'))
+
+    def generar_filas():
+        yield u'\ufeff'.encode('utf8') # BOM para Excel
+        yield writer.writerow(['ID', 'Código', 'Nombre', 'Bloque', 'Criticidad', 'Estado', 'Descripción']).encode('utf8')
+        # values_list: solo las columnas exportadas, sin instanciar modelos
+        filas = aplicaciones_qs.values_list(
+            'id', 'cod_aplicacion', 'nombre_aplicacion', 'bloque_id',
+            'criticidad_id', 'estado_id', 'desc_aplicacion')
+        for app_id, cod, nombre, bloque_id, criticidad_id, estado_id, desc in filas.iterator(chunk_size=2000):
+            yield writer.writerow([
+                app_id, cod, nombre, bloques.get(bloque_id, ''), criticidades.get(criticidad_id, ''),
+                estados.get(estado_id, ''), desc if desc is not None else '',
+            ]).encode('utf8')
+
+    response = StreamingHttpResponse(generar_filas(), content_type='text/csv')
     response['Content-Disposition'] = 'attachment; filename="aplicaciones.csv"'
-    response.write(u'\ufeff'.encode('utf8')) # BOM para Excel
-
-    writer = csv.writer(response, delimiter=';') # Delimitador ; para Excel en español
-    writer.writerow(['ID', 'Código', 'Nombre', 'Bloque', 'Criticidad', 'Estado', 'Descripción'])
-
-    for app in aplicaciones_qs:
-        writer.writerow([
-            app.id,
-            app.cod_aplicacion,
-            app.nombre_aplicacion,
-            app.bloque.desc_bloque if app.bloque else '',
-            app.criticidad.desc_criticidad if app.criticidad else '',
-            app.estado.desc_estado if app.estado else '',
-            app.desc_aplicacion
-        ])
-
     return response
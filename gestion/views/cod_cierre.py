@@ -2,15 +2,94 @@
 
 import json
 import csv
+import logging
 import datetime
-from django.http import JsonResponse, HttpResponse
+import itertools
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from .utils import no_cache, logger
+from django.core.cache import cache
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Value
+from django.db.models.functions import Coalesce
+from .utils import (no_cache, logger, EchoBuffer, paginar, leer_json_subido, FilaFallida,
+                    lineas_csv, json_dumps, validar_archivo_json)
 from ..models import CodigoCierre, Aplicacion
 from ..forms import CodigoCierreForm
 
+# Códigos por página del listado (DataTables pagina en el cliente dentro de cada una)
+CODIGOS_POR_PAGINA = 500
+
+# Clave de caché del listado de aplicaciones para el filtro (ver gestion/signals.py)
+APLICACIONES_DROPDOWN_CACHE_KEY = 'apps_dropdown'
+
+
+def _aplicaciones_dropdown():
+    """
+    Devuelve las aplicaciones (id y nombre) para el menú desplegable del filtro.
+    Se guardan en caché; las señales de gestion/signals.py y la carga masiva de
+    aplicaciones invalidan la entrada cuando cambian.
+    """
+    return cache.get_or_set(APLICACIONES_DROPDOWN_CACHE_KEY, lambda: list(
+        Aplicacion.objects.order_by('nombre_aplicacion').values('id', 'nombre_aplicacion')), 3600)
+
+
+# Clave de caché del listado de códigos para el filtro de incidencias (ver gestion/signals.py)
+CODIGOS_DROPDOWN_CACHE_KEY = 'cc_dropdown'
+
+
+def _codigos_cierre_dropdown():
+    """
+    Devuelve los códigos de cierre (id y código) para el filtro del listado de
+    incidencias. Se invalidan con las señales de gestion/signals.py y al crear
+    códigos desde la carga masiva.
+    """
+    return cache.get_or_set(CODIGOS_DROPDOWN_CACHE_KEY, lambda: list(
+        CodigoCierre.objects.order_by('cod_cierre').values('id', 'cod_cierre')), 3600)
+
+
+# Versión de los códigos de cierre en este proceso, usada como clave de la
+# caché de "últimos códigos por aplicación" y de las cachés en memoria
+# (lru_cache). Cualquier cambio en CodigoCierre la incrementa (ver
+# gestion/signals.py), dejando obsoletas de una vez las entradas de todas las
+# aplicaciones. A diferencia de una clave en LocMemCache, no puede desalojarse
+# y volver a empezar en 1. next() sobre itertools.count es atómico con el GIL.
+_contador_versiones_codigos = itertools.count(1)
+_version_codigos = 0
+
+
+def version_codigos_cierre():
+    """Devuelve la versión de los códigos de cierre; solo crece."""
+    return _version_codigos
+
+
+def invalidar_ultimos_codigos():
+    """Invalida las entradas en caché de obtener_ultimos_codigos_cierre."""
+    global _version_codigos
+    _version_codigos = next(_contador_versiones_codigos)
+
+
+def _aplicar_filtros(queryset, params):
+    """
+    Aplica al queryset los filtros del listado presentes en `params`
+    (request.GET). Lo usan tanto el listado como la exportación CSV.
+    Devuelve el queryset filtrado y la lista de filtros aplicados, para el log.
+    """
+    condiciones, filtros_aplicados = {}, []
+    filtro_codigo = params.get('codigo_cierre')
+    filtro_app_id = params.get('aplicacion')
+    if filtro_codigo:
+        condiciones['cod_cierre__icontains'] = filtro_codigo
+        filtros_aplicados.append(f"código='{filtro_codigo}'")
+    if filtro_app_id and filtro_app_id.isdigit():
+        condiciones['aplicacion_id'] = filtro_app_id
+        filtros_aplicados.append(f"aplicacion_id='{filtro_app_id}'")
+    if condiciones:
+        queryset = queryset.filter(**condiciones)
+    return queryset, filtros_aplicados
+
+
 # --- Vistas del CRUD para Códigos de Cierre ---
 
 
@@ -27,34 +106,34 @@ def codigos_cierre_view(request):
         HttpResponse: Renderiza la plantilla 'gestion/cod_cierre.html' con el contexto.
 
     Context:
-        'lista_de_codigos' (QuerySet): Códigos de cierre filtrados.
+        'lista_de_codigos' (Page): Página solicitada (`?page=`) de los códigos filtrados.
+        'page_obj' (Page): La misma página, para los controles de paginación.
         'total_registros' (int): Conteo total de códigos en la BD.
-        'todas_las_aplicaciones' (QuerySet): Lista de aplicaciones para el filtro.
+        'todas_las_aplicaciones' (list[dict]): Aplicaciones (id, nombre) para el filtro.
     """
     logger.info(
-        f"Usuario '{request.user}' está viendo la lista de códigos de cierre.")
-    codigos_qs = CodigoCierre.objects.select_related('aplicacion').all()
+        "Usuario '%s' está viendo la lista de códigos de cierre.", request.user)
+    # De la aplicación solo se necesita el nombre que muestra la tabla
+    codigos_qs = CodigoCierre.objects.select_related('aplicacion').only(
+        'cod_cierre', 'desc_cod_cierre', 'causa_cierre', 'aplicacion__nombre_aplicacion')
 
     # Procesamiento de filtros
-    filtro_codigo = request.GET.get('codigo_cierre')
-    filtro_app_id = request.GET.get('aplicacion')
-    filtros_aplicados = []
-
-    if filtro_codigo:
-        codigos_qs = codigos_qs.filter(cod_cierre__icontains=filtro_codigo)
-        filtros_aplicados.append(f"código='{filtro_codigo}'")
-    if filtro_app_id and filtro_app_id.isdigit():
-        codigos_qs = codigos_qs.filter(aplicacion_id=filtro_app_id)
-        filtros_aplicados.append(f"aplicacion_id='{filtro_app_id}'")
+    codigos_qs, filtros_aplicados = _aplicar_filtros(codigos_qs, request.GET)
 
     if filtros_aplicados:
         logger.info(
-            f"Búsqueda de códigos con filtros: {', '.join(filtros_aplicados)}.")
+            "Búsqueda de códigos con filtros: %s.", ', '.join(filtros_aplicados))
+
+    # Solo se consulta y renderiza la página solicitada (LIMIT/OFFSET), en orden estable
+    page_obj = paginar(request, codigos_qs.order_by('cod_cierre', 'id'), CODIGOS_POR_PAGINA)
 
     context = {
-        'lista_de_codigos': codigos_qs,
-        'total_registros': CodigoCierre.objects.count(),
-        'todas_las_aplicaciones': Aplicacion.objects.all().order_by('nombre_aplicacion'),
+        'lista_de_codigos': page_obj,
+        'page_obj': page_obj,
+        # Sin filtros, el conteo del paginador ya es el total de la tabla
+        'total_registros': (CodigoCierre.objects.count() if filtros_aplicados
+                            else page_obj.paginator.count),
+        'todas_las_aplicaciones': _aplicaciones_dropdown(),
     }
     return render(request, 'gestion/cod_cierre.html', context)
 
@@ -66,44 +145,32 @@ def exportar_codigos_cierre_csv(request):
     Genera y descarga un archivo CSV con el listado de códigos de cierre,
     respetando los filtros aplicados en la vista.
     """
-    logger.info(f"Usuario '{request.user}' solicitó exportación CSV de Códigos de Cierre.")
+    logger.info("Usuario '%s' solicitó exportación CSV de Códigos de Cierre.", request.user)
     
-    # Base QuerySet
-    codigos_qs = CodigoCierre.objects.select_related('aplicacion').all()
-
-    # Aplicar mismos filtros que en la vista principal
-    filtro_codigo = request.GET.get('codigo_cierre')
-    filtro_app_id = request.GET.get('aplicacion')
-
-    if filtro_codigo:
-        codigos_qs = codigos_qs.filter(cod_cierre__icontains=filtro_codigo)
-    if filtro_app_id and filtro_app_id.isdigit():
-        codigos_qs = codigos_qs.filter(aplicacion_id=filtro_app_id)
+    # Mismos filtros que en la vista principal
+    codigos_qs, _ = _aplicar_filtros(CodigoCierre.objects.all(), request.GET)
+
+    # Crear escritor CSV. Las filas se emiten a medida que se leen con un
+    # iterador, sin acumular el archivo completo en memoria.
+    writer = csv.writer(EchoBuffer(), delimiter=';')
+
+    def generar_filas():
+        yield writer.writerow(['ID', 'Código Cierre', 'Aplicación', 'Descripción', 'Causa Cierre'])
+        # values_list: tuplas con solo las columnas exportadas, sin instanciar modelos.
+        # El 'N/A' de los códigos sin aplicación lo resuelve la BD (COALESCE).
+        filas = codigos_qs.annotate(
+            nombre_app=Coalesce('aplicacion__nombre_aplicacion', Value('N/A')),
+        ).values_list('id', 'cod_cierre', 'nombre_app', 'desc_cod_cierre', 'causa_cierre')
+        yield from lineas_csv(writer, filas.iterator(chunk_size=2000))
 
     # Crear respuesta HTTP con tipo CSV
-    response = HttpResponse(content_type='text/csv')
+    response = StreamingHttpResponse(generar_filas(), content_type='text/csv')
     timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
     response['Content-Disposition'] = f'attachment; filename="codigos_cierre_{timestamp}.csv"'
-
-    # Crear escritor CSV
-    writer = csv.writer(response, delimiter=';')
-    writer.writerow(['ID', 'Código Cierre', 'Aplicación', 'Descripción', 'Causa Cierre'])
-
-    for codigo in codigos_qs:
-        writer.writerow([
-            codigo.id,
-            codigo.cod_cierre,
-            codigo.aplicacion.nombre_aplicacion if codigo.aplicacion else 'N/A',
-            codigo.desc_cod_cierre,
-            codigo.causa_cierre
-        ])
-
     return response
 
 
 
-@login_required
-@no_cache
 @login_required
 @no_cache
 def registrar_cod_cierre_view(request):
@@ -111,37 +178,33 @@ def registrar_cod_cierre_view(request):
     Gestiona la creación de un nuevo código de cierre usando Django Forms.
     """
     if request.method == 'POST':
-        logger.info(f"Usuario '{request.user}' intenta registrar un nuevo código de cierre.")
+        logger.info("Usuario '%s' intenta registrar un nuevo código de cierre.", request.user)
         form = CodigoCierreForm(request.POST)
         if form.is_valid():
+            # form.is_valid() ya valida la restricción uniq_codcierre_app;
+            # el IntegrityError solo ocurre si otro usuario lo creó entretanto.
             try:
-                # Verificación manual de duplicados (opcional, pero mantenemos la lógica original)
+                nuevo_codigo = form.save()
+                logger.info("Usuario '%s' registró con éxito el código '%s' (ID: %s).",
+                            request.user, nuevo_codigo.cod_cierre, nuevo_codigo.id)
+                messages.success(request, f'¡El código de cierre "{nuevo_codigo.cod_cierre}" ha sido registrado con éxito!')
+                return redirect('gestion:codigos_cierre')
+            except IntegrityError:
                 cod_cierre = form.cleaned_data['cod_cierre']
                 aplicacion = form.cleaned_data['aplicacion']
-                if CodigoCierre.objects.filter(cod_cierre=cod_cierre, aplicacion=aplicacion).exists():
-                    messages.error(request, f"Ya existe un código de cierre '{cod_cierre}' para la aplicación '{aplicacion.nombre_aplicacion}'.")
-                else:
-                    nuevo_codigo = form.save()
-                    logger.info(f"Usuario '{request.user}' registró con éxito el código '{nuevo_codigo.cod_cierre}' (ID: {nuevo_codigo.id}).")
-                    messages.success(request, f'¡El código de cierre "{nuevo_codigo.cod_cierre}" ha sido registrado con éxito!')
-                    return redirect('gestion:codigos_cierre')
+                messages.error(request, f"Ya existe un código de cierre '{cod_cierre}' para la aplicación '{aplicacion.nombre_aplicacion}'.")
             except Exception as e:
-                logger.error(f"Error al registrar código de cierre: {e}", exc_info=True)
+                logger.error("Error al registrar código de cierre: %s", e, exc_info=True)
                 messages.error(request, f'Error al registrar: {e}')
         else:
             messages.error(request, 'Por favor corrige los errores en el formulario.')
     else:
         form = CodigoCierreForm()
 
-    context = {
-        'form': form,
-        'todas_las_aplicaciones': Aplicacion.objects.all().order_by('nombre_aplicacion')
-    }
+    context = {'form': form}
     return render(request, 'gestion/registrar_cod_cierre.html', context)
 
 
-@login_required
-@no_cache
 @login_required
 @no_cache
 def editar_cod_cierre_view(request, pk):
@@ -151,22 +214,22 @@ def editar_cod_cierre_view(request, pk):
     codigo_a_editar = get_object_or_404(CodigoCierre, pk=pk)
 
     if request.method == 'POST':
-        logger.info(f"Usuario '{request.user}' intenta actualizar el código de cierre ID: {pk}.")
+        logger.info("Usuario '%s' intenta actualizar el código de cierre ID: %s.", request.user, pk)
         form = CodigoCierreForm(request.POST, instance=codigo_a_editar)
         if form.is_valid():
+            # form.is_valid() ya valida uniq_codcierre_app excluyendo el registro actual
             try:
-                # Verificación manual de duplicados excluyendo el actual
+                form.save()
+                logger.info("Usuario '%s' actualizó con éxito el código '%s' (ID: %s).",
+                            request.user, codigo_a_editar.cod_cierre, pk)
+                messages.success(request, f'El código de cierre "{codigo_a_editar.cod_cierre}" ha sido actualizado.')
+                return redirect('gestion:codigos_cierre')
+            except IntegrityError:
                 cod_cierre = form.cleaned_data['cod_cierre']
                 aplicacion = form.cleaned_data['aplicacion']
-                if CodigoCierre.objects.filter(cod_cierre=cod_cierre, aplicacion=aplicacion).exclude(pk=pk).exists():
-                    messages.error(request, f"Ya existe otro código de cierre '{cod_cierre}' para la aplicación '{aplicacion.nombre_aplicacion}'.")
-                else:
-                    form.save()
-                    logger.info(f"Usuario '{request.user}' actualizó con éxito el código '{codigo_a_editar.cod_cierre}' (ID: {pk}).")
-                    messages.success(request, f'El código de cierre "{codigo_a_editar.cod_cierre}" ha sido actualizado.')
-                    return redirect('gestion:codigos_cierre')
+                messages.error(request, f"Ya existe otro código de cierre '{cod_cierre}' para la aplicación '{aplicacion.nombre_aplicacion}'.")
             except Exception as e:
-                logger.error(f"Error al actualizar código de cierre: {e}", exc_info=True)
+                logger.error("Error al actualizar código de cierre: %s", e, exc_info=True)
                 messages.error(request, f'Error al actualizar: {e}')
         else:
             messages.error(request, 'Por favor corrige los errores en el formulario.')
@@ -176,7 +239,6 @@ def editar_cod_cierre_view(request, pk):
     context = {
         'form': form,
         'codigo_cierre': codigo_a_editar,
-        'todas_las_aplicaciones': Aplicacion.objects.all().order_by('nombre_aplicacion')
     }
     return render(request, 'gestion/registrar_cod_cierre.html', context)
 
@@ -196,23 +258,24 @@ def eliminar_cod_cierre_view(request, pk):
     """
     if request.method == 'POST':
         logger.info(
-            f"Usuario '{request.user}' intenta eliminar el código de cierre ID: {pk}.")
+            "Usuario '%s' intenta eliminar el código de cierre ID: %s.", request.user, pk)
         try:
             codigo_a_eliminar = CodigoCierre.objects.get(pk=pk)
             nombre_codigo = codigo_a_eliminar.cod_cierre
             codigo_a_eliminar.delete()
             logger.warning(
-                f"ACCIÓN CRÍTICA: El usuario '{request.user}' ha ELIMINADO el código '{nombre_codigo}' (ID: {pk}).")
+                "ACCIÓN CRÍTICA: El usuario '%s' ha ELIMINADO el código '%s' (ID: %s).",
+                request.user, nombre_codigo, pk)
             messages.success(
                 request, f'El código de cierre "{nombre_codigo}" ha sido eliminado.')
         except CodigoCierre.DoesNotExist:
             logger.warning(
-                f"Intento de eliminación fallido: código inexistente (ID: {pk}). Usuario: '{request.user}'.")
+                "Intento de eliminación fallido: código inexistente (ID: %s). Usuario: '%s'.", pk, request.user)
             messages.error(
                 request, 'El código de cierre que intentas eliminar no existe.')
         except Exception as e:
             logger.error(
-                f"Error al eliminar código de cierre ID {pk} por '{request.user}': {e}", exc_info=True)
+                "Error al eliminar código de cierre ID %s por '%s': %s", pk, request.user, e, exc_info=True)
             messages.error(request, f'Ocurrió un error al eliminar: {e}')
 
     return redirect('gestion:codigos_cierre')
@@ -227,7 +290,7 @@ def carga_masiva_cod_cierre_view(request):
     Gestiona la carga masiva de códigos de cierre desde un archivo JSON.
     """
     logger.info(
-        f"Usuario '{request.user}' está viendo la carga masiva de Códigos de Cierre.")
+        "Usuario '%s' está viendo la carga masiva de Códigos de Cierre.", request.user)
 
     def get_clean_value(data_dict, key):
         value = data_dict.get(key)
@@ -235,25 +298,19 @@ def carga_masiva_cod_cierre_view(request):
 
     if request.method == 'POST':
         logger.info(
-            f"Usuario '{request.user}' inició una carga masiva de Códigos de Cierre.")
+            "Usuario '%s' inició una carga masiva de Códigos de Cierre.", request.user)
         json_file = request.FILES.get('archivo')
         context = {}
 
-        if not json_file or not json_file.name.endswith('.json'):
-            messages.error(
-                request, 'Por favor, seleccione un archivo JSON válido.')
+        # Extensión, tamaño y primeros bytes, antes de leer el archivo completo
+        error_archivo = validar_archivo_json(json_file)
+        if error_archivo:
+            messages.error(request, error_archivo)
             return render(request, 'gestion/carga_masiva_cod_cierre.html')
 
         try:
-            # Leemos el contenido raw para intentar arreglarlo si es necesario
-            file_content = json_file.read().decode('utf-8').strip()
-            
-            # Intento de corrección: Si parece una lista de objetos pero le faltan los corchetes []
-            if file_content.startswith('{') and file_content.endswith('}'):
-                logger.info("El archivo JSON (cod_cierre) parece no tener corchetes de lista. Intentando envolverlo automáticamente.")
-                file_content = f"[{file_content}]"
-
-            all_rows = json.loads(file_content)
+            # Se parsea directamente desde los bytes (ver leer_json_subido)
+            all_rows = leer_json_subido(json_file)
             
             # VALIDACIÓN ESTRUCTURA JSON
             if not isinstance(all_rows, list):
@@ -262,7 +319,7 @@ def carga_masiva_cod_cierre_view(request):
 
             total_records_in_file = len(all_rows)
             logger.info(
-                f"Se leyeron {total_records_in_file} objetos del archivo JSON.")
+                "Se leyeron %s objetos del archivo JSON.", total_records_in_file)
 
             # Pre-validación de 'idCodCierre' duplicados en el archivo
             seen_ids, duplicates_found = set(), []
@@ -283,8 +340,29 @@ def carga_masiva_cod_cierre_view(request):
                 return render(request, 'gestion/carga_masiva_cod_cierre.html', context)
 
             # Procesamiento de filas
+            # Las filas se validan en memoria y se escriben con un único upsert
+            # (INSERT ... ON CONFLICT / ON DUPLICATE KEY UPDATE).
             created_count, updated_count, failed_rows = 0, 0, []
-            app_cache = {str(app.id): app for app in Aplicacion.objects.all()}
+            # Solo se necesitan los ids: el FK se asigna por aplicacion_id
+            app_ids = {str(app_id) for app_id in Aplicacion.objects.values_list('id', flat=True)}
+            max_len_cod = CodigoCierre._meta.get_field('cod_cierre').max_length
+
+            # En MySQL la comparación de texto no distingue mayúsculas: se replica
+            # al indexar, para que coincida con la restricción uniq_codcierre_app.
+            normalizar = str.lower if connection.vendor == 'mysql' else str
+            candidatos = [
+                (get_clean_value(r, 'cod_cierre'), get_clean_value(r, 'id_aplicacion'))
+                for r in all_rows if isinstance(r, dict)]
+            # Solo se consultan las claves existentes, para informar creados/actualizados
+            existentes = {
+                (normalizar(cod), app_id)
+                for cod, app_id in CodigoCierre.objects.filter(
+                    cod_cierre__in={cod for cod, _ in candidatos if cod},
+                    aplicacion_id__in={app_id for _, app_id in candidatos if app_id.isdigit()},
+                ).values_list('cod_cierre', 'aplicacion_id')}
+
+            filas = {}
+            registros_log = []
 
             for line_number, row in enumerate(all_rows, 1):
                 if not isinstance(row, dict):
@@ -297,38 +375,64 @@ def carga_masiva_cod_cierre_view(request):
                     if not cod_cierre or not id_aplicacion:
                         raise ValueError(
                             "Las claves 'cod_cierre' y 'id_aplicacion' son obligatorias.")
+                    if len(cod_cierre) > max_len_cod:
+                        raise ValueError(
+                            f"'cod_cierre' supera el largo máximo de {max_len_cod} caracteres.")
 
-                    aplicacion_obj = app_cache.get(id_aplicacion)
-                    if not aplicacion_obj:
+                    if id_aplicacion not in app_ids:
                         error_msg = f"La Aplicación con ID '{id_aplicacion}' no existe en la base de datos."
-                        logger.warning(f"Línea {line_number}: {error_msg} (Registro omitido).")
+                        logger.warning("Línea %s: %s (Registro omitido).", line_number, error_msg)
                         failed_rows.append(
-                            {'line': line_number, 'row_data': json.dumps(row), 'error': error_msg})
+                            {'line': line_number, 'row_data': FilaFallida(row), 'error': error_msg})
                         continue
 
-                    obj, created = CodigoCierre.objects.update_or_create(
-                        cod_cierre=cod_cierre,
-                        aplicacion=aplicacion_obj,
-                        defaults={
-                            'desc_cod_cierre': get_clean_value(row, 'descripcion_cierre'),
-                            'causa_cierre': get_clean_value(row, 'causa_cierre')
-                        }
-                    )
-
-                    if created:
+                    desc_cod_cierre = get_clean_value(row, 'descripcion_cierre')
+                    causa_cierre = get_clean_value(row, 'causa_cierre')
+                    aplicacion_id = int(id_aplicacion)
+                    clave = (normalizar(cod_cierre), aplicacion_id)
+
+                    # Si el código ya existe (en la BD o antes en el archivo) se actualiza
+                    obj = filas.get(clave)
+                    if obj is None:
+                        filas[clave] = CodigoCierre(
+                            cod_cierre=cod_cierre, aplicacion_id=aplicacion_id,
+                            desc_cod_cierre=desc_cod_cierre, causa_cierre=causa_cierre)
+                    else:
+                        obj.desc_cod_cierre = desc_cod_cierre
+                        obj.causa_cierre = causa_cierre
+                    if obj is None and clave not in existentes:
                         created_count += 1
-                        logger.info(
-                            f"Línea {line_number}: CÓDIGO CIERRE CREADO (ID: {obj.id}, Código: '{cod_cierre}').")
+                        registros_log.append((line_number, 'CREADO', cod_cierre))
                     else:
                         updated_count += 1
-                        logger.info(
-                            f"Línea {line_number}: CÓDIGO CIERRE ACTUALIZADO (ID: {obj.id}, Código: '{cod_cierre}').")
+                        registros_log.append((line_number, 'ACTUALIZADO', cod_cierre))
 
                 except Exception as e:
                     failed_rows.append(
-                        {'line': line_number, 'row_data': json.dumps(row), 'error': str(e)})
+                        {'line': line_number, 'row_data': FilaFallida(row), 'error': str(e)})
                     logger.error(
-                        f"Error procesando línea {line_number}: {e}", exc_info=True)
+                        "Error procesando línea %s: %s", line_number, e, exc_info=True)
+
+            # Inserciones y actualizaciones en una sola sentencia por lote; la
+            # transacción garantiza todo o nada entre lotes. MySQL no admite
+            # indicar unique_fields (usa cualquier clave única en conflicto).
+            unique_fields = (
+                ['cod_cierre', 'aplicacion']
+                if connection.features.supports_update_conflicts_with_target else None)
+            with transaction.atomic():
+                CodigoCierre.objects.bulk_create(
+                    filas.values(), batch_size=500, update_conflicts=True,
+                    update_fields=['desc_cod_cierre', 'causa_cierre'],
+                    unique_fields=unique_fields)
+            if filas:
+                # Las operaciones en bloque no emiten señales
+                invalidar_ultimos_codigos()
+            if created_count:
+                cache.delete(CODIGOS_DROPDOWN_CACHE_KEY)
+            # Detalle por fila solo si el nivel INFO está activo (evita recorrerlas en vano)
+            if logger.isEnabledFor(logging.INFO):
+                for line_number, accion, cod_cierre in registros_log:
+                    logger.info("Línea %s: CÓDIGO CIERRE %s (Código: '%s').", line_number, accion, cod_cierre)
 
             # Resumen y mensajes
             if created_count > 0:
@@ -344,16 +448,14 @@ def carga_masiva_cod_cierre_view(request):
             # Preparar string con líneas fallidas
             failed_lines_str = ""
             if failed_rows:
-                failed_lines = [str(item['line']) for item in failed_rows]
-                failed_lines_str = f" (Líneas: {', '.join(failed_lines)})"
+                failed_lines_str = " (Líneas: %s)" % ', '.join(str(item['line']) for item in failed_rows)
 
             # Registro de estadísticas en el log del sistema
             logger.info(
-                f"Resumen Carga Masiva Códigos Cierre (Usuario: {request.user}) - "
-                f"Total Leídos: {total_records_in_file} | "
-                f"Creados: {created_count} | "
-                f"Actualizados: {updated_count} | "
-                f"Fallidos: {len(failed_rows)}{failed_lines_str}"
+                "Resumen Carga Masiva Códigos Cierre (Usuario: %s) - "
+                "Total Leídos: %s | Creados: %s | Actualizados: %s | Fallidos: %s%s",
+                request.user, total_records_in_file, created_count, updated_count,
+                len(failed_rows), failed_lines_str
             )
 
             context = {
@@ -368,13 +470,13 @@ def carga_masiva_cod_cierre_view(request):
             return render(request, 'gestion/carga_masiva_cod_cierre.html', context)
 
         except json.JSONDecodeError as e:
-            logger.warning(f"Error de formato JSON en carga (cod_cierre) por '{request.user}': {e}")
+            logger.warning("Error de formato JSON en carga (cod_cierre) por '%s': %s", request.user, e)
             messages.error(request, f"El archivo no tiene un formato JSON válido. Error: {e}")
             return render(request, 'gestion/carga_masiva_cod_cierre.html')
 
         except Exception as e:
             logger.critical(
-                f"Error CRÍTICO en carga masiva de códigos por '{request.user}': {e}", exc_info=True)
+                "Error CRÍTICO en carga masiva de códigos por '%s': %s", request.user, e, exc_info=True)
             messages.error(
                 request, f"Ocurrió un error general e inesperado: {e}")
             return render(request, 'gestion/carga_masiva_cod_cierre.html')
@@ -384,6 +486,8 @@ def carga_masiva_cod_cierre_view(request):
 # --- Vista para AJAX ---
 
 
+@login_required
+@no_cache
 def obtener_ultimos_codigos_cierre(request, aplicacion_id):
     """
     Endpoint API para ser llamado vía AJAX.
@@ -396,17 +500,22 @@ def obtener_ultimos_codigos_cierre(request, aplicacion_id):
         aplicacion_id (int): El ID de la aplicación para la cual buscar códigos.
 
     Returns:
-        JsonResponse: Un objeto JSON con una lista de códigos o un mensaje de error.
+        HttpResponse: Un objeto JSON con una lista de códigos o un mensaje de error.
     """
 
     logger.info(
-        f"Petición AJAX recibida para obtener códigos de la app ID: {aplicacion_id}.")
+        "Petición AJAX recibida para obtener códigos de la app ID: %s.", aplicacion_id)
     try:
-        codigos = CodigoCierre.objects.filter(
-            aplicacion_id=aplicacion_id).order_by('-id')[:5]
-        data = list(codigos.values('cod_cierre', 'desc_cod_cierre'))
-        return JsonResponse({'codigos': data})
+        version = version_codigos_cierre()
+        # Se guarda en caché el JSON ya serializado: un acierto no vuelve a codificar
+        payload = cache.get_or_set(
+            f'ult_cc_json_{version}_{aplicacion_id}',
+            lambda: json_dumps({'codigos': list(
+                CodigoCierre.objects.filter(aplicacion_id=aplicacion_id)
+                .order_by('-id').values('cod_cierre', 'desc_cod_cierre')[:5])}),
+            300)
+        return HttpResponse(payload, content_type='application/json')
     except Exception as e:
         logger.error(
-            f"Error en AJAX 'obtener_ultimos_codigos_cierre' para app_id {aplicacion_id}: {e}", exc_info=True)
+            "Error en AJAX 'obtener_ultimos_codigos_cierre' para app_id %s: %s", aplicacion_id, e, exc_info=True)
         return JsonResponse({'error': 'Error interno del servidor'}, status=500)
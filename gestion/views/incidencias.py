@@ -3,25 +3,105 @@ import io
 import re
 import json
 from datetime import datetime, timedelta
-import pandas as pd
-from django.db import transaction
+from functools import lru_cache
+from django.db import DatabaseError, connection, transaction
 from django.shortcuts import render, redirect, get_object_or_404
 from django.http import JsonResponse, HttpResponse
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.db import transaction
-from django.db.models import F, Q, Value
-from django.db.models.functions import Coalesce, TruncMonth
+from django.core.cache import cache
+from django.db.models import Case, Max, Q, Value, When
+from django.db.models.functions import Coalesce, Length, Lower, TruncMonth
 from django.utils import timezone
+from django.utils.cache import get_conditional_response, set_response_etag
 
-from .utils import no_cache, logger
+from .utils import no_cache, logger, paginar, lotes
+from .cod_cierre import _aplicaciones_dropdown, _codigos_cierre_dropdown
 from django.core.exceptions import ObjectDoesNotExist
 from unidecode import unidecode
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, Side
 from openpyxl.utils import get_column_letter
 from ..models import (Incidencia, Aplicacion, Estado, Severidad, Impacto,
                       GrupoResolutor, Interfaz, Cluster, Bloque, CodigoCierre, Usuario)
 from ..forms import IncidenciaForm
 
+# Clave de caché del conteo total de incidencias (estadística del listado)
+TOTAL_INCIDENCIAS_CACHE_KEY = 'incidencia_total'
+
+# Incidencias por página del listado (DataTables pagina en el cliente dentro de cada una)
+INCIDENCIAS_POR_PAGINA = 500
+
+# Filas de la carga masiva que se procesan por lote (consultas en bloque)
+LOTE_CARGA_INCIDENCIAS = 1000
+
+# Clave de caché de los catálogos del filtro del listado (ver gestion/signals.py)
+FILTROS_INCIDENCIA_CACHE_KEY = 'inc_filtros'
+
+
+def _filtros_context():
+    """
+    Devuelve los catálogos de los menús desplegables del filtro de incidencias.
+    Aplicaciones y códigos de cierre reutilizan las listas en caché de
+    views/cod_cierre.py; bloques y grupos resolutores se guardan aquí. Las
+    señales de gestion/signals.py invalidan las entradas al modificarlos.
+    """
+    return {
+        'aplicaciones': _aplicaciones_dropdown(),
+        'codigos_cierre': _codigos_cierre_dropdown(),
+        **cache.get_or_set(FILTROS_INCIDENCIA_CACHE_KEY, lambda: {
+            'bloques': list(Bloque.objects.order_by('desc_bloque').values('id', 'desc_bloque')),
+            'grupos_resolutores': list(GrupoResolutor.objects.order_by(
+                'desc_grupo_resol').values('id', 'desc_grupo_resol')),
+        }, 3600),
+    }
+
+
+# Catálogos pequeños del formulario de incidencias cuyas opciones se guardan en caché
+CATALOGOS_FORMULARIO = ('estado', 'severidad', 'impacto', 'bloque', 'interfaz', 'cluster',
+                        'grupo_resolutor', 'usuario_asignado')
+
+# Clave de caché de las opciones de CATALOGOS_FORMULARIO (ver gestion/signals.py)
+OPCIONES_FORMULARIO_CACHE_KEY = 'inc_form_opciones'
+
+
+def _cargar_opciones_formulario(form):
+    """
+    Asigna a los campos de selección del IncidenciaForm opciones ya calculadas,
+    para que renderizar el formulario no ejecute una consulta por cada catálogo.
+    Aplicaciones y códigos de cierre reutilizan las listas en caché de
+    views/cod_cierre.py. La validación del POST sigue usando el queryset de cada campo.
+    """
+    opciones = cache.get_or_set(OPCIONES_FORMULARIO_CACHE_KEY, lambda: {
+        campo: [(obj.pk, form.fields[campo].label_from_instance(obj))
+                for obj in form.fields[campo].queryset]
+        for campo in CATALOGOS_FORMULARIO}, 3600)
+    opciones = {
+        **opciones,
+        'aplicacion': [(a['id'], a['nombre_aplicacion']) for a in _aplicaciones_dropdown()],
+        'codigo_cierre': [(c['id'], c['cod_cierre']) for c in _codigos_cierre_dropdown()],
+    }
+    for campo, lista in opciones.items():
+        field = form.fields[campo]
+        vacia = [('', field.empty_label)] if field.empty_label is not None else []
+        field.choices = vacia + lista
+
+
+@lru_cache(maxsize=1)
+def _limites_mes(primer_dia):
+    """
+    Devuelve el primer y el último día del mes de `primer_dia` en formato
+    'YYYY-MM-DD'. Lo usan el filtro por defecto y el contexto del listado; el
+    resultado solo cambia una vez al mes, por eso se memoriza.
+    """
+    if primer_dia.month == 12:
+        primer_dia_siguiente = primer_dia.replace(year=primer_dia.year + 1, month=1)
+    else:
+        primer_dia_siguiente = primer_dia.replace(month=primer_dia.month + 1)
+    ultimo_dia = primer_dia_siguiente - timedelta(days=1)
+    return primer_dia.strftime('%Y-%m-%d'), ultimo_dia.strftime('%Y-%m-%d')
+
 
 @login_required
 @no_cache
@@ -42,11 +122,13 @@ def incidencias_view(request):
                       contexto necesario.
 
     Context:
-        'lista_de_incidencias' (QuerySet): Incidencias resultantes tras el filtrado.
+        'lista_de_incidencias' (Page): Página solicitada (`?page=`) de las incidencias filtradas.
+        'page_obj' (Page): La misma página, para los controles de paginación.
         'total_registros' (int): El número total de incidencias en el sistema.
-        'aplicaciones' (QuerySet): Lista de todas las aplicaciones para el filtro.
-        'bloques' (QuerySet): Lista de todos los bloques para el filtro.
-        'codigos_cierre' (QuerySet): Lista de todos los códigos de cierre para el filtro.
+        'aplicaciones' (list[dict]): Aplicaciones (id, nombre) para el filtro.
+        'bloques' (list[dict]): Bloques (id, descripción) para el filtro.
+        'codigos_cierre' (list[dict]): Códigos de cierre (id, código) para el filtro.
+        'grupos_resolutores' (list[dict]): Grupos resolutores (id, descripción) para el filtro.
         'fecha_inicio_mes' (str): Primer día del mes actual (formato 'YYYY-MM-DD').
         'fecha_fin_mes' (str): Último día del mes actual (formato 'YYYY-MM-DD').
     """
@@ -55,13 +137,25 @@ def incidencias_view(request):
         f"El usuario '{request.user}' ha accedido a la vista de incidencias.")
 
     # --- 2. Queryset Base Optimizado ---
-    # Usamos select_related para reducir el número de consultas a la base de datos.
+    # select_related solo para las relaciones que muestra la tabla (incluida la
+    # criticidad de la aplicación y el usuario asignado, que generaban N+1).
+    # Estado y severidad son catálogos pequeños: prefetch_related los trae una
+    # sola vez por página en lugar de repetir sus columnas en cada fila.
     incidencias_qs = Incidencia.objects.select_related(
-        'aplicacion', 'estado', 'severidad', 'impacto', 'bloque', 'codigo_cierre',
-        'grupo_resolutor'
-    ).all()
+        'aplicacion__criticidad', 'bloque', 'codigo_cierre', 'grupo_resolutor',
+        'usuario_asignado'
+    ).prefetch_related('estado', 'severidad').only(
+        # Solo las columnas que usa la plantilla; estado_id y severidad_id
+        # son necesarias para enlazar los objetos precargados.
+        'incidencia', 'fecha_apertura', 'fecha_ultima_resolucion', 'cumple_sla',
+        'tiempo_sla_calculado', 'estado_id', 'severidad_id',
+        'aplicacion__cod_aplicacion', 'aplicacion__nombre_aplicacion',
+        'aplicacion__criticidad__desc_criticidad', 'bloque__desc_bloque',
+        'codigo_cierre__cod_cierre', 'grupo_resolutor__desc_grupo_resol',
+        'usuario_asignado__usuario')
 
     # --- 3. Procesamiento de Filtros ---
+    filtros = _filtros_context()
     filtros_aplicados = []
     filtro_app_id = request.GET.get('aplicativo')
     filtro_bloque_id = request.GET.get('bloque')
@@ -73,19 +167,12 @@ def incidencias_view(request):
     filtro_cumple_sla = request.GET.get('cumple_sla')
 
     # Lógica de filtro por defecto: si no hay filtros en la URL, se usa el mes actual.
-    if not request.GET:
-        hoy = timezone.now()
-        primer_dia_mes = hoy.replace(day=1)
-        # Se calcula el último día del mes actual
-        if primer_dia_mes.month == 12:
-            ultimo_dia_mes = primer_dia_mes.replace(
-                year=primer_dia_mes.year + 1, month=1, day=1) - timedelta(days=1)
-        else:
-            ultimo_dia_mes = primer_dia_mes.replace(
-                month=primer_dia_mes.month + 1, day=1) - timedelta(days=1)
-
-        filtro_fecha_desde = primer_dia_mes.strftime('%Y-%m-%d')
-        filtro_fecha_hasta = ultimo_dia_mes.strftime('%Y-%m-%d')
+    # El número de página no cuenta como filtro.
+    hay_filtros_url = any(clave != 'page' for clave in request.GET)
+    fecha_inicio_mes, fecha_fin_mes = _limites_mes(timezone.now().date().replace(day=1))
+    if not hay_filtros_url:
+        filtro_fecha_desde = fecha_inicio_mes
+        filtro_fecha_hasta = fecha_fin_mes
         logger.info(
             f"No se proporcionaron filtros. Aplicando filtro por defecto para el mes actual: {filtro_fecha_desde} a {filtro_fecha_hasta}.")
 
@@ -115,14 +202,16 @@ def incidencias_view(request):
             filtros_aplicados.append(
                 f"grupo_resolutor_id='{filtro_grupo_resolutor_id}'")
         elif filtro_grupo_resolutor_id == 'exclude_indra_d':
-            try:
-                indra_d_grupo = GrupoResolutor.objects.get(
-                    desc_grupo_resol__iexact='INDRA_D')
+            # El ID de INDRA_D sale de la lista de grupos en caché del desplegable
+            indra_d_id = next((
+                grupo['id'] for grupo in filtros['grupos_resolutores']
+                if grupo['desc_grupo_resol'].lower() == 'indra_d'), None)
+            if indra_d_id is not None:
                 incidencias_qs = incidencias_qs.exclude(
-                    grupo_resolutor_id=indra_d_grupo.id)
+                    grupo_resolutor_id=indra_d_id)
                 filtros_aplicados.append(
                     "grupo_resolutor='Todos (Sin INDRA_D)'")
-            except GrupoResolutor.DoesNotExist:
+            else:
                 logger.warning(
                     "Se intentó filtrar excluyendo 'INDRA_D', pero el grupo no existe en la base de datos.")
 
@@ -159,35 +248,27 @@ def incidencias_view(request):
             logger.warning(
                 f"Formato de fecha 'hasta' inválido: '{filtro_fecha_hasta}'. Se ignorará el filtro.")
 
-    if filtros_aplicados and request.GET:  # Solo registrar si los filtros son explícitos del usuario
+    if filtros_aplicados and hay_filtros_url:  # Solo registrar si los filtros son explícitos del usuario
         logger.info(
             f"Búsqueda de incidencias con filtros: {', '.join(filtros_aplicados)}.")
 
-    logger.info(
-        f"La consulta ha devuelto {incidencias_qs.count()} incidencias.")
-
     # --- 4. Preparación del Contexto para la Plantilla ---
-    # Nota: La lógica para calcular las fechas del mes se repite.
-    # En una futura refactorización, podría moverse a una función auxiliar.
-    hoy = timezone.now()
-    primer_dia_mes = hoy.replace(day=1)
-    if primer_dia_mes.month == 12:
-        primer_dia_mes_siguiente = primer_dia_mes.replace(
-            year=primer_dia_mes.year + 1, month=1)
-    else:
-        primer_dia_mes_siguiente = primer_dia_mes.replace(
-            month=primer_dia_mes.month + 1)
-    ultimo_dia_mes = primer_dia_mes_siguiente - timedelta(days=1)
+    # Solo se consulta y renderiza la página solicitada (LIMIT/OFFSET), en orden
+    # estable y coincidente con el orden inicial de la tabla (por incidencia).
+    page_obj = paginar(request, incidencias_qs.order_by('incidencia'), INCIDENCIAS_POR_PAGINA)
+    # El paginador ya contó los resultados: el log no ejecuta otro COUNT
+    logger.info(
+        f"La consulta ha devuelto {page_obj.paginator.count} incidencias.")
 
     context = {
-        'lista_de_incidencias': incidencias_qs,
-        'total_registros': Incidencia.objects.count(),
-        'aplicaciones': Aplicacion.objects.all().order_by('nombre_aplicacion'),
-        'bloques': Bloque.objects.all().order_by('desc_bloque'),
-        'codigos_cierre': CodigoCierre.objects.all().order_by('cod_cierre'),
-        'grupos_resolutores': GrupoResolutor.objects.all().order_by('desc_grupo_resol'),
-        'fecha_inicio_mes': primer_dia_mes.strftime('%Y-%m-%d'),
-        'fecha_fin_mes': ultimo_dia_mes.strftime('%Y-%m-%d'),
+        'lista_de_incidencias': page_obj,
+        'page_obj': page_obj,
+        # Se guarda en caché por 60 segundos para no ejecutar un COUNT(*) en cada visita
+        'total_registros': cache.get_or_set(
+            TOTAL_INCIDENCIAS_CACHE_KEY, Incidencia.objects.count, 60),
+        **filtros,
+        'fecha_inicio_mes': fecha_inicio_mes,
+        'fecha_fin_mes': fecha_fin_mes,
     }
 
     # --- 5. Renderizado Final ---
@@ -210,6 +291,7 @@ def registrar_incidencia_view(request):
                 nueva_incidencia = form.save(commit=False)
                 nueva_incidencia.usuario_creador = request.user
                 nueva_incidencia.save()
+                cache.delete(TOTAL_INCIDENCIAS_CACHE_KEY)
                 logger.info(f"Incidencia '{nueva_incidencia.incidencia}' registrada con éxito.")
                 messages.success(request, f'¡La incidencia "{nueva_incidencia.incidencia}" ha sido registrada con éxito!')
                 return redirect('gestion:incidencias')
@@ -221,21 +303,11 @@ def registrar_incidencia_view(request):
     else:
         form = IncidenciaForm()
 
-    # Contexto para mantener compatibilidad con selectores manuales si se usan en JS
-    # Aunque con el form ya no son estrictamente necesarios si se renderiza el form,
-    # los mantenemos por si el template usa lógica específica.
+    # La plantilla renderiza solo los campos del formulario: sus opciones salen de caché
+    _cargar_opciones_formulario(form)
     context = {
         'form': form,
         'form_data': request.POST if request.method == 'POST' else None,
-        'aplicaciones': Aplicacion.objects.all().order_by('nombre_aplicacion'),
-        'estados': Estado.objects.filter(uso_estado='Incidencia').order_by('desc_estado'),
-        'severidades': Severidad.objects.all(),
-        'impactos': Impacto.objects.all(),
-        'grupos_resolutores': GrupoResolutor.objects.all(),
-        'interfaces': Interfaz.objects.all(),
-        'clusters': Cluster.objects.all(),
-        'bloques': Bloque.objects.all(),
-        'usuarios': Usuario.objects.all().order_by('nombre'),
     }
     return render(request, 'gestion/registrar_incidencia.html', context)
 
@@ -254,7 +326,10 @@ def editar_incidencia_view(request, pk):
         form = IncidenciaForm(request.POST, instance=incidencia)
         if form.is_valid():
             try:
-                form.save()
+                # Solo se escriben las columnas que el usuario modificó
+                incidencia = form.save(commit=False)
+                if form.changed_data:
+                    incidencia.save(update_fields=form.changed_data)
                 messages.success(request, f'¡La incidencia "{incidencia.incidencia}" ha sido actualizada con éxito!')
                 
                 # Redirección inteligente: volver al filtro anterior si existe
@@ -270,23 +345,12 @@ def editar_incidencia_view(request, pk):
     else:
         form = IncidenciaForm(instance=incidencia)
 
-    # Contexto para compatibilidad
-    codigos_cierre_app = CodigoCierre.objects.filter(aplicacion=incidencia.aplicacion) if incidencia.aplicacion else []
-    
+    # La plantilla renderiza solo los campos del formulario: sus opciones salen de caché
+    _cargar_opciones_formulario(form)
     context = {
         'form': form,
         'form_data': request.POST if request.method == 'POST' else None,
         'incidencia': incidencia, # Importante para que el template sepa que es edición
-        'aplicaciones': Aplicacion.objects.all(),
-        'estados': Estado.objects.filter(uso_estado='Incidencia').order_by('desc_estado'),
-        'severidades': Severidad.objects.all(),
-        'impactos': Impacto.objects.all(),
-        'grupos_resolutores': GrupoResolutor.objects.all(),
-        'interfaces': Interfaz.objects.all(),
-        'clusters': Cluster.objects.all(),
-        'bloques': Bloque.objects.all(),
-        'usuarios': Usuario.objects.all().order_by('nombre'),
-        'codigos_cierre': codigos_cierre_app,
         # Capturamos la URL anterior (referer) para volver a ella tras guardar
         'next_url': request.POST.get('next') or request.META.get('HTTP_REFERER') or ''
     }
@@ -324,6 +388,7 @@ def eliminar_incidencia_view(request, pk):
 
             # Se elimina el objeto de la base de datos.
             incidencia.delete()
+            cache.delete(TOTAL_INCIDENCIAS_CACHE_KEY)
 
             # Se registra la eliminación como una ADVERTENCIA (WARNING) para que sea
             # fácil de localizar en los logs, ya que es una acción destructiva importante.
@@ -350,20 +415,27 @@ def eliminar_incidencia_view(request, pk):
 
 
 @login_required
-@no_cache
 def get_codigos_cierre_por_aplicacion(request, aplicacion_id):
     """
     Vista que, dado un ID de aplicación, devuelve los códigos de cierre
     asociados en formato JSON.
+
+    La respuesta lleva un ETag calculado sobre su contenido: el navegador la
+    revalida en cada cambio del desplegable y, si los códigos de la aplicación
+    no cambiaron, recibe un 304 sin volver a descargarlos. Al salir de los
+    datos, no depende de ninguna versión en caché que pueda desalojarse.
     """
     try:
-        # Usamos .annotate() para crear alias que coincidan con lo que el JavaScript espera ('codigo' y 'descripcion')
-        codigos = CodigoCierre.objects.filter(aplicacion_id=aplicacion_id).annotate(
-            codigo=F('cod_cierre'),
-            descripcion=F('desc_cod_cierre')
-        ).order_by('codigo').values('id', 'codigo', 'descripcion')
+        codigos = CodigoCierre.objects.filter(aplicacion_id=aplicacion_id).order_by(
+            'cod_cierre').values_list('id', 'cod_cierre', 'desc_cod_cierre')
+        # Las claves se renombran aquí a lo que el JavaScript espera ('codigo' y 'descripcion')
+        data = [{'id': pk, 'codigo': codigo, 'descripcion': descripcion}
+                for pk, codigo, descripcion in codigos]
 
-        return JsonResponse(list(codigos), safe=False)
+        response = JsonResponse(data, safe=False)
+        response['Cache-Control'] = 'private, no-cache'
+        set_response_etag(response)
+        return get_conditional_response(request, etag=response['ETag'], response=response)
 
     except Exception as e:
         logger.error(
@@ -371,11 +443,211 @@ def get_codigos_cierre_por_aplicacion(request, aplicacion_id):
         return JsonResponse({'error': 'Ocurrió un error en el servidor.'}, status=500)
 
 
+@lru_cache(maxsize=65536)
 def normalize_text(text):
-    """Convierte texto a minúsculas y quita acentos."""
+    """
+    Convierte texto a minúsculas y quita acentos. Se memoriza porque en la
+    carga masiva los mismos valores se repiten en miles de filas.
+    """
     if text is None:
         return ""
-    return unidecode(str(text)).lower().strip()
+    text = str(text)
+    # unidecode no altera el texto ASCII: solo se aplica si hay otros caracteres
+    if not text.isascii():
+        text = unidecode(text)
+    return text.lower().strip()
+
+
+def _valor_fila(row, *claves):
+    """Devuelve el primer valor no vacío de `claves` en la fila."""
+    for clave in claves:
+        val = row.get(clave)
+        if val is not None and str(val).strip():
+            return str(val).strip()
+    return ''
+
+
+def _id_existente(ids, valor):
+    """Devuelve `valor` (texto numérico) como entero si está en `ids`; si no, None."""
+    pk = int(valor)
+    return pk if pk in ids else None
+
+
+def _ids_por_texto(modelo):
+    """IDs de `modelo` indexados por su texto ('12' -> 12), sin instanciar los registros."""
+    return {str(pk): pk for pk in modelo.objects.values_list('id', flat=True)}
+
+
+def _leer_filas_archivo(file):
+    """
+    Genera (índice, fila) de un archivo .csv o .xlsx subido, una fila a la vez.
+    Cada fila es un diccionario columna -> texto, con '' en las celdas vacías.
+    """
+    if file.name.endswith('.csv'):
+        lector = csv.DictReader(io.TextIOWrapper(file, encoding='utf-8-sig', newline=''), restval='')
+        yield from enumerate(lector)
+        return
+
+    libro = load_workbook(file, read_only=True, data_only=True)
+    try:
+        filas = libro.active.iter_rows(values_only=True)
+        cabecera = ['' if c is None else str(c) for c in next(filas, ())]
+        for index, valores in enumerate(filas):
+            yield index, dict(zip(cabecera, ('' if v is None else str(v) for v in valores)))
+    finally:
+        libro.close()
+
+
+def _codigos_cierre_referenciados(filas):
+    """
+    Carga en bloque los IDs de los códigos de cierre referenciados en `filas`,
+    por ID o por código. Devuelve el conjunto de IDs existentes y dos
+    diccionarios de IDs: por (código, aplicacion_id) y por código; los códigos
+    se comparan en minúsculas.
+    """
+    cc_ids, cc_textos = set(), set()
+    for _, row in filas:
+        cc_val = _valor_fila(row, 'codigo_cierre_id', 'cod_cierre')
+        if cc_val.isdigit():
+            cc_ids.add(int(cc_val))
+        elif cc_val:
+            cc_textos.add(cc_val.lower())
+
+    ids = set()
+    if cc_ids:
+        ids.update(CodigoCierre.objects.filter(id__in=cc_ids).values_list('id', flat=True))
+    por_app, por_texto = {}, {}
+    if cc_textos:
+        codigos_texto = CodigoCierre.objects.annotate(
+            cod_lower=Lower('cod_cierre')).filter(cod_lower__in=cc_textos).order_by('id')
+        for pk, cod_lower, aplicacion_id in codigos_texto.values_list('id', 'cod_lower', 'aplicacion_id'):
+            por_app.setdefault((cod_lower, aplicacion_id), pk)
+            por_texto.setdefault(cod_lower, pk)
+    return ids, por_app, por_texto
+
+
+# Valores del bloque en el archivo de carga -> bloque y grupo resolutor de destino
+MAPA_BLOQUES_CARGA = {
+    'INDRA_B3': 'BLOQUE 3',
+    'INDRA': 'BLOQUE 4',
+    'INDRA_A': 'BLOQUE 4',
+    'INDRA_D': 'BLOQUE 4'
+}
+MAPA_GRUPOS_CARGA = {
+    'INDRA_B3': 'SWF_INDRA_3B',
+    'INDRA': 'SWF_INDRA_G3',
+    'INDRA_A': 'SWF_INDRA_G3',
+    'INDRA_D': 'INDRA_D'
+}
+
+
+def _crear_incidencias(pendientes):
+    """
+    Inserta en bloque las incidencias de `pendientes`, una lista de
+    (línea, fila, instancia). Si el lote falla se reintenta fila a fila, cada
+    una en su savepoint, para aislar las que no se pueden guardar sin abortar
+    la transacción. Devuelve (creadas, fallidas) con fallidas como (línea, fila, error).
+    """
+    if not pendientes:
+        return [], []
+    instancias = [obj for _, _, obj in pendientes]
+    try:
+        with transaction.atomic():
+            Incidencia.objects.bulk_create(instancias, batch_size=LOTE_CARGA_INCIDENCIAS)
+        return instancias, []
+    except DatabaseError:
+        pass
+
+    creadas, fallidas = [], []
+    for line_number, row, obj in pendientes:
+        obj.pk = None
+        try:
+            with transaction.atomic():
+                obj.save(force_insert=True)
+            creadas.append(obj)
+        except DatabaseError as e:
+            fallidas.append((line_number, row, e))
+    return creadas, fallidas
+
+
+# Para cada formato (con directivas de strptime) se precompila una expresión
+# regular con su forma (separadores y cantidad de dígitos) y un grupo con nombre
+# por campo. La fecha se arma directamente con los grupos del primer formato que
+# coincide, sin pasar por strptime (implementado en Python y mucho más lento)
+# ni capturar un ValueError por cada formato que no corresponde.
+_CAMPOS_FORMATO_FECHA = {
+    '%d': r'(?P<dia>\d{1,2})', '%m': r'(?P<mes>\d{1,2})', '%H': r'(?P<hora>\d{1,2})',
+    '%I': r'(?P<hora12>\d{1,2})', '%M': r'(?P<minuto>\d{1,2})', '%S': r'(?P<segundo>\d{1,2})',
+    '%Y': r'(?P<anio>\d{4})', '%y': r'(?P<anio2>\d{2})', '%p': r'(?P<ampm>[ap]m)',
+}
+
+
+def _compilar_formatos_fecha(formatos):
+    """Devuelve una tupla con la expresión regular compilada de cada formato de `formatos`."""
+    patrones = []
+    for formato in formatos:
+        partes = re.split(r'(%[a-zA-Z]| )', formato)
+        regex = ''.join(
+            _CAMPOS_FORMATO_FECHA.get(parte, r'\s+' if parte == ' ' else re.escape(parte))
+            for parte in partes)
+        patrones.append(re.compile(regex))
+    return tuple(patrones)
+
+
+def _parsear_fecha(texto, patrones):
+    """
+    Analiza `texto` con el primer patrón de `patrones` cuya forma coincide; None
+    si ninguno coincide o la fecha no es válida. Aplica las mismas reglas que
+    strptime: %y de 69 a 99 es 19xx y de 00 a 68 es 20xx, y %I va de 1 a 12.
+    """
+    for patron in patrones:
+        coincidencia = patron.fullmatch(texto)
+        if coincidencia:
+            break
+    else:
+        return None
+
+    campos = coincidencia.groupdict()
+    if 'anio' in campos:
+        anio = int(campos['anio'])
+    else:
+        anio = int(campos['anio2'])
+        anio += 2000 if anio <= 68 else 1900
+    if 'hora12' in campos:
+        hora = int(campos['hora12'])
+        if not 1 <= hora <= 12:
+            return None
+        # 12 am es medianoche y 12 pm es mediodía
+        hora = hora % 12 + (12 if campos['ampm'] == 'pm' else 0)
+    else:
+        hora = int(campos.get('hora') or 0)
+    try:
+        return datetime(anio, int(campos['mes']), int(campos['dia']), hora,
+                        int(campos.get('minuto') or 0), int(campos.get('segundo') or 0))
+    except ValueError:
+        return None
+
+
+# Indicadores AM/PM en español ('a. m.', 'p.m.', ...) para la directiva %p de Python
+_AM_PM_RE = re.compile(r'([ap])\. ?m\.')
+
+
+def _normalizar_am_pm(date_string):
+    """Pasa la fecha a minúsculas y normaliza sus indicadores AM/PM a 'am'/'pm'."""
+    return _AM_PM_RE.sub(r'\1m', date_string.lower())
+
+
+# Formatos aceptados por parse_flexible_date
+_FORMATOS_FECHA = _compilar_formatos_fecha((
+    '%d-%m-%Y',             # DD-MM-YYYY (Solicitado explícitamente)
+    '%d/%m/%Y',             # DD/MM/YYYY
+    '%Y-%m-%d',             # YYYY-MM-DD (ISO)
+    '%d-%m-%Y %H:%M:%S',    # Con hora
+    '%d/%m/%Y %H:%M:%S',    # Con hora slashes
+    '%Y-%m-%d %H:%M:%S',    # ISO con hora
+    '%d/%m/%y %I:%M:%S %p', # AM/PM corto
+    '%d/%m/%Y %I:%M:%S %p', # AM/PM largo
+))
 
 
 def parse_flexible_date(date_string):
@@ -386,34 +658,35 @@ def parse_flexible_date(date_string):
     if not date_string:
         return None
 
-    # Normaliza los indicadores AM/PM para la directiva %p de Python
-    processed_string = date_string.lower().replace(
-        'a. m.', 'am').replace('p. m.', 'pm')
-    processed_string = processed_string.replace(
-        'a.m.', 'am').replace('p.m.', 'pm')
-
-    # Lista de formatos a intentar.
-    formats = [
-        '%d-%m-%Y',             # DD-MM-YYYY (Solicitado explícitamente)
-        '%d/%m/%Y',             # DD/MM/YYYY
-        '%Y-%m-%d',             # YYYY-MM-DD (ISO)
-        '%d-%m-%Y %H:%M:%S',    # Con hora
-        '%d/%m/%Y %H:%M:%S',    # Con hora slashes
-        '%Y-%m-%d %H:%M:%S',    # ISO con hora
-        '%d/%m/%y %I:%M:%S %p', # AM/PM corto
-        '%d/%m/%Y %I:%M:%S %p', # AM/PM largo
-    ]
+    # Si no coincide ningún formato se devuelve None en lugar de romper;
+    # el llamador maneja el None.
+    return _parsear_fecha(_normalizar_am_pm(date_string), _FORMATOS_FECHA) # timezone.make_aware(dt) # Removed for USE_TZ=False
 
-    for fmt in formats:
-        try:
-            dt = datetime.strptime(processed_string, fmt)
-            return dt # timezone.make_aware(dt) # Removed for USE_TZ=False
-        except ValueError:
-            continue
-    
-    # Si falla, intentamos devolver None en lugar de romper, 
-    # o podríamos dejar que el llamador maneje el None.
-    return None
+
+# Formatos aceptados en la carga masiva de incidencias
+_FORMATOS_FECHA_CARGA = _compilar_formatos_fecha((
+    '%d-%m-%Y %H:%M:%S',      # Formato original: 25-12-2023 14:30:00
+    '%d/%m/%y %I:%M:%S %p',  # AM/PM con año de 2 dígitos: 01/09/25 08:53:27 am
+    '%d/%m/%Y %I:%M:%S %p',  # AM/PM con año de 4 dígitos: 01/09/2025 08:53:27 am
+    '%d/%m/%y %H:%M:%S',    # Militar con slashes, año de 2 dígitos: 01/09/25 14:30:00
+    '%d/%m/%Y %H:%M:%S',    # Militar con slashes, año de 4 dígitos: 01/09/2025 14:30:00
+))
+
+
+def _parse_fecha_carga(date_string):
+    """
+    Analiza una fecha de la carga masiva de incidencias, incluyendo formatos
+    con AM/PM en español. A diferencia de parse_flexible_date, si ningún
+    formato coincide lanza un ValueError, que registra la fila como fallida.
+    """
+    if not date_string:
+        return None
+
+    dt = _parsear_fecha(_normalizar_am_pm(date_string), _FORMATOS_FECHA_CARGA)
+    if dt is None:
+        raise ValueError(
+            f"El formato de fecha '{date_string}' no es válido o no está soportado.")
+    return dt # timezone.make_aware(dt) # Removed for USE_TZ=False
 
 
 
@@ -427,20 +700,23 @@ def carga_masiva_incidencia_view(request):
     # ... (bloque try/except para las cachés sin cambios) ...
     try:
         # --- Creación de Cachés de Búsqueda ---
-        aplicacion_cache = {normalize_text(
-            a.cod_aplicacion): a for a in Aplicacion.objects.all()}
-        estado_cache = {normalize_text(
-            e.desc_estado): e for e in Estado.objects.all()}
-        severidad_cache = {normalize_text(
-            s.desc_severidad): s for s in Severidad.objects.all()}
-        cluster_cache = {normalize_text(
-            c.desc_cluster): c for c in Cluster.objects.all()}
-        bloque_cache = {normalize_text(
-            b.desc_bloque): b for b in Bloque.objects.all()}
-        usuario_cache = {normalize_text(
-            u.usuario): u for u in Usuario.objects.all()}
-        grupo_resolutor_cache = {normalize_text(
-            g.desc_grupo_resol): g for g in GrupoResolutor.objects.all()}
+        # Para asignar las FK basta el ID: se leen pares (id, nombre) sin
+        # instanciar modelos y se indexan por ID y por nombre normalizado
+        aplicaciones = dict(Aplicacion.objects.values_list('id', 'cod_aplicacion'))
+        estados = dict(Estado.objects.values_list('id', 'desc_estado'))
+        severidades = dict(Severidad.objects.values_list('id', 'desc_severidad'))
+        clusters = dict(Cluster.objects.values_list('id', 'desc_cluster'))
+        bloques = dict(Bloque.objects.values_list('id', 'desc_bloque'))
+        usuarios = dict(Usuario.objects.values_list('id', 'usuario'))
+        grupos_resolutores = dict(GrupoResolutor.objects.values_list('id', 'desc_grupo_resol'))
+
+        aplicacion_cache = {normalize_text(nombre): pk for pk, nombre in aplicaciones.items()}
+        estado_cache = {normalize_text(nombre): pk for pk, nombre in estados.items()}
+        severidad_cache = {normalize_text(nombre): pk for pk, nombre in severidades.items()}
+        cluster_cache = {normalize_text(nombre): pk for pk, nombre in clusters.items()}
+        bloque_cache = {normalize_text(nombre): pk for pk, nombre in bloques.items()}
+        usuario_cache = {normalize_text(nombre): pk for pk, nombre in usuarios.items()}
+        grupo_resolutor_cache = {normalize_text(nombre): pk for pk, nombre in grupos_resolutores.items()}
 
         default_impacto = Impacto.objects.get(desc_impacto__iexact='interno')
         default_interfaz = Interfaz.objects.get(desc_interfaz__iexact='WEB')
@@ -450,7 +726,7 @@ def carga_masiva_incidencia_view(request):
         estado_cancelado = Estado.objects.get(
             desc_estado__iexact='Cancelado')
         estado_resuelto = Estado.objects.get(desc_estado__iexact='Resuelto')
-        estados_finales = [estado_cerrado, estado_cancelado]
+        ids_estados_finales = {estado_cerrado.id, estado_cancelado.id}
         # --- FIN DE LA MODIFICACIÓN ---
 
     except ObjectDoesNotExist as e:
@@ -471,19 +747,18 @@ def carga_masiva_incidencia_view(request):
         new_normal_count = 0
         updated_count = 0
         skipped_count = 0
+        # Cada lote se confirma por separado: si el archivo falla a mitad de
+        # camino, los lotes anteriores ya quedaron guardados y se informan
+        actualizadas_guardadas = 0
 
         try:
             # LÓGICA DE LECTURA SEGÚN TIPO DE ARCHIVO
             is_json = False
-            df = None
             all_rows_json = []
 
-            if file.name.endswith('.csv'):
-                df = pd.read_csv(file, keep_default_na=False, dtype=str)
-                df.fillna('', inplace=True)
-            elif file.name.endswith('.xlsx'):
-                df = pd.read_excel(file, keep_default_na=False, dtype=str)
-                df.fillna('', inplace=True)
+            if file.name.endswith('.csv') or file.name.endswith('.xlsx'):
+                # Se lee fila a fila, sin cargar el archivo completo en memoria
+                filas = _leer_filas_archivo(file)
             elif file.name.endswith('.json'):
                 is_json = True
                 # Leemos el contenido raw para intentar arreglarlo si es necesario
@@ -505,75 +780,62 @@ def carga_masiva_incidencia_view(request):
                     return redirect('gestion:carga_masiva_incidencia')
                 
                 logger.info(f"Leídos {len(all_rows_json)} registros JSON de incidencias.")
+                filas = enumerate(all_rows_json, 0)
 
             else:
                  messages.error(request, 'Formato no soportado. Use CSV, Excel o JSON.')
                  return redirect('gestion:carga_masiva_incidencia')
 
-            def parse_flexible_date(date_string):
-                """
-                Intenta analizar una cadena de fecha con múltiples formatos, incluyendo
-                formatos con AM/PM en español.
-                """
-                if not date_string:
-                    return None
-
-                # Normaliza los indicadores AM/PM para la directiva %p de Python
-                # (maneja 'a. m.', 'p. m.', 'a.m.', 'p.m.', etc.)
-                processed_string = date_string.lower().replace(
-                    'a. m.', 'am').replace('p. m.', 'pm')
-                processed_string = processed_string.replace(
-                    'a.m.', 'am').replace('p.m.', 'pm')
-
-                # Lista de formatos a intentar.
-                formats = [
-                    '%d-%m-%Y %H:%M:%S',      # Formato original: 25-12-2023 14:30:00
-                    '%d/%m/%y %I:%M:%S %p',  # AM/PM con año de 2 dígitos: 01/09/25 08:53:27 am
-                    '%d/%m/%Y %I:%M:%S %p',  # AM/PM con año de 4 dígitos: 01/09/2025 08:53:27 am
-                    '%d/%m/%y %H:%M:%S',    # Militar con slashes, año de 2 dígitos: 01/09/25 14:30:00
-                    '%d/%m/%Y %H:%M:%S',    # Militar con slashes, año de 4 dígitos: 01/09/2025 14:30:00
-                ]
-
-                for fmt in formats:
-                    try:
-                        dt = datetime.strptime(processed_string, fmt)
-                        return dt # timezone.make_aware(dt) # Removed for USE_TZ=False
-                    except ValueError:
-                        continue
-
-                # Si ningún formato coincide, lanza un error que será capturado por el try-except externo.
-                raise ValueError(
-                    f"El formato de fecha '{date_string}' no es válido o no está soportado.")
-
-            with transaction.atomic():
-                # Unificamos el iterador: Si es DF usamos iterrows, si es JSON usamos enumerate
-                iterator = df.iterrows() if not is_json else enumerate(all_rows_json, 0)
-
-                for index, row in iterator:
+            # El usuario se resuelve una vez: en el bucle solo se asigna
+            usuario_creador = request.user
+            # En MySQL la comparación de texto no distingue mayúsculas: se replica
+            # al indexar, para que coincida con la restricción única de 'incidencia'.
+            normalizar = str.lower if connection.vendor == 'mysql' else str
+            total_leidos = 0
+            for lote in lotes(filas, LOTE_CARGA_INCIDENCIAS):
+                total_leidos += len(lote)
+                # Un elemento JSON que no es un objeto se registra como fila
+                # fallida antes de las consultas del lote, que leen cada fila
+                filas_validas = []
+                for index, row in lote:
+                    if isinstance(row, dict):
+                        filas_validas.append((index, row))
+                    else:
+                        failed_rows.append({'line': index + 2, 'row_data': str(row), 'error': 'El registro no es un objeto JSON válido (diccionario).'})
+                lote = filas_validas
+                codigo_cierre_ids, codigo_cierre_por_app, codigo_cierre_por_texto = \
+                    _codigos_cierre_referenciados(lote)
+
+                # Incidencias del lote que ya existen, en una sola consulta
+                ids_lote = {_valor_fila(row, 'incidencia', 'incidencia_id') for _, row in lote}
+                ids_lote.discard('')
+                existentes = {
+                    normalizar(incidencia): obj for incidencia, obj in Incidencia.objects.only(
+                        'id', 'incidencia', 'estado', 'fecha_ultima_resolucion', 'usuario_asignado'
+                    ).in_bulk(ids_lote, field_name='incidencia').items()}
+                por_crear = []
+                por_actualizar = {}
+
+                for index, row in lote:
                     line_number = index + 2
                     
-                    # Normalización de acceso a datos (Row Pandas vs Dict JSON)
+                    # Acceso a datos: todas las filas son diccionarios (CSV/Excel o JSON)
                     def get_val(key, default=''):
-                        if is_json:
-                            # En JSON las claves son directas
-                            val = row.get(key)
-                            return str(val).strip() if val is not None else default
-                        else:
-                            # En Pandas usamos las columnas (mapeo previo requerido si nombres difieren)
-                            # Aquí asumimos nombres de columnas del CSV/Excel o adaptamos
-                            return str(row.get(key, default)).strip()
+                        val = row.get(key)
+                        return str(val).strip() if val is not None else default
 
                     try:
                         incidencia_id = get_val('incidencia')
                         if not incidencia_id: # Intento fallback por si la clave es diferente en JSON
                              incidencia_id = get_val('incidencia_id')
 
-                        if not incidencia_id or not incidencia_id.upper().startswith('INC'):
+                        # Solo se pasa a mayúsculas el prefijo, no el ID completo
+                        if not incidencia_id or incidencia_id[:3].upper() != 'INC':
                             continue
 
                         # ... (Toda la lógica de asignación de objetos) ...
-                        aplicacion_obj = None
-                        codigo_cierre_obj = None
+                        aplicacion_id = None
+                        codigo_cierre_id = None
                         
                         # Mapeo de campos flexibles (soportar ID o Texto)
                         
@@ -587,28 +849,28 @@ def carga_masiva_incidencia_view(request):
                         # Lógica de búsqueda APP
                         if app_val:
                             if app_val.isdigit(): # Búsqueda por ID directo
-                                aplicacion_obj = Aplicacion.objects.filter(id=int(app_val)).first()
+                                aplicacion_id = _id_existente(aplicaciones, app_val)
                             else: # Búsqueda por código texto
-                                aplicacion_obj = aplicacion_cache.get(normalize_text(app_val))
+                                aplicacion_id = aplicacion_cache.get(normalize_text(app_val))
                         
                         # Lógica de búsqueda Cod Cierre
                         if cc_val:
                             # Asumimos que si es dígito grande es ID, si no es código texto
                             if cc_val.isdigit():
-                                codigo_cierre_obj = CodigoCierre.objects.filter(id=int(cc_val)).first()
+                                codigo_cierre_id = _id_existente(codigo_cierre_ids, cc_val)
                             else:
-                                if aplicacion_obj:
-                                     codigo_cierre_obj = CodigoCierre.objects.filter(cod_cierre__iexact=cc_val, aplicacion=aplicacion_obj).first()
+                                if aplicacion_id:
+                                     codigo_cierre_id = codigo_cierre_por_app.get((cc_val.lower(), aplicacion_id))
                                 else:
-                                     codigo_cierre_obj = CodigoCierre.objects.filter(cod_cierre__iexact=cc_val).first()
+                                     codigo_cierre_id = codigo_cierre_por_texto.get(cc_val.lower())
 
                         # 3. Estado (id_estado en JSON)
                         estado_val = get_val('estado_id') or get_val('id_estado')
-                        estado_obj = None
+                        estado_id = None
                         if estado_val.isdigit():
-                             estado_obj = Estado.objects.filter(id=int(estado_val)).first()
+                             estado_id = _id_existente(estados, estado_val)
                         else:
-                             estado_obj = estado_cache.get(normalize_text(estado_val))
+                             estado_id = estado_cache.get(normalize_text(estado_val))
 
                         # 4. Severidad (id_severidad en JSON)
                         sev_val = get_val('severidad_id') or get_val('id_severidad') # Nota: Imagen dice 'id_criticidad', suele mapear a severidad en lógica negocio? O 'id_impacto'?
@@ -616,45 +878,39 @@ def carga_masiva_incidencia_view(request):
                         # Asumimos id_criticidad -> Severidad (común confusión) o Severidad es otro. 
                         # En el código original: severidad_obj = severidad_cache.get(normalize_text(row['severidad_id']))
                         # Vamos a mapear 'id_criticidad' a Severidad por ahora si no hay 'id_severidad'.
-                        severidad_obj = None
+                        severidad_id = None
                         if sev_val:
-                             if sev_val.isdigit(): severidad_obj = Severidad.objects.filter(id=int(sev_val)).first()
-                             else: severidad_obj = severidad_cache.get(normalize_text(sev_val))
+                             if sev_val.isdigit(): severidad_id = _id_existente(severidades, sev_val)
+                             else: severidad_id = severidad_cache.get(normalize_text(sev_val))
                         
                         # 5. Cluster (id_cluster)
                         cluster_val = get_val('cluster_id') or get_val('id_cluster')
-                        cluster_obj = None
-                        if cluster_val and cluster_val.isdigit(): cluster_obj = Cluster.objects.filter(id=int(cluster_val)).first()
-                        elif cluster_val: cluster_obj = cluster_cache.get(normalize_text(cluster_val))
+                        cluster_id = None
+                        if cluster_val and cluster_val.isdigit(): cluster_id = _id_existente(clusters, cluster_val)
+                        elif cluster_val: cluster_id = cluster_cache.get(normalize_text(cluster_val))
 
                         # 6. Bloque (id_bloque)
                         # 6. Bloque (Custom Mapping Logic)
-                        raw_bloque = get_val('bloque_id') or get_val('id_bloque')
+                        bloque_val = get_val('bloque_id') or get_val('id_bloque')
+                        raw_bloque = bloque_val
                         if not raw_bloque:
                             # Fallback a 'demanadas' (con typo en excel) si bloque_id está vacío
                             raw_bloque = get_val('demanadas') or get_val('demandas') or ''
                         
-                        mapa_bloques = {
-                            'INDRA_B3': 'BLOQUE 3',
-                            'INDRA': 'BLOQUE 4',
-                            'INDRA_A': 'BLOQUE 4',
-                            'INDRA_D': 'BLOQUE 4'
-                        }
+                        nombre_bloque_destino = MAPA_BLOQUES_CARGA.get(raw_bloque, raw_bloque) # Si no está en mapa, usa el valor original
                         
-                        nombre_bloque_destino = mapa_bloques.get(raw_bloque, raw_bloque) # Si no está en mapa, usa el valor original
-                        
-                        bloque_obj = None
+                        bloque_id = None
                         if nombre_bloque_destino:
                             # 1. Intenta por ID si es numérico
-                            if isinstance(nombre_bloque_destino, str) and nombre_bloque_destino.isdigit():
-                                bloque_obj = Bloque.objects.filter(id=int(nombre_bloque_destino)).first()
+                            if nombre_bloque_destino.isdigit():
+                                bloque_id = _id_existente(bloques, nombre_bloque_destino)
                             else:
                                 # 2. Intenta por nombre en caché
-                                bloque_obj = bloque_cache.get(normalize_text(nombre_bloque_destino))
+                                bloque_id = bloque_cache.get(normalize_text(nombre_bloque_destino))
                         
-                        if not bloque_obj:
+                        if not bloque_id:
                             # 3. Default: Sin bloque
-                            bloque_obj = bloque_cache.get(normalize_text('Sin bloque'))
+                            bloque_id = bloque_cache.get(normalize_text('Sin bloque'))
 
                         # ... Lógica grupo resolutor (Custom Mapping Logic)
                         # Regla 1: Si id_grupo_resolutor es explícitamente "INDRA N2", tiene prioridad absoluta.
@@ -666,33 +922,26 @@ def carga_masiva_incidencia_view(request):
                              nombre_grupo_destino = 'INDRA N2'
                         else:
                             # Regla 2: Revisar bloque_id primero, luego grupo_resolutor_id
-                            raw_gr = get_val('bloque_id') or get_val('id_bloque')
+                            raw_gr = bloque_val
                             if not raw_gr:
                                 raw_gr = val_gr_excel # Fallback a lo que viniera en GR
                             
-                            mapa_grupos = {
-                                'INDRA_B3': 'SWF_INDRA_3B',
-                                'INDRA': 'SWF_INDRA_G3',
-                                'INDRA_A': 'SWF_INDRA_G3',
-                                'INDRA_D': 'INDRA_D'
-                            }
-                            
-                            nombre_grupo_destino = mapa_grupos.get(raw_gr, raw_gr)
+                            nombre_grupo_destino = MAPA_GRUPOS_CARGA.get(raw_gr, raw_gr)
 
-                        grupo_resolutor_obj = None
+                        grupo_resolutor_id = None
                         if nombre_grupo_destino:
                             # 1. Intenta por ID
-                            if isinstance(nombre_grupo_destino, str) and nombre_grupo_destino.isdigit():
-                                grupo_resolutor_obj = GrupoResolutor.objects.filter(id=int(nombre_grupo_destino)).first()
+                            if nombre_grupo_destino.isdigit():
+                                grupo_resolutor_id = _id_existente(grupos_resolutores, nombre_grupo_destino)
                             else:
                                 # 2. Intenta por nombre
-                                grupo_resolutor_obj = grupo_resolutor_cache.get(normalize_text(nombre_grupo_destino))
+                                grupo_resolutor_id = grupo_resolutor_cache.get(normalize_text(nombre_grupo_destino))
 
                         # ... Lógica impacto, interfaz ...
                         
                         # Fechas
-                        fecha_apertura = parse_flexible_date(get_val('fecha_apertura'))
-                        fecha_resolucion = parse_flexible_date(get_val('fecha_ultima_resolucion'))
+                        fecha_apertura = _parse_fecha_carga(get_val('fecha_apertura'))
+                        fecha_resolucion = _parse_fecha_carga(get_val('fecha_ultima_resolucion'))
 
                         # Campos directos
                         desc = get_val('descripcion_incidencia')
@@ -703,15 +952,15 @@ def carga_masiva_incidencia_view(request):
                         solucion = get_val('solucion_final')
                         obs = get_val('observaciones')
                         demandas = get_val('demandas')
-                        workaround_raw = get_val('workaround') or get_val('workaround')
-                        workaround_val = 'Sí' if 'con wa' in workaround_raw.lower() or workaround_raw.lower() == 'si' else 'No'
+                        workaround_raw = get_val('workaround').lower()
+                        workaround_val = 'Sí' if 'con wa' in workaround_raw or workaround_raw == 'si' else 'No'
                         
                         # Usuario asignado (id_usuario_asignado ?)
                         # Imagen dice: "usuario_asignado": 7
                         ua_val = get_val('usuario_asignado_id') or get_val('usuario_asignado')
-                        usuario_asignado_obj = None
-                        if ua_val and ua_val.isdigit(): usuario_asignado_obj = Usuario.objects.filter(id=int(ua_val)).first()
-                        elif ua_val: usuario_asignado_obj = usuario_cache.get(normalize_text(ua_val))
+                        usuario_asignado_id = None
+                        if ua_val and ua_val.isdigit(): usuario_asignado_id = _id_existente(usuarios, ua_val)
+                        elif ua_val: usuario_asignado_id = usuario_cache.get(normalize_text(ua_val))
                         
                         # RE-MAPEO para consistencia con código original que usa variables
                         # Sobreescribimos las variables que el código original usaba abajo
@@ -722,40 +971,39 @@ def carga_masiva_incidencia_view(request):
                         interfaz_obj = default_interfaz # Default
 
                         # --- LÓGICA DE CREACIÓN O ACTUALIZACIÓN ---
-                        try:
-                            existing_incidence = Incidencia.objects.get(
-                                incidencia=incidencia_id)
-
+                        existing_incidence = existentes.get(normalizar(incidencia_id))
+                        if existing_incidence is not None:
                             # --- LÓGICA PARA INCIDENCIAS EXISTENTES ---
-                            if existing_incidence.estado in estados_finales:
+                            if existing_incidence.estado_id in ids_estados_finales:
                                 skipped_count += 1
                                 logger.info(
-                                    f"Línea {line_number}: INCIDENCIA OMITIDA {incidencia_id} (estado final).")
+                                    "Línea %s: INCIDENCIA OMITIDA %s (estado final).", line_number, incidencia_id)
                                 continue
 
-                            if existing_incidence.estado == estado_resuelto and estado_obj in estados_finales:
-                                old_state_desc = existing_incidence.estado.desc_estado
-                                existing_incidence.estado = estado_obj
+                            if existing_incidence.estado_id == estado_resuelto.id and estado_id in ids_estados_finales:
+                                old_state_desc = estados[existing_incidence.estado_id]
+                                existing_incidence.estado_id = estado_id
                                 if fecha_resolucion:
                                     existing_incidence.fecha_ultima_resolucion = fecha_resolucion
                                 # NUEVO: Actualizar usuario asignado si viene en el archivo
-                                if usuario_asignado_obj:
-                                    existing_incidence.usuario_asignado = usuario_asignado_obj
+                                if usuario_asignado_id:
+                                    existing_incidence.usuario_asignado_id = usuario_asignado_id
                                 
-                                existing_incidence.save(
-                                    update_fields=['estado', 'fecha_ultima_resolucion', 'usuario_asignado'])
+                                # Las creadas en este mismo lote aún no se guardaron: se insertan ya actualizadas
+                                if existing_incidence.pk is not None:
+                                    por_actualizar[normalizar(incidencia_id)] = existing_incidence
                                 updated_count += 1
                                 logger.info(
-                                    f"Línea {line_number}: INCIDENCIA ACTUALIZADA {incidencia_id} (ID: {existing_incidence.id}, Estado: '{old_state_desc}' -> '{estado_obj.desc_estado}').")
+                                    "Línea %s: INCIDENCIA ACTUALIZADA %s (ID: %s, Estado: '%s' -> '%s').",
+                                    line_number, incidencia_id, existing_incidence.id, old_state_desc, estados[estado_id])
                             else:
                                 skipped_count += 1
                                 logger.info(
-                                    f"Línea {line_number}: INCIDENCIA OMITIDA {incidencia_id} (No requiere actualización).")
+                                    "Línea %s: INCIDENCIA OMITIDA %s (No requiere actualización).", line_number, incidencia_id)
 
-                        except Incidencia.DoesNotExist:
+                        else:
                             # --- LÓGICA PARA NUEVAS INCIDENCIAS ---
-                            logger.info(f"Creando incidencia {incidencia_id} con usuario: {request.user} (ID: {request.user.id})")
-                            obj = Incidencia.objects.create(
+                            obj = Incidencia(
                                 incidencia=incidencia_id,
                                 descripcion_incidencia=desc,
                                 fecha_apertura=fecha_apertura,
@@ -768,32 +1016,56 @@ def carga_masiva_incidencia_view(request):
                                 observaciones=obs,
                                 demandas=demandas,
                                 workaround=workaround_val,
-                                aplicacion=aplicacion_obj,
-                                estado=estado_obj,
-                                severidad=severidad_obj,
-                                grupo_resolutor=grupo_resolutor_obj,
+                                aplicacion_id=aplicacion_id,
+                                estado_id=estado_id,
+                                severidad_id=severidad_id,
+                                grupo_resolutor_id=grupo_resolutor_id,
                                 interfaz=interfaz_obj,
                                 impacto=impacto_obj,
-                                cluster=cluster_obj,
-                                bloque=bloque_obj,
-                                codigo_cierre=codigo_cierre_obj,
-                                usuario_asignado=usuario_asignado_obj,
-                                usuario_creador=request.user,
+                                cluster_id=cluster_id,
+                                bloque_id=bloque_id,
+                                codigo_cierre_id=codigo_cierre_id,
+                                usuario_asignado_id=usuario_asignado_id,
+                                usuario_creador=usuario_creador,
                             )
-                            if is_indra_d_row:
-                                new_indra_d_count += 1
-                            else:
-                                new_normal_count += 1
-                            logger.info(
-                                f"Línea {line_number}: INCIDENCIA CREADA {incidencia_id} (ID: {obj.id}).")
+                            # Se inserta al cerrar el lote; si el archivo la repite, se trata como existente
+                            por_crear.append((line_number, row, obj))
+                            existentes[normalizar(incidencia_id)] = obj
 
                     except Exception as e:
+                        # Los ValueError son validaciones de la fila: el mensaje basta y
+                        # la traza solo se registra para los errores inesperados
                         logger.error(
-                            f"Error procesando fila {line_number} (Incidencia: {incidencia_id if 'incidencia_id' in locals() else 'Desconocida'}): {e}", exc_info=True)
-                        failed_rows.append({'line': line_number, 'row_data': 'JSON Data' if is_json else ', '.join(map(str, row.values)), 'error': str(e)})
+                            "Error procesando fila %s (Incidencia: %s): %s",
+                            line_number, incidencia_id if 'incidencia_id' in locals() else 'Desconocida', e,
+                            exc_info=not isinstance(e, ValueError))
+                        failed_rows.append({'line': line_number, 'row_data': 'JSON Data' if is_json else ', '.join(map(str, row.values())), 'error': str(e)})
+
+                # --- ESCRITURA DEL LOTE ---
+                # Solo la escritura va en una transacción, una por lote: la lectura
+                # y validación de las filas no mantienen bloqueos abiertos.
+                with transaction.atomic():
+                    creadas, fallidas = _crear_incidencias(por_crear)
+                    if por_actualizar:
+                        Incidencia.objects.bulk_update(
+                            por_actualizar.values(), ['estado', 'fecha_ultima_resolucion', 'usuario_asignado'],
+                            batch_size=LOTE_CARGA_INCIDENCIAS)
+                actualizadas_guardadas += len(por_actualizar)
+
+                for obj in creadas:
+                    if is_indra_d_row:
+                        new_indra_d_count += 1
+                    else:
+                        new_normal_count += 1
+                    logger.info("INCIDENCIA CREADA %s.", obj.incidencia)
+                for line_number, row, e in fallidas:
+                    logger.error("Error procesando fila %s (Incidencia: %s): %s", line_number, row.get('incidencia'), e)
+                    failed_rows.append({'line': line_number, 'row_data': 'JSON Data' if is_json else ', '.join(map(str, row.values())), 'error': str(e)})
 
             # <<<--- PASO 4: AJUSTAR RESUMEN FINAL ---<<<
             total_creadas = new_indra_d_count + new_normal_count
+            if total_creadas:
+                cache.delete(TOTAL_INCIDENCIAS_CACHE_KEY)
             
             # Preparar string con líneas fallidas
             failed_lines_str = ""
@@ -803,7 +1075,7 @@ def carga_masiva_incidencia_view(request):
 
             logger.info(
                 f"Resumen Carga Masiva Inicial (Usuario: {request.user}) - "
-                f"Total Leídos: {len(df)} | "
+                f"Total Leídos: {total_leidos} | "
                 f"Creados: {total_creadas} (INDRA_D: {new_indra_d_count}, Normales: {new_normal_count}) | "
                 f"Actualizados: {updated_count} | "
                 f"Omitidos: {skipped_count} | "
@@ -815,7 +1087,7 @@ def carga_masiva_incidencia_view(request):
                 for item in failed_rows:
                     incidencia_id_error = item.get('row_data', 'N/A').split(',')[0]
                     # Solo logueamos si es un error complejo, la línea ya está en el resumen
-                    logger.error(f"Detalle Error Línea {item['line']} ({incidencia_id_error}): {item['error']}")
+                    logger.error("Detalle Error Línea %s (%s): %s", item['line'], incidencia_id_error, item['error'])
 
             if total_creadas > 0:
                 messages.success(
@@ -835,13 +1107,75 @@ def carga_masiva_incidencia_view(request):
         except Exception as e:
             logger.error(
                 f"Error crítico al leer o procesar el archivo '{file.name}': {e}", exc_info=True)
-            messages.error(
-                request, f'Ocurrió un error al leer o procesar el archivo: {e}')
+            total_creadas = new_indra_d_count + new_normal_count
+            mensaje = f'Ocurrió un error al leer o procesar el archivo: {e}'
+            if total_creadas or actualizadas_guardadas:
+                if total_creadas:
+                    cache.delete(TOTAL_INCIDENCIAS_CACHE_KEY)
+                logger.warning(
+                    "Carga masiva interrumpida (Usuario: %s): ya se guardaron %s creadas y %s actualizadas.",
+                    request.user, total_creadas, actualizadas_guardadas)
+                mensaje += (
+                    f'. Las filas anteriores al error ya fueron guardadas: {total_creadas} '
+                    f'incidencias creadas y {actualizadas_guardadas} actualizadas.')
+            messages.error(request, mensaje)
             return redirect('gestion:carga_masiva_incidencia')
 
     return render(request, 'gestion/carga_masiva_incidencia.html')
 
 
+# Columnas del reporte de incidencias en Excel
+COLUMNAS_REPORTE_INCIDENCIAS = (
+    'ID de la Incidencia', 'Criticidad aplicativo', 'severidad incidencia', 'Grupo resolutor',
+    'Aplicativo', 'Fecha de Resolucion', 'mes', 'cod_cierre', 'Descripción Cierre', 'Bloque',
+)
+
+# Nombres de los meses para la columna 'mes', indexados por número de mes
+MESES_ES = (
+    '', 'enero', 'febrero', 'marzo', 'abril', 'mayo', 'junio',
+    'julio', 'agosto', 'septiembre', 'octubre', 'noviembre', 'diciembre',
+)
+
+# Estilo del encabezado (el mismo que aplicaba pandas con to_excel)
+_BORDE_FINO = Side(style='thin')
+ESTILO_ENCABEZADO_REPORTE = {
+    'font': Font(bold=True),
+    'border': Border(left=_BORDE_FINO, right=_BORDE_FINO, top=_BORDE_FINO, bottom=_BORDE_FINO),
+    'alignment': Alignment(horizontal='center', vertical='top'),
+}
+
+
+# Campo de texto (o None si el valor no sale de un campo) de cada columna del reporte
+CAMPOS_REPORTE_INCIDENCIAS = (
+    'incidencia', 'aplicacion__criticidad__desc_criticidad', 'severidad__desc_severidad',
+    'grupo_resolutor__desc_grupo_resol', 'aplicacion__nombre_aplicacion', None, None,
+    'codigo_cierre__cod_cierre', 'codigo_cierre__desc_cod_cierre', 'bloque__desc_bloque',
+)
+
+
+def _anchos_reporte_incidencias(incidencias_qs):
+    """
+    Calcula con una consulta de agregación el ancho de cada columna del reporte:
+    el texto más largo entre el encabezado y los valores. Así las filas se pueden
+    escribir a medida que se leen, ya que en modo write_only los anchos deben
+    definirse antes de la primera fila. 'N/A' y la fecha ('dd-mm-aaaa hh:mm')
+    nunca superan a sus encabezados.
+    """
+    agregados = {
+        f'c{i}': Max(Length(campo)) for i, campo in enumerate(CAMPOS_REPORTE_INCIDENCIAS) if campo
+    }
+    # Columna 'mes' (índice 6): el nombre más largo entre los meses presentes
+    agregados['c6'] = Max(Case(
+        *[When(fecha_ultima_resolucion__month=numero, then=Value(len(nombre))) for numero, nombre in enumerate(MESES_ES) if nombre],
+        default=Value(0),
+    ))
+    maximos = incidencias_qs.order_by().aggregate(**agregados)
+    return [
+        max(len(columna), maximos.get(f'c{i}') or 0)
+        for i, columna in enumerate(COLUMNAS_REPORTE_INCIDENCIAS)
+    ]
+
+
 # VISTA NUEVA PARA EXPORTAR EL REPORTE EN FORMATO XLSX
 @login_required
 @no_cache
@@ -853,11 +1187,8 @@ def exportar_incidencias_reporte_view(request):
     logger.info(
         f"Usuario '{request.user}' ha solicitado un reporte de incidencias en Excel.")
 
-    # 1. Queryset base optimizado (igual que en incidencias_view)
-    incidencias_qs = Incidencia.objects.select_related(
-        'aplicacion', 'estado', 'severidad', 'impacto', 'bloque',
-        'codigo_cierre', 'grupo_resolutor'
-    ).all()
+    # 1. Queryset base (las relaciones se leen luego con values_list)
+    incidencias_qs = Incidencia.objects.all()
 
     # 2. Replicar la lógica de filtrado de incidencias_view
     # Esto es crucial para que el reporte coincida con la tabla visible
@@ -894,54 +1225,58 @@ def exportar_incidencias_reporte_view(request):
         except (ValueError, TypeError):
             pass
 
-    # 3. Preparar los datos para el DataFrame de Pandas
-    meses_es = {
-        1: 'enero', 2: 'febrero', 3: 'marzo', 4: 'abril', 5: 'mayo', 6: 'junio',
-        7: 'julio', 8: 'agosto', 9: 'septiembre', 10: 'octubre', 11: 'noviembre', 12: 'diciembre'
-    }
-
-    data_para_excel = []
-    for inc in incidencias_qs:
+    # 3. Crear el archivo Excel en memoria. En modo write_only openpyxl escribe
+    # las filas directamente, sin mantener una celda por valor.
+    libro = Workbook(write_only=True)
+    hoja = libro.create_sheet('Reporte Incidencias')
+    # Auto-ajustar el ancho de las columnas (debe definirse antes de escribir filas)
+    for col_idx, ancho in enumerate(_anchos_reporte_incidencias(incidencias_qs), start=1):
+        hoja.column_dimensions[get_column_letter(col_idx)].width = ancho + 2
+
+    encabezados = []
+    for columna in COLUMNAS_REPORTE_INCIDENCIAS:
+        celda = WriteOnlyCell(hoja, value=columna)
+        celda.font = ESTILO_ENCABEZADO_REPORTE['font']
+        celda.border = ESTILO_ENCABEZADO_REPORTE['border']
+        celda.alignment = ESTILO_ENCABEZADO_REPORTE['alignment']
+        encabezados.append(celda)
+    hoja.append(encabezados)
+
+    # values_list trae los textos de las relaciones en la misma consulta, como
+    # tuplas y sin instanciar modelos; iterator() la recorre por bloques y cada
+    # fila se escribe apenas se arma. Un NULL indica que la relación no existe.
+    filas = incidencias_qs.values_list(
+        'incidencia', 'aplicacion__criticidad__desc_criticidad', 'severidad__desc_severidad',
+        'grupo_resolutor__desc_grupo_resol', 'aplicacion__nombre_aplicacion', 'fecha_ultima_resolucion',
+        'codigo_cierre__cod_cierre', 'codigo_cierre__desc_cod_cierre', 'bloque__desc_bloque',
+    )
+    for (incidencia, criticidad, severidad, grupo_resolutor, aplicacion, fecha_resolucion,
+         cod_cierre, desc_cod_cierre, bloque) in filas.iterator(chunk_size=2000):
         mes_resolucion = ""
         fecha_resolucion_str = ""
-        if inc.fecha_ultima_resolucion:
-            # Hacemos la fecha consciente a la zona horaria local para extraer el mes correcto
-            fecha_local = inc.fecha_ultima_resolucion # timezone.localtime(inc.fecha_ultima_resolucion) # Removed for USE_TZ=False
-            mes_resolucion = meses_es.get(fecha_local.month, '')
-            fecha_resolucion_str = fecha_local.strftime('%d-%m-%Y %H:%M')
-
-        data_para_excel.append({
-            'ID de la Incidencia': inc.incidencia,
-            'Criticidad aplicativo': inc.aplicacion.criticidad.desc_criticidad if inc.aplicacion and inc.aplicacion.criticidad else 'N/A',
-            'severidad incidencia': inc.severidad.desc_severidad if inc.severidad else 'N/A',
-            'Grupo resolutor': inc.grupo_resolutor.desc_grupo_resol if inc.grupo_resolutor else 'N/A',
-            'Aplicativo': inc.aplicacion.nombre_aplicacion if inc.aplicacion else 'N/A',
-            'Fecha de Resolucion': fecha_resolucion_str,
-            'mes': mes_resolucion,
-            'cod_cierre': inc.codigo_cierre.cod_cierre if inc.codigo_cierre else 'N/A',
-            'Descripción Cierre': inc.codigo_cierre.desc_cod_cierre if inc.codigo_cierre else 'N/A',
-            'Bloque': inc.bloque.desc_bloque if inc.bloque else 'N/A'
-        })
-
-    # 4. Crear el archivo Excel en memoria usando Pandas
-    df = pd.DataFrame(data_para_excel)
-    output = io.BytesIO()
-
-    # Escribir el DataFrame al buffer de BytesIO como un archivo Excel
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        df.to_excel(writer, index=False, sheet_name='Reporte Incidencias')
-        worksheet = writer.sheets['Reporte Incidencias']
-        # Opcional: Auto-ajustar el ancho de las columnas
-        for column in df:
-            column_length = max(df[column].astype(
-                str).map(len).max(), len(column))
-            col_idx = df.columns.get_loc(column)
-            worksheet.column_dimensions[get_column_letter(
-                col_idx + 1)].width = column_length + 2
+        if fecha_resolucion:
+            # USE_TZ=False: la fecha ya está en hora local
+            mes_resolucion = MESES_ES[fecha_resolucion.month]
+            fecha_resolucion_str = fecha_resolucion.strftime('%d-%m-%Y %H:%M')
+
+        hoja.append((
+            incidencia,
+            'N/A' if criticidad is None else criticidad,
+            'N/A' if severidad is None else severidad,
+            'N/A' if grupo_resolutor is None else grupo_resolutor,
+            'N/A' if aplicacion is None else aplicacion,
+            fecha_resolucion_str,
+            mes_resolucion,
+            'N/A' if cod_cierre is None else cod_cierre,
+            'N/A' if desc_cod_cierre is None else desc_cod_cierre,
+            'N/A' if bloque is None else bloque,
+        ))
 
+    output = io.BytesIO()
+    libro.save(output)
     output.seek(0)  # Mover el cursor al inicio del stream
 
-    # 5. Crear la respuesta HTTP para descargar el archivo
+    # 4. Crear la respuesta HTTP para descargar el archivo
     filename = f"Reporte_Incidencias_{datetime.now().strftime('%Y-%m-%d')}.xlsx"
     response = HttpResponse(
         output,
@@ -955,6 +1290,10 @@ def exportar_incidencias_reporte_view(request):
     return response
 
 
+# Caracteres de control, excepto tabulación (\t), nueva línea (\n) y retorno de carro (\r)
+_CARACTERES_CONTROL_RE = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x9f]')
+
+
 def _clean_control_chars(text):
     """
     Función auxiliar para limpiar una cadena de texto de caracteres de control invisibles
@@ -962,8 +1301,71 @@ def _clean_control_chars(text):
     """
     if not isinstance(text, str):
         return text
-    # Elimina caracteres de control excepto tabulación (\t), nueva línea (\n) y retorno de carro (\r)
-    return re.sub(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x9f]', '', text)
+    return _CARACTERES_CONTROL_RE.sub('', text)
+
+
+# Caracteres que pueden seguir a un elemento completo del arreglo JSON
+_FIN_ELEMENTO_JSON = frozenset(' \t\r\n,]')
+
+
+def _leer_registros_json(file, tamano_bloque=64 * 1024):
+    """
+    Genera uno a uno los elementos del arreglo JSON `[...]` de un archivo subido,
+    leyéndolo por bloques. Los caracteres de control se limpian en cada bloque,
+    así nunca se tiene en memoria el texto completo ni su copia limpia.
+    """
+    lector = io.TextIOWrapper(file, encoding='utf-8', errors='replace')
+    decoder = json.JSONDecoder()
+    buffer, pos, fin = '', 0, False
+
+    def leer_bloque():
+        """Descarta lo ya consumido del buffer y le agrega el siguiente bloque limpio."""
+        nonlocal buffer, pos, fin
+        bloque = lector.read(tamano_bloque)
+        fin = not bloque
+        buffer, pos = buffer[pos:] + _clean_control_chars(bloque), 0
+
+    def siguiente_caracter():
+        """Salta los espacios y devuelve el próximo carácter ('' al final del archivo)."""
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos].isspace():
+                pos += 1
+            if pos < len(buffer) or fin:
+                return buffer[pos:pos + 1]
+            leer_bloque()
+
+    if siguiente_caracter() != '[':
+        raise ValueError(
+            "El formato JSON es incorrecto. Se esperaba una lista de incidencias `[...]`.")
+    pos += 1
+    if siguiente_caracter() == ']':
+        pos += 1
+    else:
+        while True:
+            siguiente_caracter()
+            # Un valor solo se da por completo si lo sigue un separador ya leído
+            # (un número cortado por el bloque podría continuar en el siguiente)
+            while True:
+                try:
+                    elemento, fin_elemento = decoder.raw_decode(buffer, pos)
+                    if fin or buffer[fin_elemento:fin_elemento + 1] in _FIN_ELEMENTO_JSON:
+                        break
+                except json.JSONDecodeError:
+                    if fin:
+                        raise
+                leer_bloque()
+            pos = fin_elemento
+            yield elemento
+
+            separador = siguiente_caracter()
+            pos += 1
+            if separador == ']':
+                break
+            if separador != ',':
+                raise json.JSONDecodeError("Se esperaba ',' o ']'", buffer, pos - 1)
+    if siguiente_caracter():
+        raise json.JSONDecodeError("Datos extra", buffer, pos)
 
 
 @login_required
@@ -984,188 +1386,207 @@ def carga_masiva_inicial_view(request):
             request, 'El archivo debe ser un JSON válido con extensión .json')
         return redirect('gestion:carga_masiva_inicial')
 
+    errors, created_count, skipped_count, total_leidos = [], 0, 0, 0
     try:
         # --- 1. Precarga de Catálogos en Caché para Optimización ---
         logger.info("Precargando catálogos en memoria para validación...")
-        aplicacion_cache = {str(a.id): a for a in Aplicacion.objects.all()}
-        estado_cache = {str(e.id): e for e in Estado.objects.all()}
-        impacto_cache = {str(i.id): i for i in Impacto.objects.all()}
-        bloque_cache = {str(b.id): b for b in Bloque.objects.all()}
-        grupo_resolutor_cache = {
-            str(g.id): g for g in GrupoResolutor.objects.all()}
-        interfaz_cache = {str(i.id): i for i in Interfaz.objects.all()}
-        cluster_cache = {str(c.id): c for c in Cluster.objects.all()}
-        usuario_name_cache = {unidecode(str(u.nombre or '')).lower().strip(): u for u in Usuario.objects.all()}
-        usuario_id_cache = {str(u.id): u for u in Usuario.objects.all()}
-        codigo_cierre_cache = {(cc.cod_cierre, cc.aplicacion_id)
-                                : cc for cc in CodigoCierre.objects.select_related('aplicacion')}
-        severidad_cache = {str(s.id): s for s in Severidad.objects.all()}
+        # Solo se cargan IDs: las incidencias se crean asignando las claves foráneas (*_id)
+        aplicacion_cache = _ids_por_texto(Aplicacion)
+        estado_cache = _ids_por_texto(Estado)
+        impacto_cache = _ids_por_texto(Impacto)
+        bloque_cache = _ids_por_texto(Bloque)
+        grupo_resolutor_cache = _ids_por_texto(GrupoResolutor)
+        interfaz_cache = _ids_por_texto(Interfaz)
+        cluster_cache = _ids_por_texto(Cluster)
+        # Una sola consulta de usuarios para ambos índices (por nombre y por id)
+        usuarios = Usuario.objects.values_list('id', 'nombre')
+        usuario_name_cache, usuario_id_cache = {}, {}
+        for pk, nombre in usuarios:
+            usuario_name_cache[normalize_text(nombre)] = pk
+            usuario_id_cache[str(pk)] = pk
+        # Códigos de cierre indexados por código y, dentro de cada uno, por aplicación
+        codigo_cierre_cache = {}
+        for pk, cod_cierre, app_id in CodigoCierre.objects.values_list('id', 'cod_cierre', 'aplicacion_id'):
+            codigo_cierre_cache.setdefault(cod_cierre, {})[app_id] = pk
+        severidad_cache = _ids_por_texto(Severidad)
         logger.info("Cachés creadas con éxito.")
 
         # --- 2. Lectura y Limpieza del Archivo JSON ---
-        decoded_file = file.read().decode('utf-8', errors='replace')
-        cleaned_text = _clean_control_chars(decoded_file)
-        all_rows_data = json.loads(cleaned_text)
-
-        if not isinstance(all_rows_data, list):
-            raise ValueError(
-                "El formato JSON es incorrecto. Se esperaba una lista de incidencias `[...]`.")
+        # Se recorre en streaming: los registros se leen a medida que se procesan
+        registros = _leer_registros_json(file)
+        logger.info("Procesando el archivo JSON por lotes...")
+
+        # --- 3. Procesamiento de las Incidencias por Lotes ---
+        usuario_creador = request.user
+        # En MySQL la comparación de texto no distingue mayúsculas: se replica
+        # al indexar, para que coincida con la restricción única de 'incidencia'.
+        normalizar = str.lower if connection.vendor == 'mysql' else str
+        # Cada lote se valida en memoria y se inserta con un único bulk_create.
+        for lote in lotes(enumerate(registros, start=1), LOTE_CARGA_INCIDENCIAS):
+            total_leidos += len(lote)
+            # Una sola consulta por lote para saber cuáles ya existen
+            existentes = {normalizar(incidencia) for incidencia in Incidencia.objects.filter(incidencia__in=[
+                str(row_data['incidencia']) for _, row_data in lote if row_data.get('incidencia')
+            ]).values_list('incidencia', flat=True)}
+            por_crear = []
+            for i, row_data in lote:
+                incidencia_id = row_data.get('incidencia')
+                try:
+                    if not incidencia_id:
+                        raise ValueError(
+                            'El atributo "incidencia" (ID de la incidencia) es obligatorio.')
 
-        logger.info(
-            f"Archivo JSON parseado. Se encontraron {len(all_rows_data)} registros para procesar.")
-        errors, created_count, skipped_count = [], 0, 0
+                    if normalizar(str(incidencia_id)) in existentes:
+                        skipped_count += 1
+                        logger.info("Línea %s: INCIDENCIA OMITIDA %s (Ya existe).", i, incidencia_id)
+                        continue
 
-        # --- 3. Procesamiento de cada Incidencia ---
-        for i, row_data in enumerate(all_rows_data, start=1):
-            incidencia_id = row_data.get('incidencia')
-            try:
-                if not incidencia_id:
-                    raise ValueError(
-                        'El atributo "incidencia" (ID de la incidencia) es obligatorio.')
-
-                if Incidencia.objects.filter(incidencia=incidencia_id).exists():
-                    skipped_count += 1
-                    logger.info(
-                        f"Línea {i}: INCIDENCIA OMITIDA {incidencia_id} (Ya existe).")
-                    continue
-
-                # --- Validación explícita de campos obligatorios contra caché ---
-                # --- Validación explícita de campos obligatorios contra caché ---
-                id_aplicacion = row_data.get('id_aplicacion')
-                aplicacion_obj = None
+                    # --- Validación explícita de campos obligatorios contra caché ---
+                    # --- Validación explícita de campos obligatorios contra caché ---
+                    id_aplicacion = row_data.get('id_aplicacion')
+                    aplicacion_id = None
                 
-                # Si viene un ID de aplicación, verificamos que exista. Si es null/None, se permite null.
-                if id_aplicacion is not None and str(id_aplicacion).lower() != 'null' and str(id_aplicacion).strip() != '':
-                     aplicacion_obj = aplicacion_cache.get(str(id_aplicacion))
-                     if not aplicacion_obj:
-                         # Opción: O lanzar error O dejarlo en None.
-                         # Dado que el usuario pidió cargar "de igual forma", si el ID no existe podríamos
-                         # forzar error O asumir None. Lo estándar es error si el ID venía pero no existe.
-                         # Pero si el ID venía como null, ya lo manejamos.
-                         pass 
-                         # raise ValueError(f"ID de Aplicación no encontrado en la BD: '{id_aplicacion}'") 
-                         # DECISIÓN: Si traía un ID y no existe, mejor avisar.
-                         # Pero el error del usuario era "ID de Aplicación no encontrado en la BD: 'None'".
-                         # Eso significa que row_data.get devolvió None, y lo convertimos a string 'None'.
-                         
-                # Corrección específica: si id_aplicacion era None, no entramos al if, y aplicacion_obj queda None.
-                # El error ocurría porque id_aplicacion era None, str(None) -> 'None', buscaba 'None' y fallaba.
-                # Con la condición `if id_aplicacion is not None ...` solucionamos eso.
-
-                id_estado = row_data.get('id_estado')
-                estado_obj = estado_cache.get(str(id_estado))
-                if not estado_obj:
-                    raise ValueError(
-                        f"ID de Estado no encontrado en la BD: '{id_estado}'")
-
-                # --- ### INICIO DE LA LÓGICA MODIFICADA ### ---
-                # Obtiene el valor original de 'id_impacto'.
-                id_impacto_original = row_data.get('id_impacto')
-
-                # Si el valor es nulo o una cadena vacía, se le asigna '1' por defecto.
-                if id_impacto_original is None or str(id_impacto_original).strip() == '':
-                    id_impacto_final = '1'
-                else:
-                    id_impacto_final = str(id_impacto_original)
-
-                # Busca el objeto Impacto usando el ID final (el original o el por defecto).
-                impacto_obj = impacto_cache.get(id_impacto_final)
-                if not impacto_obj:
-                    # Si aún no lo encuentra (ej: el ID '1' no existe), lanza un error detallado.
-                    raise ValueError(
-                        f"ID de Impacto no encontrado en la BD: '{id_impacto_final}' (Valor Original: '{id_impacto_original}')")
-                # --- ### FIN DE LA LÓGICA MODIFICADA ### ---
-
-                id_criticidad = row_data.get('id_criticidad')
-                severidad_obj = severidad_cache.get(str(id_criticidad))
-                if not severidad_obj:
-                    raise ValueError(
-                        f"ID de Criticidad/Severidad no encontrado en la BD: '{id_criticidad}'")
-
-                # --- Búsqueda de objetos opcionales en caché ---
-                grupo_resolutor_obj = grupo_resolutor_cache.get(
-                    str(row_data.get('id_grupo_resolutor')))
-                interfaz_obj = interfaz_cache.get(
-                    str(row_data.get('id_interfaz')))
-                cluster_obj = cluster_cache.get(
-                    str(row_data.get('id_cluster')))
-                bloque_obj = bloque_cache.get(str(row_data.get('id_bloque')))
-
-                usuario_asignado_obj = None
-                usuario_asignado_obj = None
-                if val_ua := row_data.get('usuario_asignado'):
-                    # Intento 1: Buscar por ID (si es número)
-                    if str(val_ua).isdigit():
-                        usuario_asignado_obj = usuario_id_cache.get(str(val_ua))
-                    
-                    # Intento 2: Buscar por nombre (normalized)
-                    if not usuario_asignado_obj:
-                         usuario_asignado_obj = usuario_name_cache.get(
-                            unidecode(str(val_ua)).lower().strip())
-
-                codigo_cierre_obj = None
-                # Validamos cod_cierre similarmente (ya era opcional pero reforzamos)
-                cod_cierre_val = row_data.get('cod_cierre')
-                if cod_cierre_val is not None and str(cod_cierre_val).lower() != 'null' and str(cod_cierre_val).strip() != '':
-                     if aplicacion_obj:
-                         # Corrección Robusta: Casting a str + strip explícito
-                         c_val_str = str(cod_cierre_val).strip()
-                         codigo_cierre_obj = codigo_cierre_cache.get((c_val_str, aplicacion_obj.id))
+                    # Si viene un ID de aplicación, verificamos que exista. Si es null/None, se permite null.
+                    if id_aplicacion is not None and str(id_aplicacion).lower() != 'null' and str(id_aplicacion).strip() != '':
+                         aplicacion_id = aplicacion_cache.get(str(id_aplicacion))
+                         if not aplicacion_id:
+                             # Opción: O lanzar error O dejarlo en None.
+                             # Dado que el usuario pidió cargar "de igual forma", si el ID no existe podríamos
+                             # forzar error O asumir None. Lo estándar es error si el ID venía pero no existe.
+                             # Pero si el ID venía como null, ya lo manejamos.
+                             pass 
+                             # raise ValueError(f"ID de Aplicación no encontrado en la BD: '{id_aplicacion}'") 
+                             # DECISIÓN: Si traía un ID y no existe, mejor avisar.
+                             # Pero el error del usuario era "ID de Aplicación no encontrado en la BD: 'None'".
+                             # Eso significa que row_data.get devolvió None, y lo convertimos a string 'None'.
                          
-                         if not codigo_cierre_obj:
-                             # Debug log para entender por qué falla
-                             logger.warning(
-                                 f"DEBUG CIERRE: No se encontró código '{c_val_str}' para App ID {aplicacion_obj.id}. "
-                                 f"Clave buscada: { (c_val_str, aplicacion_obj.id) }."
-                             )
-                     # Nota: Si no hay app, difícil encontrar cod cierre por tupla (cod, app_id).
-                     # Podríamos buscar solo por cod_cierre si fuera único, pero el cache usa tupla.
-                     # Si aplicacion es None, codigo_cierre será None.
-
-                # --- Manejo de Fechas ---
-                fecha_apertura_obj = parse_flexible_date(row_data.get('fecha_apertura'))
-                fecha_resolucion_obj = parse_flexible_date(row_data.get('fecha_ultima_resolucion'))
-
-                # --- Lógica de Workaround ---
-                raw_workaround = row_data.get('workaround')
-                if raw_workaround and 'con wa' in str(raw_workaround).lower():
-                    workaround_val = 'Sí'
-                elif raw_workaround and 'sin wa' in str(raw_workaround).lower():
-                    workaround_val = 'No'
-                else:
-                    # Si es null o cualquier otro valor, aplica el default actual 'No'
-                    workaround_val = 'No'
-
-                # --- Creación del Objeto Incidencia en la Base de Datos ---
-                obj = Incidencia.objects.create(
-                    incidencia=incidencia_id, aplicacion=aplicacion_obj, estado=estado_obj, impacto=impacto_obj, severidad=severidad_obj,
-                    descripcion_incidencia=row_data.get(
-                        'descripcion_incidencia') or '',
-                    fecha_apertura=fecha_apertura_obj, fecha_ultima_resolucion=fecha_resolucion_obj,
-                    grupo_resolutor=grupo_resolutor_obj, interfaz=interfaz_obj, cluster=cluster_obj,
-                    bloque=bloque_obj, usuario_asignado=usuario_asignado_obj, codigo_cierre=codigo_cierre_obj,
-                    causa=row_data.get('causa') or '', 
-                    bitacora=row_data.get('bitacora') or '',
-                    tec_analisis=row_data.get('tec_analisis') or '', 
-                    correccion=row_data.get('correccion') or '',
-                    solucion_final=row_data.get('solucion_final') or '', 
-                    observaciones=row_data.get('observaciones') or '',
-                    demandas=row_data.get('demandas') or '',
-                    workaround=workaround_val,
-                    usuario_creador=request.user
-                )
-                created_count += 1
-                logger.info(
-                    f"Línea {i}: INCIDENCIA CREADA {incidencia_id} (ID: {obj.id}).")
-
-            except Exception as e:
-                error_msg = str(e)
+                    # Corrección específica: si id_aplicacion era None, no entramos al if, y aplicacion_id queda None.
+                    # El error ocurría porque id_aplicacion era None, str(None) -> 'None', buscaba 'None' y fallaba.
+                    # Con la condición `if id_aplicacion is not None ...` solucionamos eso.
+
+                    id_estado = row_data.get('id_estado')
+                    estado_id = estado_cache.get(str(id_estado))
+                    if not estado_id:
+                        raise ValueError(
+                            f"ID de Estado no encontrado en la BD: '{id_estado}'")
+
+                    # --- ### INICIO DE LA LÓGICA MODIFICADA ### ---
+                    # Obtiene el valor original de 'id_impacto'.
+                    id_impacto_original = row_data.get('id_impacto')
+
+                    # Si el valor es nulo o una cadena vacía, se le asigna '1' por defecto.
+                    if id_impacto_original is None or str(id_impacto_original).strip() == '':
+                        id_impacto_final = '1'
+                    else:
+                        id_impacto_final = str(id_impacto_original)
+
+                    # Busca el objeto Impacto usando el ID final (el original o el por defecto).
+                    impacto_id = impacto_cache.get(id_impacto_final)
+                    if not impacto_id:
+                        # Si aún no lo encuentra (ej: el ID '1' no existe), lanza un error detallado.
+                        raise ValueError(
+                            f"ID de Impacto no encontrado en la BD: '{id_impacto_final}' (Valor Original: '{id_impacto_original}')")
+                    # --- ### FIN DE LA LÓGICA MODIFICADA ### ---
+
+                    id_criticidad = row_data.get('id_criticidad')
+                    severidad_id = severidad_cache.get(str(id_criticidad))
+                    if not severidad_id:
+                        raise ValueError(
+                            f"ID de Criticidad/Severidad no encontrado en la BD: '{id_criticidad}'")
+
+                    # --- Búsqueda de objetos opcionales en caché ---
+                    grupo_resolutor_id = grupo_resolutor_cache.get(
+                        str(row_data.get('id_grupo_resolutor')))
+                    interfaz_id = interfaz_cache.get(
+                        str(row_data.get('id_interfaz')))
+                    cluster_id = cluster_cache.get(
+                        str(row_data.get('id_cluster')))
+                    bloque_id = bloque_cache.get(str(row_data.get('id_bloque')))
+
+                    usuario_asignado_id = None
+                    if val_ua := row_data.get('usuario_asignado'):
+                        val_ua = str(val_ua)
+                        # Intento 1: por ID (las claves del caché son los IDs como texto,
+                        # así que un valor no numérico simplemente no coincide)
+                        # Intento 2: por nombre (normalized)
+                        usuario_asignado_id = usuario_id_cache.get(val_ua) or usuario_name_cache.get(
+                            normalize_text(val_ua))
+
+                    codigo_cierre_id = None
+                    # Validamos cod_cierre similarmente (ya era opcional pero reforzamos)
+                    cod_cierre_val = row_data.get('cod_cierre')
+                    if cod_cierre_val is not None and str(cod_cierre_val).lower() != 'null' and str(cod_cierre_val).strip() != '':
+                        # Corrección Robusta: Casting a str + strip explícito
+                        c_val_str = str(cod_cierre_val).strip()
+                        codigos_por_app = codigo_cierre_cache.get(c_val_str, {})
+                        if aplicacion_id:
+                            codigo_cierre_id = codigos_por_app.get(aplicacion_id)
+
+                            if not codigo_cierre_id:
+                                # Debug log para entender por qué falla
+                                logger.warning(
+                                    "DEBUG CIERRE: No se encontró código '%s' para App ID %s. Clave buscada: %s.",
+                                    c_val_str, aplicacion_id, (c_val_str, aplicacion_id)
+                                )
+                        elif len(codigos_por_app) == 1:
+                            # Sin aplicación, el código solo se asigna si no es ambiguo
+                            # (existe para una única aplicación)
+                            codigo_cierre_id = next(iter(codigos_por_app.values()))
+
+                    # --- Manejo de Fechas ---
+                    fecha_apertura_obj = parse_flexible_date(row_data.get('fecha_apertura'))
+                    fecha_resolucion_obj = parse_flexible_date(row_data.get('fecha_ultima_resolucion'))
+
+                    # --- Lógica de Workaround ---
+                    # Solo 'con wa' marca Sí; 'sin wa', null o cualquier otro valor es 'No'
+                    raw_workaround = row_data.get('workaround')
+                    workaround_val = 'Sí' if raw_workaround and 'con wa' in str(raw_workaround).lower() else 'No'
+
+                    # --- Creación del Objeto Incidencia en la Base de Datos ---
+                    obj = Incidencia(
+                        incidencia=incidencia_id, aplicacion_id=aplicacion_id, estado_id=estado_id, impacto_id=impacto_id, severidad_id=severidad_id,
+                        descripcion_incidencia=row_data.get(
+                            'descripcion_incidencia') or '',
+                        fecha_apertura=fecha_apertura_obj, fecha_ultima_resolucion=fecha_resolucion_obj,
+                        grupo_resolutor_id=grupo_resolutor_id, interfaz_id=interfaz_id, cluster_id=cluster_id,
+                        bloque_id=bloque_id, usuario_asignado_id=usuario_asignado_id, codigo_cierre_id=codigo_cierre_id,
+                        causa=row_data.get('causa') or '', 
+                        bitacora=row_data.get('bitacora') or '',
+                        tec_analisis=row_data.get('tec_analisis') or '', 
+                        correccion=row_data.get('correccion') or '',
+                        solucion_final=row_data.get('solucion_final') or '', 
+                        observaciones=row_data.get('observaciones') or '',
+                        demandas=row_data.get('demandas') or '',
+                        workaround=workaround_val,
+                        usuario_creador=usuario_creador
+                    )
+                    # Se inserta al cerrar el lote; si el archivo la repite, se omite como existente
+                    por_crear.append((i, row_data, obj))
+                    existentes.add(normalizar(str(incidencia_id)))
+
+                except Exception as e:
+                    error_msg = str(e)
+                    errors.append(
+                        {'line': i, 'row_data': f"Incidencia: {incidencia_id or 'N/A'}", 'error': error_msg})
+                    logger.error(
+                        "Error procesando registro #%s (Incidencia: %s): %s", i, incidencia_id, error_msg)
+
+            # Una transacción por lote: si hay que reintentar fila a fila, los
+            # reintentos son savepoints dentro de ella y no un commit por fila
+            with transaction.atomic():
+                creadas, fallidas = _crear_incidencias(por_crear)
+            created_count += len(creadas)
+            for obj in creadas:
+                logger.info("INCIDENCIA CREADA %s.", obj.incidencia)
+            for i, row_data, e in fallidas:
                 errors.append(
-                    {'line': i, 'row_data': f"Incidencia: {incidencia_id or 'N/A'}", 'error': error_msg})
+                    {'line': i, 'row_data': f"Incidencia: {row_data.get('incidencia')}", 'error': str(e)})
                 logger.error(
-                    f"Error procesando registro #{i} (Incidencia: {incidencia_id}): {error_msg}")
+                    "Error procesando registro #%s (Incidencia: %s): %s", i, row_data.get('incidencia'), e)
 
         # --- 4. Resumen Final y Salida ---
+        if created_count:
+            cache.delete(TOTAL_INCIDENCIAS_CACHE_KEY)
         # Preparar string con líneas fallidas para el log
         failed_lines_str = ""
         if errors:
@@ -1175,14 +1596,14 @@ def carga_masiva_inicial_view(request):
         # Log resumen consolidado
         logger.info(
             f"Resumen Carga Masiva Inicial (Usuario: {request.user}) - "
-            f"Total Leídos: {len(all_rows_data)} | "
+            f"Total Leídos: {total_leidos} | "
             f"Creadas: {created_count} | "
             f"Omitidas: {skipped_count} | "
             f"Fallidos: {len(errors)}{failed_lines_str}"
         )
 
         stats = {
-            'total': len(all_rows_data),
+            'total': total_leidos,
             'created': created_count,
             'skipped': skipped_count,
             'failed': len(errors)
@@ -1193,7 +1614,7 @@ def carga_masiva_inicial_view(request):
                 request, f'Carga finalizada. Se crearon {created_count}, se omitieron {skipped_count} y fallaron {len(errors)} registros.')
         else:
             messages.success(
-                request, f'¡Carga exitosa! Se procesaron {len(all_rows_data)} registros correctamente.')
+                request, f'¡Carga exitosa! Se procesaron {total_leidos} registros correctamente.')
 
         # Contexto para el template (reusando el mismo template de carga inicial)
         context = {
@@ -1203,6 +1624,9 @@ def carga_masiva_inicial_view(request):
         return render(request, 'gestion/carga_masiva_inicial.html', context)
 
     except Exception as e:
+        # Los lotes anteriores al error ya quedaron guardados
+        if created_count:
+            cache.delete(TOTAL_INCIDENCIAS_CACHE_KEY)
         logger.critical(
             f"Error crítico durante la carga masiva: {e}", exc_info=True)
         messages.error(
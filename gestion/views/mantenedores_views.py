@@ -1,16 +1,20 @@
+import logging
 from django.shortcuts import render, redirect, get_object_or_404
 from django.urls import reverse_lazy
 from django.contrib import messages
 from django.db.models import ProtectedError
 from ..models import Usuario, Estado, GrupoResolutor, ReglaSLA, DiaFeriado, HorarioLaboral
 from ..forms import UsuarioForm, ReglaSLAForm, HorarioLaboralForm, EstadoForm, GrupoResolutorForm, DiaFeriadoForm
-from .utils import logger
+from .utils import logger, paginar
+
+# Registros por página en los listados de los mantenedores
+MANTENEDORES_POR_PAGINA = 50
 
 
 def mantenedores_main(request):
     """Página principal que muestra las tarjetas de los diferentes mantenedores."""
     logger.info(
-        f"Usuario '{request.user}' accedió al menú principal de mantenedores.")
+        "Usuario '%s' accedió al menú principal de mantenedores.", request.user)
     return render(request, 'gestion/mantenedores/mantenedores_main.html')
 
 # === Vistas para Usuarios ===
@@ -18,10 +22,13 @@ def mantenedores_main(request):
 
 def listar_usuarios(request):
     """Muestra la lista de todos los usuarios."""
-    logger.info(f"Usuario '{request.user}' está viendo la lista de usuarios.")
-    registros = Usuario.objects.all().order_by('usuario')
+    logger.info("Usuario '%s' está viendo la lista de usuarios.", request.user)
+    registros = paginar(
+        request, Usuario.objects.order_by('usuario').values('id', 'usuario', 'nombre', 'habilitado'),
+        MANTENEDORES_POR_PAGINA)
     context = {
         'registros': registros,
+        'page_obj': registros,
     }
     return render(request, 'gestion/mantenedores/listar_usuarios.html', context)
 
@@ -30,21 +37,23 @@ def registrar_usuario(request):
     """Maneja la creación de un nuevo usuario."""
     if request.method == 'POST':
         logger.info(
-            f"Usuario '{request.user}' intenta registrar un nuevo usuario.")
+            "Usuario '%s' intenta registrar un nuevo usuario.", request.user)
         form = UsuarioForm(request.POST)
         if form.is_valid():
             usuario = form.save()
             logger.info(
-                f"Usuario '{request.user}' registró con éxito al usuario '{usuario.usuario}' (ID: {usuario.id}).")
+                "Usuario '%s' registró con éxito al usuario '%s' (ID: %s).",
+                request.user, usuario.usuario, usuario.id)
             messages.success(
                 request, f"El usuario '{usuario.usuario}' ha sido registrado correctamente.")
             return redirect('gestion:listar_usuarios')
-        else:
+        elif logger.isEnabledFor(logging.WARNING):
             logger.warning(
-                f"Fallo de validación al registrar usuario por '{request.user}'. Errores: {form.errors.as_json()}")
+                "Fallo de validación al registrar usuario por '%s'. Errores: %s",
+                request.user, form.errors.as_json())
     else:
         logger.info(
-            f"Usuario '{request.user}' accedió al formulario de registro de usuario.")
+            "Usuario '%s' accedió al formulario de registro de usuario.", request.user)
         form = UsuarioForm()
 
     context = {
@@ -60,21 +69,24 @@ def editar_usuario(request, pk):
     usuario = get_object_or_404(Usuario, pk=pk)
     if request.method == 'POST':
         logger.info(
-            f"Usuario '{request.user}' intenta editar al usuario '{usuario.usuario}' (ID: {pk}).")
+            "Usuario '%s' intenta editar al usuario '%s' (ID: %s).", request.user, usuario.usuario, pk)
         form = UsuarioForm(request.POST, instance=usuario)
         if form.is_valid():
             form.save()
             logger.info(
-                f"Usuario '{request.user}' actualizó con éxito al usuario '{usuario.usuario}' (ID: {pk}).")
+                "Usuario '%s' actualizó con éxito al usuario '%s' (ID: %s).",
+                request.user, usuario.usuario, pk)
             messages.success(
                 request, f"El usuario '{usuario.usuario}' ha sido actualizado correctamente.")
             return redirect('gestion:listar_usuarios')
-        else:
+        elif logger.isEnabledFor(logging.WARNING):
             logger.warning(
-                f"Fallo de validación al editar usuario ID {pk} por '{request.user}'. Errores: {form.errors.as_json()}")
+                "Fallo de validación al editar usuario ID %s por '%s'. Errores: %s",
+                pk, request.user, form.errors.as_json())
     else:
         logger.info(
-            f"Usuario '{request.user}' accedió al formulario para editar al usuario '{usuario.usuario}' (ID: {pk}).")
+            "Usuario '%s' accedió al formulario para editar al usuario '%s' (ID: %s).",
+            request.user, usuario.usuario, pk)
         form = UsuarioForm(instance=usuario)
 
     context = {
@@ -87,20 +99,22 @@ def editar_usuario(request, pk):
 
 def eliminar_usuario(request, pk):
     """Elimina un usuario."""
-    usuario = get_object_or_404(Usuario, pk=pk)
+    usuario = get_object_or_404(Usuario.objects.only('id', 'usuario'), pk=pk)
     if request.method == 'POST':
         logger.info(
-            f"Usuario '{request.user}' intenta eliminar al usuario '{usuario.usuario}' (ID: {pk}).")
+            "Usuario '%s' intenta eliminar al usuario '%s' (ID: %s).", request.user, usuario.usuario, pk)
         try:
             nombre_usuario = usuario.usuario
             usuario.delete()
             logger.warning(
-                f"ACCIÓN CRÍTICA: Usuario '{request.user}' ha ELIMINADO al usuario '{nombre_usuario}' (ID: {pk}).")
+                "ACCIÓN CRÍTICA: Usuario '%s' ha ELIMINADO al usuario '%s' (ID: %s).",
+                request.user, nombre_usuario, pk)
             messages.success(
                 request, f"El usuario '{nombre_usuario}' ha sido eliminado.")
         except ProtectedError:
             logger.error(
-                f"Intento de eliminación fallido por '{request.user}' para el usuario ID {pk} debido a ProtectedError.")
+                "Intento de eliminación fallido por '%s' para el usuario ID %s debido a ProtectedError.",
+                request.user, pk)
             messages.error(
                 request, f"No se puede eliminar al usuario '{usuario.usuario}' porque está asignado a incidencias.")
     return redirect('gestion:listar_usuarios')
@@ -109,10 +123,13 @@ def eliminar_usuario(request, pk):
 # === Vistas para Estados (Placeholder) ===
 def listar_estados(request):
     """Muestra la lista de todos los estados."""
-    logger.info(f"Usuario '{request.user}' está viendo la lista de estados.")
-    registros = Estado.objects.all().order_by('desc_estado')
+    logger.info("Usuario '%s' está viendo la lista de estados.", request.user)
+    registros = paginar(
+        request, Estado.objects.order_by('desc_estado').values('id', 'desc_estado', 'uso_estado'),
+        MANTENEDORES_POR_PAGINA)
     context = {
-        'registros': registros
+        'registros': registros,
+        'page_obj': registros,
     }
     return render(request, 'gestion/mantenedores/listar_estados.html', context)
 
@@ -121,21 +138,23 @@ def registrar_estado(request):
     """Maneja la creación de un nuevo estado."""
     if request.method == 'POST':
         logger.info(
-            f"Usuario '{request.user}' intenta registrar un nuevo estado.")
+            "Usuario '%s' intenta registrar un nuevo estado.", request.user)
         form = EstadoForm(request.POST)
         if form.is_valid():
             estado = form.save()
             logger.info(
-                f"Usuario '{request.user}' registró con éxito el estado '{estado.desc_estado}' (ID: {estado.id}).")
+                "Usuario '%s' registró con éxito el estado '%s' (ID: %s).",
+                request.user, estado.desc_estado, estado.id)
             messages.success(
                 request, "El estado ha sido registrado correctamente.")
             return redirect('gestion:listar_estados')
-        else:
+        elif logger.isEnabledFor(logging.WARNING):
             logger.warning(
-                f"Fallo de validación al registrar estado por '{request.user}'. Errores: {form.errors.as_json()}")
+                "Fallo de validación al registrar estado por '%s'. Errores: %s",
+                request.user, form.errors.as_json())
     else:
         logger.info(
-            f"Usuario '{request.user}' accedió al formulario de registro de estado.")
+            "Usuario '%s' accedió al formulario de registro de estado.", request.user)
         form = EstadoForm()
 
     context = {
@@ -151,21 +170,24 @@ def editar_estado(request, pk):
     estado = get_object_or_404(Estado, pk=pk)
     if request.method == 'POST':
         logger.info(
-            f"Usuario '{request.user}' intenta editar el estado '{estado.desc_estado}' (ID: {pk}).")
+            "Usuario '%s' intenta editar el estado '%s' (ID: %s).", request.user, estado.desc_estado, pk)
         form = EstadoForm(request.POST, instance=estado)
         if form.is_valid():
             form.save()
             logger.info(
-                f"Usuario '{request.user}' actualizó con éxito el estado '{estado.desc_estado}' (ID: {pk}).")
+                "Usuario '%s' actualizó con éxito el estado '%s' (ID: %s).",
+                request.user, estado.desc_estado, pk)
             messages.success(
                 request, "El estado ha sido actualizado correctamente.")
             return redirect('gestion:listar_estados')
-        else:
+        elif logger.isEnabledFor(logging.WARNING):
             logger.warning(
-                f"Fallo de validación al editar estado ID {pk} por '{request.user}'. Errores: {form.errors.as_json()}")
+                "Fallo de validación al editar estado ID %s por '%s'. Errores: %s",
+                pk, request.user, form.errors.as_json())
     else:
         logger.info(
-            f"Usuario '{request.user}' accedió al formulario para editar el estado '{estado.desc_estado}' (ID: {pk}).")
+            "Usuario '%s' accedió al formulario para editar el estado '%s' (ID: %s).",
+            request.user, estado.desc_estado, pk)
         form = EstadoForm(instance=estado)
 
     context = {
@@ -178,22 +200,24 @@ def editar_estado(request, pk):
 
 def eliminar_estado(request, pk):
     """Elimina un estado, con protección para evitar borrar registros en uso."""
-    estado = get_object_or_404(Estado, pk=pk)
+    estado = get_object_or_404(Estado.objects.only('id', 'desc_estado'), pk=pk)
     if request.method == 'POST':
         logger.info(
-            f"Usuario '{request.user}' intenta eliminar el estado '{estado.desc_estado}' (ID: {pk}).")
+            "Usuario '%s' intenta eliminar el estado '%s' (ID: %s).", request.user, estado.desc_estado, pk)
         try:
             estado_desc = estado.desc_estado
             estado.delete()
             logger.warning(
-                f"ACCIÓN CRÍTICA: Usuario '{request.user}' ha ELIMINADO el estado '{estado_desc}' (ID: {pk}).")
+                "ACCIÓN CRÍTICA: Usuario '%s' ha ELIMINADO el estado '%s' (ID: %s).",
+                request.user, estado_desc, pk)
             messages.success(
                 request, f"El estado '{estado_desc}' ha sido eliminado correctamente.")
         except ProtectedError:
             messages.error(
                 request, f"No se puede eliminar el estado '{estado.desc_estado}' porque está en uso (ej. en Aplicaciones o Incidencias).")
             logger.error(
-                f"Intento de eliminación fallido por '{request.user}' para el estado ID {pk} debido a ProtectedError.")
+                "Intento de eliminación fallido por '%s' para el estado ID %s debido a ProtectedError.",
+                request.user, pk)
     return redirect('gestion:listar_estados')
 
 # === Vistas para Grupos Resolutores (Placeholder) ===
@@ -202,10 +226,12 @@ def eliminar_estado(request, pk):
 def listar_grupos(request):
     """Muestra la lista de todos los grupos resolutores."""
     logger.info(
-        f"Usuario '{request.user}' está viendo la lista de grupos resolutores.")
-    registros = GrupoResolutor.objects.all().order_by('desc_grupo_resol')
+        "Usuario '%s' está viendo la lista de grupos resolutores.", request.user)
+    registros = paginar(
+        request, GrupoResolutor.objects.order_by('desc_grupo_resol'), MANTENEDORES_POR_PAGINA)
     context = {
-        'registros': registros
+        'registros': registros,
+        'page_obj': registros,
     }
     return render(request, 'gestion/mantenedores/listar_grupos.html', context)
 
@@ -214,21 +240,23 @@ def registrar_grupo(request):
     """Maneja la creación de un nuevo grupo resolutor."""
     if request.method == 'POST':
         logger.info(
-            f"Usuario '{request.user}' intenta registrar un nuevo grupo resolutor.")
+            "Usuario '%s' intenta registrar un nuevo grupo resolutor.", request.user)
         form = GrupoResolutorForm(request.POST)
         if form.is_valid():
             grupo = form.save()
             logger.info(
-                f"Usuario '{request.user}' registró con éxito el grupo '{grupo.desc_grupo_resol}' (ID: {grupo.id}).")
+                "Usuario '%s' registró con éxito el grupo '%s' (ID: %s).",
+                request.user, grupo.desc_grupo_resol, grupo.id)
             messages.success(
                 request, "El grupo resolutor ha sido registrado correctamente.")
             return redirect('gestion:listar_grupos')
-        else:
+        elif logger.isEnabledFor(logging.WARNING):
             logger.warning(
-                f"Fallo de validación al registrar grupo por '{request.user}'. Errores: {form.errors.as_json()}")
+                "Fallo de validación al registrar grupo por '%s'. Errores: %s",
+                request.user, form.errors.as_json())
     else:
         logger.info(
-            f"Usuario '{request.user}' accedió al formulario de registro de grupo resolutor.")
+            "Usuario '%s' accedió al formulario de registro de grupo resolutor.", request.user)
         form = GrupoResolutorForm()
 
     context = {
@@ -244,21 +272,24 @@ def editar_grupo(request, pk):
     grupo = get_object_or_404(GrupoResolutor, pk=pk)
     if request.method == 'POST':
         logger.info(
-            f"Usuario '{request.user}' intenta editar el grupo '{grupo.desc_grupo_resol}' (ID: {pk}).")
+            "Usuario '%s' intenta editar el grupo '%s' (ID: %s).", request.user, grupo.desc_grupo_resol, pk)
         form = GrupoResolutorForm(request.POST, instance=grupo)
         if form.is_valid():
             form.save()
             logger.info(
-                f"Usuario '{request.user}' actualizó con éxito el grupo '{grupo.desc_grupo_resol}' (ID: {pk}).")
+                "Usuario '%s' actualizó con éxito el grupo '%s' (ID: %s).",
+                request.user, grupo.desc_grupo_resol, pk)
             messages.success(
                 request, "El grupo resolutor ha sido actualizado correctamente.")
             return redirect('gestion:listar_grupos')
-        else:
+        elif logger.isEnabledFor(logging.WARNING):
             logger.warning(
-                f"Fallo de validación al editar grupo ID {pk} por '{request.user}'. Errores: {form.errors.as_json()}")
+                "Fallo de validación al editar grupo ID %s por '%s'. Errores: %s",
+                pk, request.user, form.errors.as_json())
     else:
         logger.info(
-            f"Usuario '{request.user}' accedió al formulario para editar el grupo '{grupo.desc_grupo_resol}' (ID: {pk}).")
+            "Usuario '%s' accedió al formulario para editar el grupo '%s' (ID: %s).",
+            request.user, grupo.desc_grupo_resol, pk)
         form = GrupoResolutorForm(instance=grupo)
 
     context = {
@@ -274,17 +305,19 @@ def eliminar_grupo(request, pk):
     grupo = get_object_or_404(GrupoResolutor, pk=pk)
     if request.method == 'POST':
         logger.info(
-            f"Usuario '{request.user}' intenta eliminar el grupo '{grupo.desc_grupo_resol}' (ID: {pk}).")
+            "Usuario '%s' intenta eliminar el grupo '%s' (ID: %s).", request.user, grupo.desc_grupo_resol, pk)
         try:
             grupo_desc = grupo.desc_grupo_resol
             grupo.delete()
             logger.warning(
-                f"ACCIÓN CRÍTICA: Usuario '{request.user}' ha ELIMINADO el grupo '{grupo_desc}' (ID: {pk}).")
+                "ACCIÓN CRÍTICA: Usuario '%s' ha ELIMINADO el grupo '%s' (ID: %s).",
+                request.user, grupo_desc, pk)
             messages.success(
                 request, f"El grupo resolutor '{grupo_desc}' ha sido eliminado correctamente.")
         except ProtectedError:
             logger.error(
-                f"Intento de eliminación fallido por '{request.user}' para el grupo ID {pk} debido a ProtectedError.")
+                "Intento de eliminación fallido por '%s' para el grupo ID %s debido a ProtectedError.",
+                request.user, pk)
             messages.error(
                 request, f"No se puede eliminar el grupo '{grupo.desc_grupo_resol}' porque está en uso.")
     return redirect('gestion:listar_grupos')
@@ -294,13 +327,20 @@ def eliminar_grupo(request, pk):
 
 def listar_reglas_sla(request):
     """Muestra la lista de todas las reglas de SLA."""
-    # Usamos select_related para optimizar la consulta y evitar N+1 queries
+    # Usamos select_related para optimizar la consulta y evitar N+1 queries;
+    # only() limita el JOIN a las columnas que muestra la plantilla
     logger.info(
-        f"Usuario '{request.user}' está viendo la lista de reglas de SLA.")
-    registros = ReglaSLA.objects.select_related(
-        'severidad', 'criticidad_aplicacion').all()
+        "Usuario '%s' está viendo la lista de reglas de SLA.", request.user)
+    reglas_qs = (
+        ReglaSLA.objects
+        .select_related('severidad', 'criticidad_aplicacion')
+        .only('tiempo_sla', 'severidad__desc_severidad', 'criticidad_aplicacion__desc_criticidad')
+        .order_by('id')
+    )
+    registros = paginar(request, reglas_qs, MANTENEDORES_POR_PAGINA)
     context = {
-        'registros': registros
+        'registros': registros,
+        'page_obj': registros,
     }
     return render(request, 'gestion/mantenedores/listar_reglas_sla.html', context)
 
@@ -309,21 +349,23 @@ def registrar_regla_sla(request):
     """Maneja la creación de una nueva regla de SLA."""
     if request.method == 'POST':
         logger.info(
-            f"Usuario '{request.user}' intenta registrar una nueva regla de SLA.")
+            "Usuario '%s' intenta registrar una nueva regla de SLA.", request.user)
         form = ReglaSLAForm(request.POST)
         if form.is_valid():
             regla = form.save()
             logger.info(
-                f"Usuario '{request.user}' registró con éxito la regla de SLA '{regla}' (ID: {regla.id}).")
+                "Usuario '%s' registró con éxito la regla de SLA '%s' (ID: %s).",
+                request.user, regla, regla.id)
             messages.success(
                 request, "La regla de SLA ha sido registrada correctamente.")
             return redirect('gestion:listar_reglas_sla')
-        else:
+        elif logger.isEnabledFor(logging.WARNING):
             logger.warning(
-                f"Fallo de validación al registrar regla SLA por '{request.user}'. Errores: {form.errors.as_json()}")
+                "Fallo de validación al registrar regla SLA por '%s'. Errores: %s",
+                request.user, form.errors.as_json())
     else:
         logger.info(
-            f"Usuario '{request.user}' accedió al formulario de registro de regla de SLA.")
+            "Usuario '%s' accedió al formulario de registro de regla de SLA.", request.user)
         form = ReglaSLAForm()
 
     context = {
@@ -336,24 +378,28 @@ def registrar_regla_sla(request):
 
 def editar_regla_sla(request, pk):
     """Maneja la edición de una regla de SLA existente."""
-    regla = get_object_or_404(ReglaSLA, pk=pk)
+    # str(regla), usado en los logs, muestra la severidad y la criticidad
+    regla = get_object_or_404(
+        ReglaSLA.objects.select_related('severidad', 'criticidad_aplicacion'), pk=pk)
     if request.method == 'POST':
         logger.info(
-            f"Usuario '{request.user}' intenta editar la regla de SLA '{regla}' (ID: {pk}).")
+            "Usuario '%s' intenta editar la regla de SLA '%s' (ID: %s).", request.user, regla, pk)
         form = ReglaSLAForm(request.POST, instance=regla)
         if form.is_valid():
             form.save()
             logger.info(
-                f"Usuario '{request.user}' actualizó con éxito la regla de SLA '{regla}' (ID: {pk}).")
+                "Usuario '%s' actualizó con éxito la regla de SLA '%s' (ID: %s).", request.user, regla, pk)
             messages.success(
                 request, "La regla de SLA ha sido actualizada correctamente.")
             return redirect('gestion:listar_reglas_sla')
-        else:
+        elif logger.isEnabledFor(logging.WARNING):
             logger.warning(
-                f"Fallo de validación al editar regla SLA ID {pk} por '{request.user}'. Errores: {form.errors.as_json()}")
+                "Fallo de validación al editar regla SLA ID %s por '%s'. Errores: %s",
+                pk, request.user, form.errors.as_json())
     else:
         logger.info(
-            f"Usuario '{request.user}' accedió al formulario para editar la regla de SLA '{regla}' (ID: {pk}).")
+            "Usuario '%s' accedió al formulario para editar la regla de SLA '%s' (ID: %s).",
+            request.user, regla, pk)
         form = ReglaSLAForm(instance=regla)
 
     context = {
@@ -366,14 +412,16 @@ def editar_regla_sla(request, pk):
 
 def eliminar_regla_sla(request, pk):
     """Elimina una regla de SLA."""
-    regla = get_object_or_404(ReglaSLA, pk=pk)
+    regla = get_object_or_404(
+        ReglaSLA.objects.select_related('severidad', 'criticidad_aplicacion'), pk=pk)
     if request.method == 'POST':
         regla_desc = str(regla)
         logger.info(
-            f"Usuario '{request.user}' intenta eliminar la regla de SLA '{regla_desc}' (ID: {pk}).")
+            "Usuario '%s' intenta eliminar la regla de SLA '%s' (ID: %s).", request.user, regla_desc, pk)
         regla.delete()
         logger.warning(
-            f"ACCIÓN CRÍTICA: Usuario '{request.user}' ha ELIMINADO la regla de SLA '{regla_desc}' (ID: {pk}).")
+            "ACCIÓN CRÍTICA: Usuario '%s' ha ELIMINADO la regla de SLA '%s' (ID: %s).",
+            request.user, regla_desc, pk)
         messages.success(
             request, f"La regla de SLA para '{regla_desc}' ha sido eliminada.")
     return redirect('gestion:listar_reglas_sla')
@@ -382,10 +430,13 @@ def eliminar_regla_sla(request, pk):
 def listar_dias_feriados(request):
     """Muestra la lista de todos los días feriados."""
     logger.info(
-        f"Usuario '{request.user}' está viendo la lista de días feriados.")
-    registros = DiaFeriado.objects.all().order_by('fecha')
+        "Usuario '%s' está viendo la lista de días feriados.", request.user)
+    registros = paginar(
+        request, DiaFeriado.objects.order_by('fecha').values('id', 'fecha', 'descripcion'),
+        MANTENEDORES_POR_PAGINA)
     context = {
-        'registros': registros
+        'registros': registros,
+        'page_obj': registros,
     }
     return render(request, 'gestion/mantenedores/listar_dias_feriados.html', context)
 
@@ -447,8 +498,9 @@ def listar_horarios_laborales(request):
     Muestra la lista de todos los horarios laborales y determina si se pueden
     agregar nuevos (si no existen registros para los 7 días de la semana).
     """
-    registros = HorarioLaboral.objects.all()
-    se_pueden_agregar_mas = registros.count() < 7
+    # Como máximo hay 7 registros: se leen una vez y se cuentan en memoria
+    registros = list(HorarioLaboral.objects.all())
+    se_pueden_agregar_mas = len(registros) < 7
     context = {
         'registros': registros,
         'se_pueden_agregar_mas': se_pueden_agregar_mas,
@@ -499,7 +551,7 @@ def editar_horario_laboral(request, pk):
 
 def eliminar_horario_laboral(request, pk):
     """Elimina un horario laboral, permitiendo que se pueda volver a crear."""
-    horario = get_object_or_404(HorarioLaboral, pk=pk)
+    horario = get_object_or_404(HorarioLaboral.objects.only('id', 'dia_semana'), pk=pk)
     if request.method == 'POST':
         dia_semana_display = horario.get_dia_semana_display()
         horario.delete()
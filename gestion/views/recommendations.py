@@ -1,15 +1,16 @@
-import joblib
 import json
 import logging
+import numpy as np
+from functools import lru_cache
 from django.conf import settings
 from django.http import JsonResponse
 from django.shortcuts import render
 from django.views.decorators.http import require_POST
-from sklearn.metrics.pairwise import cosine_similarity
 
 from django.contrib.auth.decorators import login_required, user_passes_test
 from gestion.models import CodigoCierre, Aplicacion
-from gestion.ml.incident_classifier import normalizar_texto, MODEL_PATH, build_and_save_similarity_model
+from gestion.ml.incident_classifier import normalizar_texto, MODEL_PATH, build_and_save_similarity_model, cargar_modelo
+from gestion.views.cod_cierre import version_codigos_cierre
 
 logger = logging.getLogger(__name__)
 
@@ -17,11 +18,9 @@ logger = logging.getLogger(__name__)
 
 
 def load_model():
-    """Carga el modelo de similitud desde el archivo."""
+    """Obtiene el modelo de similitud (en caché mientras el archivo no cambie)."""
     try:
-        model_data = joblib.load(MODEL_PATH)
-        logger.info("Modelo de similitud cargado correctamente.")
-        return model_data
+        return cargar_modelo()
     except FileNotFoundError:
         logger.error(
             f"No se encontró el archivo del modelo en {MODEL_PATH}. Ejecuta 'python manage.py train_incident_classifier' para crearlo.")
@@ -31,10 +30,29 @@ def load_model():
         return None
 
 
-SIMILARITY_MODEL_DATA = load_model()
 # Umbral de similitud (ajustar según sea necesario, 20% es un buen punto de partida)
 SIMILARITY_THRESHOLD = 0.20
 
+# Por debajo de esta similitud máxima ningún código guarda relación con la
+# descripción: se responde sin sugerencias y sin consultar la base de datos
+MIN_SIMILARITY_SCORE = 0.02
+
+
+@lru_cache(maxsize=2048)
+def _datos_codigos_sugeridos(codigo_ids, version):
+    """
+    Devuelve {id: (cod_cierre, desc_cod_cierre)} de los códigos indicados (tupla).
+    Se guarda en memoria por combinación de códigos; `version` es la versión de
+    los códigos de cierre del proceso (cualquier cambio en CodigoCierre la
+    incrementa, ver gestion/signals.py, y nunca vuelve atrás), así que una
+    edición deja obsoletas las entradas anteriores sin necesidad de limpiarlas.
+    """
+    return {
+        pk: (cod_cierre, desc_cod_cierre)
+        for pk, cod_cierre, desc_cod_cierre in CodigoCierre.objects.filter(
+            pk__in=codigo_ids).values_list('id', 'cod_cierre', 'desc_cod_cierre')
+    }
+
 
 def recommendation_test_page(request):
     """
@@ -56,12 +74,11 @@ def reentrenar_modelo_view(request):
     
     try:
         logger.info("Iniciando re-entrenamiento manual del modelo...")
-        build_and_save_similarity_model()
-        
-        # Recargar el modelo en memoria global
-        global SIMILARITY_MODEL_DATA
-        SIMILARITY_MODEL_DATA = load_model()
-        
+        # Incremental por defecto; 'full=true' fuerza la reconstrucción completa
+        build_and_save_similarity_model(full=request.POST.get('full') == 'true')
+
+        # No es necesario recargar: load_model() detecta el nuevo archivo por su mtime
+        _datos_codigos_sugeridos.cache_clear()
         return JsonResponse({'status': 'success', 'message': 'Modelo re-entrenado y recargado exitosamente.'})
     except Exception as e:
         logger.error(f"Error durante el re-entrenamiento manual: {e}", exc_info=True)
@@ -73,12 +90,9 @@ def recommend_closure_code_view(request):
     """
     Recibe una descripción y busca los 3 CodigoCierre más similares en la base de conocimiento.
     """
-    global SIMILARITY_MODEL_DATA
-    if not SIMILARITY_MODEL_DATA:
-        # Intentar cargar si estaba vacío (por si falló al inicio pero ya se creó)
-        SIMILARITY_MODEL_DATA = load_model()
-        if not SIMILARITY_MODEL_DATA:
-            return JsonResponse({'status': 'error', 'message': 'El servicio de recomendación no está disponible.'}, status=503)
+    model_data = load_model()
+    if not model_data:
+        return JsonResponse({'status': 'error', 'message': 'El servicio de recomendación no está disponible.'}, status=503)
 
     # Log #1: Confirmamos que la vista se está ejecutando en cuanto llega una petición.
     logger.info("recommend_closure_code_view: Vista iniciada.")
@@ -101,78 +115,80 @@ def recommend_closure_code_view(request):
             return JsonResponse({'status': 'error', 'message': 'La descripción no puede estar vacía.'}, status=400)
 
         # Extraer componentes del modelo
-        vectorizer = SIMILARITY_MODEL_DATA['vectorizer']
-        tfidf_matrix = SIMILARITY_MODEL_DATA['tfidf_matrix']
-        all_code_ids = SIMILARITY_MODEL_DATA['code_ids']
-        code_to_app_map = SIMILARITY_MODEL_DATA.get('code_to_app_map', {})
+        tfidf_matrix = model_data['tfidf_matrix']
+        all_code_ids = model_data['code_ids']
+        code_to_app_map = model_data.get('code_to_app_map', {})
 
         # --- Filtrar por aplicativo ---
-        indices_to_search = list(range(len(all_code_ids)))
+        # La submatriz de cada aplicación queda en caché mientras no cambie el modelo
+        filtered_tfidf_matrix = tfidf_matrix
         code_ids_to_search = all_code_ids
 
         if application_id and code_to_app_map:
             logger.debug(f"Filtrando por application_id: {application_id}")
-            filtered_indices = []
-            filtered_code_ids = []
-            for i, code_id in enumerate(all_code_ids):
-                app_list = code_to_app_map.get(code_id, [])
-                if not app_list or int(application_id) in app_list:
-                    filtered_indices.append(i)
-                    filtered_code_ids.append(code_id)
-
-            indices_to_search = filtered_indices
-            code_ids_to_search = filtered_code_ids
-
-        if not code_ids_to_search:
+            filtered_tfidf_matrix, code_ids_to_search = model_data['filtrar_por_aplicacion'](
+                int(application_id))
+
+        if len(code_ids_to_search) == 0:
             return JsonResponse({'status': 'error', 'message': 'No hay códigos de cierre para la aplicación seleccionada.'}, status=404)
 
-        filtered_tfidf_matrix = tfidf_matrix[indices_to_search]
-        
-        # 1. Vectorizar la nueva descripción
+        # 1. Vectorizar la nueva descripción (las repetidas salen del caché del modelo)
         normalized_description = normalizar_texto(description)
-        description_vector = vectorizer.transform([normalized_description])
+        description_vector = model_data['vectorizar'](normalized_description)
 
         # 2. Calcular la similitud del coseno
-        cosine_similarities = cosine_similarity(
-            description_vector, filtered_tfidf_matrix).flatten()
+        # TfidfTransformer ya deja en norma L2 tanto las filas del modelo como el
+        # vector de la descripción, así que el coseno es un único producto disperso
+        cosine_similarities = (
+            description_vector @ filtered_tfidf_matrix.T).toarray().ravel()
 
         if cosine_similarities.size == 0:
             return JsonResponse({'status': 'error', 'message': 'Error al calcular la similitud.'}, status=500)
 
+        if cosine_similarities.max() < MIN_SIMILARITY_SCORE:
+            logger.info("Ningún código supera la similitud mínima, no se envían sugerencias.")
+            return JsonResponse({'status': 'success', 'sugerencias': [], 'message': 'No hay códigos de cierre similares a la descripción.'})
+
         # 3. Encontrar los Top 3 más similares
-        # Ordenamos los índices de mayor a menor similitud
-        # argsort devuelve índices ascendentes, tomamos los últimos (mayores) e invertimos
+        # argpartition separa los top_k mayores en O(N) sin ordenar todo el vector;
+        # luego solo esos top_k se ordenan de mayor a menor similitud
         top_k = min(3, len(cosine_similarities))
-        top_indices_local = cosine_similarities.argsort()[-top_k:][::-1]
+        top_indices_local = np.argpartition(cosine_similarities, -top_k)[-top_k:]
+        top_indices_local = top_indices_local[
+            np.argsort(cosine_similarities[top_indices_local])[::-1]]
         
         sugerencias_response = []
-        
-        for idx in top_indices_local:
+
+        # Una sola consulta para los códigos sugeridos (ninguna si ya están en
+        # memoria); los que ya no existen se omiten
+        top_code_ids = code_ids_to_search[top_indices_local].tolist()
+        codigos_sugeridos = _datos_codigos_sugeridos(
+            tuple(top_code_ids), version_codigos_cierre())
+
+        for idx, predicted_code_id in zip(top_indices_local, top_code_ids):
             score = cosine_similarities[idx]
-            predicted_code_id = code_ids_to_search[idx]
-            
-            try:
-                suggested_code = CodigoCierre.objects.get(pk=predicted_code_id)
-                
-                # Definir acción y mensaje por cada item
-                if score >= SIMILARITY_THRESHOLD:
-                    accion = 'use_suggestion'
-                    msg = "Alta coincidencia"
-                else:
-                    accion = 'review'
-                    msg = "Coincidencia baja"
-
-                sugerencias_response.append({
-                    'id': suggested_code.id,
-                    'codigo_cierre': suggested_code.cod_cierre,
-                    'descripcion': suggested_code.desc_cod_cierre,
-                    'confianza': f"{score:.2%}",
-                    'raw_score': float(score),
-                    'accion_recomendada': accion,
-                    'mensaje': msg
-                })
-            except CodigoCierre.DoesNotExist:
+            datos_codigo = codigos_sugeridos.get(predicted_code_id)
+            if datos_codigo is None:
                 continue
+            cod_cierre, desc_cod_cierre = datos_codigo
+
+            # Definir acción y mensaje por cada item
+            if score >= SIMILARITY_THRESHOLD:
+                accion = 'use_suggestion'
+                msg = "Alta coincidencia"
+            else:
+                accion = 'review'
+                msg = "Coincidencia baja"
+
+            sugerencias_response.append({
+                'id': predicted_code_id,
+                'codigo_cierre': cod_cierre,
+                'descripcion': desc_cod_cierre,
+                'confianza': f"{score:.2%}",
+                'raw_score': float(score),
+                'accion_recomendada': accion,
+                'mensaje': msg
+            })
 
         logger.info(f"Enviando {len(sugerencias_response)} sugerencias.")
         return JsonResponse({'status': 'success', 'sugerencias': sugerencias_response})
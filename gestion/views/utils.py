@@ -1,7 +1,24 @@
 # gestion/views/utils.py
 
+import json
 import logging
-from functools import wraps
+from functools import lru_cache, wraps
+from itertools import islice
+from django.core.paginator import Paginator
+from django.utils.module_loading import import_string
+
+# orjson (opcional) parsea bytes UTF-8 directamente y es bastante más rápido
+# en archivos grandes; si no está instalado se usa el módulo estándar.
+# json_dumps devuelve siempre bytes UTF-8, listos para HttpResponse.
+try:
+    import orjson
+    json_loads = orjson.loads
+    json_dumps = orjson.dumps
+except ImportError:
+    json_loads = json.loads
+
+    def json_dumps(obj):
+        return json.dumps(obj, separators=(',', ':')).encode()
 
 # El logger se puede configurar aquí o en cada archivo
 logger = logging.getLogger(__name__)
@@ -19,6 +36,123 @@ def no_cache(view_func):
     return _wrapped_view
 
 
+class EchoBuffer:
+    """
+    Pseudo-archivo para csv.writer: devuelve la línea escrita en lugar de
+    acumularla, de modo que el CSV pueda emitirse por partes con
+    StreamingHttpResponse.
+    """
+
+    def write(self, value):
+        return value
+
+
+def lotes(iterable, tamano):
+    """Agrupa `iterable` en listas de hasta `tamano` elementos."""
+    iterador = iter(iterable)
+    while bloque := list(islice(iterador, tamano)):
+        yield bloque
+
+
+def lineas_csv(writer, filas, lote=500):
+    """
+    Escribe las filas con `writer` (sobre un EchoBuffer) y emite el texto en
+    bloques de `lote` líneas, en lugar de una línea por iteración.
+    """
+    for bloque in lotes(filas, lote):
+        yield ''.join(map(writer.writerow, bloque))
+
+
+class FilaFallida:
+    """
+    Registro de un archivo de carga que no se pudo procesar. Se serializa a
+    JSON recién al mostrarse en la plantilla, no al momento del fallo.
+    """
+    __slots__ = ('row',)
+
+    def __init__(self, row):
+        self.row = row
+
+    def __str__(self):
+        return json.dumps(self.row, ensure_ascii=False, separators=(',', ':'), default=str)
+
+
+def paginar(request, queryset, por_pagina, total=None):
+    """
+    Devuelve la página solicitada en `?page=` del queryset. Los valores
+    inválidos o fuera de rango devuelven la primera o la última página.
+    El queryset debe tener un orden definido para que las páginas sean estables.
+    Si ya se conoce el número de registros (`total`), se evita el COUNT(*).
+    """
+    paginator = Paginator(queryset, por_pagina)
+    if total is not None:
+        paginator.count = total
+    return paginator.get_page(request.GET.get('page'))
+
+
+# Tamaño máximo aceptado para los archivos JSON de carga masiva
+TAMANO_MAXIMO_CARGA_JSON = 50 * 1024 * 1024
+
+
+def validar_archivo_json(archivo):
+    """
+    Verificación rápida de un archivo de carga masiva antes de leerlo: nombre
+    con extensión .json, tamaño bajo TAMANO_MAXIMO_CARGA_JSON y contenido que
+    empiece con '[' o '{' (se descartan archivos renombrados leyendo solo los
+    primeros bytes). Devuelve el mensaje de error, o None si es válido.
+    """
+    if not archivo or not archivo.name.endswith('.json'):
+        return 'Por favor, seleccione un archivo JSON válido.'
+    if archivo.size > TAMANO_MAXIMO_CARGA_JSON:
+        return 'El archivo supera el tamaño máximo permitido de %d MB.' % (
+            TAMANO_MAXIMO_CARGA_JSON // (1024 * 1024))
+    inicio = archivo.read(64).lstrip(b'\xef\xbb\xbf \t\r\n')[:1]
+    archivo.seek(0)
+    if inicio not in (b'[', b'{'):
+        return 'Por favor, seleccione un archivo JSON válido.'
+    return None
+
+
+def leer_json_subido(archivo):
+    """
+    Lee y parsea un archivo JSON subido para las cargas masivas.
+
+    El contenido se parsea tal cual (bytes, sin decodificar), por lo que el caso
+    habitual, una lista, no genera copias. Se toleran dos formatos adicionales:
+    un único objeto, que se devuelve como lista de un elemento, y una serie de
+    objetos separados por coma sin los corchetes [], que se envuelve y se vuelve
+    a parsear. Lanza json.JSONDecodeError si el contenido no es JSON válido.
+    """
+    contenido = archivo.read()
+    try:
+        datos = json_loads(contenido)
+    except json.JSONDecodeError:
+        if not (contenido[:64].lstrip().startswith(b'{')
+                and contenido[-64:].rstrip().endswith(b'}')):
+            raise
+        logger.info("El archivo JSON parece no tener corchetes de lista. Intentando envolverlo automáticamente.")
+        # Solo en este caso se hace una copia del contenido
+        datos = json_loads(b"[" + contenido + b"]")
+    if isinstance(datos, dict):
+        datos = [datos]
+    return datos
+
+
 def is_staff(user):
     """Verifica si un usuario pertenece al staff."""
     return user.is_staff
+
+
+def lazy_view(dotted_path):
+    """
+    Devuelve una vista que importa `dotted_path` recién en la primera petición.
+    Evita cargar módulos pesados (scikit-learn, modelo de similitud) al iniciar
+    cada worker.
+    """
+    @lru_cache(maxsize=None)
+    def _resolve():
+        return import_string(dotted_path)
+
+    def _view(request, *args, **kwargs):
+        return _resolve()(request, *args, **kwargs)
+    return _view